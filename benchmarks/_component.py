@@ -0,0 +1,26 @@
+"""
+Import helper for the benchmarks.
+
+The integration package's ``__init__`` imports Home Assistant. Benchmarks of
+modules that do not depend on Home Assistant (dispatch, ingest, metrics and
+the parsers) import them through this helper, which registers the package
+without running its ``__init__``.
+"""
+import importlib
+import os
+import sys
+import types
+
+PACKAGE = "ha_rf_bridge_sensor"
+COMPONENT_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "custom_components", PACKAGE)
+)
+
+
+def component_module(name):
+    """Import ``name`` from the integration package."""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [COMPONENT_DIR]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.{name}")
@@ -0,0 +1,88 @@
+"""
+Benchmark the byte-level payload pre-classifier against a full JSON decode.
+
+Usage:
+    python3 benchmarks/bench_classifier.py [--messages N] [--rf-ratio R]
+
+The "json" path is what the MQTT callback used to do for every message:
+``json.loads`` the payload and look for RfReceived/RfRaw. The "classifier"
+path is ``classify_payload`` with the JSON fallback for unusual layouts.
+Both are checked to agree on every message before they are timed.
+"""
+import argparse
+import random
+import timeit
+
+from _component import component_module
+
+ingest = component_module("ingest")
+
+NON_RF_PAYLOADS = [
+    b'{"POWER":"ON"}',
+    b'{"RfKey3":"Learned sample saved"}',
+    b'{"Time":"2024-05-01T12:00:00","RfKey":{"Sync":14080,"Low":460,"High":1370,"Data":"E5D4B2"}}',
+    b'{"StatusSNS":{"Time":"2024-05-01T12:00:00"}}',
+    b'{"Command":"Unknown"}',
+]
+
+
+def rf_received(rng):
+    return (
+        b'{"Time":"2024-05-01T12:00:00","RfReceived":{"Sync":%d,"Low":%d,"High":%d,'
+        b'"Data":"%06X","RfKey":"None"}}'
+        % (rng.randrange(9000, 15000), rng.randrange(300, 500), rng.randrange(900, 1400),
+           rng.randrange(1 << 24))
+    )
+
+
+def rf_raw(rng):
+    symbols = "".join(rng.choice(("81", "82")) for _ in range(42))
+    return b'{"Time":"2024-05-01T12:00:00","RfRaw":{"Data":"AA B1 04 0190 03D4 0820 1F04 %s 55"}}' % (
+        symbols.encode()
+    )
+
+
+def json_path(payload):
+    """The previous callback: always decode the JSON."""
+    try:
+        return ingest.extract_rf_data_json(payload)
+    except ValueError:
+        return None
+
+
+def classifier_path(payload):
+    """The byte-level classifier with JSON fallback."""
+    frame = ingest.classify_payload(payload)
+    if frame is ingest.NEEDS_JSON:
+        return json_path(payload)
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the payload pre-classifier.")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--rf-ratio", type=float, default=0.5,
+                        help="Share of messages carrying RF data.")
+    parser.add_argument("--number", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    messages = []
+    for _ in range(args.messages):
+        if rng.random() < args.rf_ratio:
+            messages.append(rf_received(rng) if rng.random() < 0.5 else rf_raw(rng))
+        else:
+            messages.append(rng.choice(NON_RF_PAYLOADS))
+
+    mismatches = sum(1 for m in messages if json_path(m) != classifier_path(m))
+    json_time = timeit.timeit(lambda: [json_path(m) for m in messages], number=args.number)
+    fast_time = timeit.timeit(lambda: [classifier_path(m) for m in messages], number=args.number)
+    calls = len(messages) * args.number
+    print(f"messages {args.messages}, RF ratio {args.rf_ratio}, mismatches {mismatches}")
+    print(f"json.loads  {json_time / calls * 1e6:6.3f} us/message")
+    print(f"classifier  {fast_time / calls * 1e6:6.3f} us/message")
+    print(f"speedup     {json_time / fast_time:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark the compiled field-spec parsers against the hand written decoders.
+
+Usage:
+    python3 benchmarks/bench_fieldspec.py [--number N]
+
+The legacy decoders below are the string slicing implementations the parsers
+used before they were expressed as field-spec protocols. Both implementations
+are checked to agree on the sample frames before they are timed.
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+COMPONENT_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "custom_components", "ha_rf_bridge_sensor"
+)
+sys.path.insert(0, os.path.abspath(COMPONENT_DIR))
+
+from parsers import example_parser, temp_hum_parser  # noqa: E402
+
+
+def legacy_example_parse(data):
+    """Hand written example_parser.parse."""
+    if not isinstance(data, str) or len(data) < 10:
+        return None
+    try:
+        device_id = data[0:4]
+        temperature = int(data[4:8], 16) / 10.0
+        if not -50 < temperature < 150:
+            return None
+        humidity = int(data[8:10], 16)
+        if not 0 <= humidity <= 100:
+            return None
+        return {"id": device_id, "temperature": temperature, "humidity": humidity}
+    except (ValueError, TypeError):
+        return None
+
+
+def legacy_temp_hum_parse(data):
+    """Hand written temp_hum_parser.parse."""
+    if not isinstance(data, str) or len(data) < 100:
+        return None
+    try:
+        data_array = data.replace('81', '0').replace('82', '1').split(' ')
+        if len(data_array) <= 7 or len(data_array[7]) < 37:
+            return None
+        binary_data = data_array[7]
+        device_type = int(binary_data[12:15], 2)
+        device_id = int(binary_data[5:13], 2)
+        temp_int = int(binary_data[20:29], 2)
+        if temp_int & (1 << 8):
+            temp_int = temp_int - 512
+        humidity = int(binary_data[29:37], 2)
+        return {
+            "id": f"{device_type}-{device_id}",
+            "temperature": temp_int / 10.0,
+            "humidity": humidity,
+        }
+    except (ValueError, IndexError, TypeError):
+        return None
+
+
+def example_frames(rng, count):
+    """Generate hex frames in the example_parser format."""
+    return [
+        f"{rng.randrange(0x10000):04X}{rng.randrange(0, 1600):04X}{rng.randrange(0, 110):02X}"
+        for _ in range(count)
+    ]
+
+
+def temp_hum_frames(rng, count):
+    """Generate Tasmota RfRaw bucket frames in the temp_hum_parser format."""
+    frames = []
+    for _ in range(count):
+        bits = "".join(rng.choice("01") for _ in range(42))
+        symbols = "".join("81" if bit == "0" else "82" for bit in bits)
+        frames.append(f"AA B1 04 0190 03D4 0820 1F04 {symbols} 55")
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark field-spec parsers.")
+    parser.add_argument("--number", type=int, default=20, help="Passes over the frame set.")
+    parser.add_argument("--frames", type=int, default=5000, help="Frames per parser.")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    cases = [
+        ("example_parser", legacy_example_parse, example_parser.parse, example_frames(rng, args.frames)),
+        ("temp_hum_parser", legacy_temp_hum_parse, temp_hum_parser.parse, temp_hum_frames(rng, args.frames)),
+    ]
+
+    for name, legacy, compiled, frames in cases:
+        mismatches = sum(1 for frame in frames if legacy(frame) != compiled(frame))
+        legacy_time = timeit.timeit(lambda: [legacy(f) for f in frames], number=args.number)
+        compiled_time = timeit.timeit(lambda: [compiled(f) for f in frames], number=args.number)
+        calls = len(frames) * args.number
+        print(
+            f"{name:16} legacy {legacy_time / calls * 1e6:6.2f} us/frame  "
+            f"compiled {compiled_time / calls * 1e6:6.2f} us/frame  "
+            f"speedup {legacy_time / compiled_time:4.2f}x  mismatches {mismatches}"
+        )
+
+
+if __name__ == "__main__":
+    main()
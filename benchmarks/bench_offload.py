@@ -0,0 +1,139 @@
+"""
+Benchmark event loop latency with CPU heavy parsers inline and offloaded.
+
+Usage:
+    python3 benchmarks/bench_offload.py [--frames N] [--work N] [--workers N]
+
+A parser declaring ``CPU_HEAVY`` brute-forces a CRC-8 over each frame (pure
+Python, ``--work`` rounds) and a second one hashes a long key with
+``hashlib.pbkdf2_hmac``, which releases the GIL. Frames are dispatched the way
+the coordinator's consumer does it, either with the heavy parsers run on the
+loop or through ``OrderedOffload``, while a ticker task measures how late the
+loop wakes it up every millisecond. The delivered frame order is checked.
+"""
+import argparse
+import asyncio
+import hashlib
+import statistics
+import time
+import types
+
+from _component import component_module
+
+dispatch = component_module("dispatch")
+offload = component_module("offload")
+
+TICK = 0.001
+
+
+def crc8(data, poly):
+    """Bitwise CRC-8 of ``data``."""
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def make_parsers(work):
+    """Return the heavy parser modules."""
+    def crc_parse(data):
+        if not data.startswith("C"):
+            return None
+        payload = data.encode()
+        # Look for the polynomial the frame was sent with
+        for poly in range(1, work + 1):
+            crc8(payload, poly)
+        return {"id": data[1:4], "seq": int(data[4:])}
+
+    def hash_parse(data):
+        if not data.startswith("H"):
+            return None
+        hashlib.pbkdf2_hmac("sha256", data.encode(), b"rolling", work * 10)
+        return {"id": data[1:4], "seq": int(data[4:])}
+
+    return {
+        "crc": types.SimpleNamespace(parse=crc_parse, CPU_HEAVY=True, PAYLOAD_KINDS=("RfRaw",)),
+        "hash": types.SimpleNamespace(parse=hash_parse, CPU_HEAVY=True, PAYLOAD_KINDS=("RfRaw",)),
+    }
+
+
+async def ticker(lags, stop):
+    """Record how late every wake-up of a 1 ms periodic task is."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(loop.time() - expected)
+
+
+async def run(frames, dispatcher, workers):
+    """Dispatch all frames, returning loop lags, elapsed time and delivered order."""
+    delivered = []
+    lags = []
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(TICK * 5)
+
+    def deliver(context, result):
+        heavy_dispatcher, data = context
+        if heavy_dispatcher is not None:
+            result = heavy_dispatcher.complete_heavy(data, "RfRaw", result)
+        delivered.append(result[1]["seq"])
+
+    pool = offload.OrderedOffload(workers, 100, deliver) if workers else None
+    start = time.perf_counter()
+    for data in frames:
+        if pool is None:
+            _name, parsed = dispatcher.dispatch(data, "RfRaw")
+            delivered.append(parsed["seq"])
+        else:
+            heavy = []
+            _name, parsed = dispatcher.dispatch(data, "RfRaw", heavy)
+            if heavy and parsed is None:
+                if pool.full:
+                    await pool.async_wait_room()
+                pool.submit(loop, (dispatcher, data), dispatcher.run_heavy, heavy, data)
+            else:
+                pool.append(loop, (None, data), (_name, parsed))
+        # The consumer gives the loop back between frames of a batch
+        await asyncio.sleep(0)
+    while len(delivered) < len(frames):
+        await asyncio.sleep(TICK)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick_task
+    if pool is not None:
+        pool.shutdown()
+    return lags, elapsed, delivered
+
+
+def report(label, lags, elapsed, delivered, frames):
+    """Print the loop lag percentiles."""
+    lags = sorted(lags)
+    p99 = lags[int(len(lags) * 0.99)] if lags else 0
+    print(
+        f"{label:12} {len(frames) / elapsed:8.1f} frames/s  loop lag p50 "
+        f"{statistics.median(lags) * 1000:7.3f} ms  p99 {p99 * 1000:7.3f} ms  "
+        f"max {lags[-1] * 1000:7.3f} ms  in order {delivered == list(range(len(frames)))}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offloading of CPU heavy parsers.")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--work", type=int, default=500, help="CRC polynomials tried per frame.")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    frames = [f"{'CH'[seq % 2]}{seq % 7:03d}{seq}" for seq in range(args.frames)]
+    for label, workers in (("inline", 0), ("offloaded", args.workers)):
+        dispatcher = dispatch.ParserDispatcher(make_parsers(args.work))
+        lags, elapsed, delivered = asyncio.run(run(frames, dispatcher, workers))
+        report(label, lags, elapsed, delivered, frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+"""
+End-to-end replay benchmark of the RF Bridge coordinator.
+
+Usage:
+    python3 benchmarks/bench_replay.py [--devices N] [--frames N] [--rate R]
+    python3 benchmarks/bench_replay.py --replay capture.txt [--rate R]
+    python3 benchmarks/bench_replay.py --replay <config>/ha_rf_bridge_sensor_capture/<entry_id>
+
+Drives ``RFBridgeCoordinator`` through ``async_setup_entry`` with an
+in-process MQTT stand-in and reports message throughput, frame-to-state-write
+latency and memory growth of the integration. Unlike the other benchmarks
+this one imports ``sensor.py`` and therefore needs Home Assistant installed
+(a Home Assistant development environment); nothing from Home Assistant is
+started, the pieces the coordinator talks to are replaced by the stand-ins
+below:
+
+    mqtt.async_subscribe       LocalBroker, matching topics with +/# wildcards
+    Store                      MemoryStore, never touching the disk
+    async_call_later / async_track_time_interval
+                               plain event loop timers / no-op
+    entity platform            entities register with the coordinator as
+                               when added to hass, and ``async_write_ha_state``
+                               is timed, not written; entities disabled by
+                               default (the rolling aggregates) are left out
+                               unless ``--aggregates`` is given
+
+The stream is either synthetic (hex RfReceived and RfRaw bucket frames of the
+bundled parsers, repeated and heard by several bridges like real Tasmota
+traffic, mixed with non-RF telemetry) or replayed from a text file with one
+``topic<TAB>payload`` or bare payload per line, or from a frame capture
+written by the integration. Every RF ID found in the
+stream is configured as a device except for ``--unconfigured-ratio`` of them,
+which exercise discovery.
+
+Latency is measured from the publish of the first copy of a frame that was
+queued to the state write it caused. Writes deferred by the minimum interval
+are counted but have no latency sample. With ``--memory`` allocations made by
+the integration are traced; tracing slows everything down, so compare
+throughput only between runs with the same flag.
+"""
+import argparse
+import asyncio
+import functools
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from _component import COMPONENT_DIR, PACKAGE, component_module
+
+const = component_module("const")
+capture = component_module("capture")
+ingest = component_module("ingest")
+dispatch = component_module("dispatch")
+loader = component_module("loader")
+discovery = component_module("discovery")
+snapshot = component_module("snapshot")
+sensor = component_module("sensor")
+
+NOISE_PAYLOADS = [
+    b'{"Time":"2024-05-01T12:00:00","Uptime":"0T01:00:00","Heap":25,"LoadAvg":19}',
+    b'{"POWER":"ON"}',
+    b'{"StatusSNS":{"Time":"2024-05-01T12:00:00"}}',
+]
+
+
+class Message:
+    """The parts of an MQTT ``ReceiveMessage`` the coordinator reads."""
+
+    __slots__ = ("topic", "payload")
+
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+def topic_matches(pattern, topic):
+    """Return True if an MQTT topic matches a subscription with wildcards."""
+    pattern_levels = pattern.split("/")
+    topic_levels = topic.split("/")
+    for index, level in enumerate(pattern_levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels) or level not in ("+", topic_levels[index]):
+            return False
+    return len(pattern_levels) == len(topic_levels)
+
+
+class LocalBroker:
+    """In-process stand-in for the MQTT integration's subscribe API."""
+
+    def __init__(self):
+        self._subscriptions = []
+
+    async def async_subscribe(self, hass, topic, msg_callback, qos=0, encoding="utf-8"):
+        subscription = (topic, msg_callback, encoding)
+        self._subscriptions.append(subscription)
+
+        def unsubscribe():
+            self._subscriptions.remove(subscription)
+
+        return unsubscribe
+
+    def publish(self, topic, payload):
+        """Deliver a message to every matching subscription."""
+        for pattern, msg_callback, encoding in self._subscriptions:
+            if topic_matches(pattern, topic):
+                msg_callback(Message(topic, payload if encoding is None else payload.decode(encoding)))
+
+
+class MemoryStore:
+    """In-memory stand-in for ``homeassistant.helpers.storage.Store``."""
+
+    def __init__(self, hass, version, key, *args, **kwargs):
+        self._data_func = None
+        self._handle = None
+        self.data = None
+
+    async def async_load(self):
+        return None
+
+    def async_delay_save(self, data_func, delay=0):
+        self._data_func = data_func
+        if self._handle is None:
+            self._handle = asyncio.get_running_loop().call_later(delay, self._write)
+
+    def _write(self):
+        self._handle = None
+        self.data = self._data_func()
+
+    async def async_remove(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+
+class BenchConfig:
+    """The parts of ``hass.config`` the coordinator uses."""
+
+    def __init__(self, config_dir):
+        self.config_dir = config_dir
+
+    def path(self, *parts):
+        return os.path.join(self.config_dir, *parts)
+
+
+class BenchHass:
+    """The parts of ``HomeAssistant`` the coordinator uses."""
+
+    def __init__(self, loop, config_dir):
+        self.loop = loop
+        self.data = {}
+        self.config = BenchConfig(config_dir)
+
+    def async_create_task(self, target):
+        return self.loop.create_task(target)
+
+    def async_add_executor_job(self, target, *args):
+        return self.loop.run_in_executor(None, target, *args)
+
+
+class BenchConfigEntry:
+    """The parts of ``ConfigEntry`` the sensor platform uses."""
+
+    def __init__(self, topic, options):
+        self.entry_id = "bench"
+        self.data = {const.CONF_TOPIC: topic}
+        self.options = options
+        self._on_unload = []
+        self._tasks = []
+
+    def async_on_unload(self, func):
+        self._on_unload.append(func)
+
+    def async_create_background_task(self, hass, target, name):
+        task = hass.loop.create_task(target, name=name)
+        self._tasks.append(task)
+        return task
+
+    def add_update_listener(self, listener):
+        return lambda: None
+
+    async def async_unload(self):
+        for func in reversed(self._on_unload):
+            job = func()
+            if asyncio.iscoroutine(job):
+                await job
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class WriteTracker:
+    """Links state writes back to the publish time of the frame behind them."""
+
+    def __init__(self):
+        self.publish_time = None
+        # rf_data -> publish time of the first queued copy
+        self.pending = {}
+        self.current = None
+        self.samples = []
+        self.writes = 0
+
+    def queued(self, rf_data):
+        self.pending.setdefault(rf_data, self.publish_time)
+
+    def processing(self, rf_data):
+        self.current = self.pending.pop(rf_data, None)
+
+    def written(self):
+        self.writes += 1
+        if self.current is not None:
+            self.samples.append(time.perf_counter() - self.current)
+
+
+def patch_home_assistant(broker, tracker):
+    """Swap the Home Assistant services used by the integration for the stand-ins."""
+    discovery.Store = MemoryStore
+    snapshot.Store = MemoryStore
+    sensor.mqtt = broker
+
+    def call_later(hass, delay, action):
+        return hass.loop.call_later(delay, action, None).cancel
+
+    sensor.async_call_later = call_later
+    sensor.async_track_time_interval = lambda hass, action, interval: (lambda: None)
+    sensor.RFBridgeSensor.async_write_ha_state = lambda entity: tracker.written()
+
+
+def hex_frame(device, rng):
+    """Return a hex RfReceived payload in the example_parser format."""
+    data = f"{device['code']:04X}{round(device['temperature'] * 10):04X}{device['humidity']:02X}"
+    payload = (
+        '{"Time":"2024-05-01T12:00:00","RfReceived":{"Sync":%d,"Low":%d,"High":%d,'
+        '"Data":"%s","RfKey":"None"}}'
+        % (rng.randrange(9000, 15000), rng.randrange(300, 500), rng.randrange(900, 1400), data)
+    )
+    return payload.encode(), data
+
+
+def rfraw_frame(device, rng):
+    """Return an RfRaw bucket payload in the temp_hum_parser format."""
+    temperature = int(round(device["temperature"] * 10)) & 0x1FF
+    bits = (device["code"] << 17) | (temperature << 8) | device["humidity"]
+    symbols = "".join("82" if bits >> shift & 1 else "81" for shift in range(36, -1, -1))
+    data = f"AA B1 04 0190 03D4 0820 1F04 {symbols}8181818181 55"
+    return ('{"Time":"2024-05-01T12:00:00","RfRaw":{"Data":"%s"}}' % data).encode(), data
+
+
+def synthetic_stream(args, rng):
+    """Generate ``(topic, payload)`` messages from a population of sensors."""
+    devices = []
+    for index in range(args.devices):
+        raw = index % 2 == 1
+        devices.append({
+            "frame": rfraw_frame if raw else hex_frame,
+            "code": rng.randrange(1 << 20) if raw else rng.randrange(0x10000),
+            "temperature": round(rng.uniform(0, 25), 1),
+            "humidity": rng.randrange(20, 90),
+        })
+    topics = [f"tele/rfbridge{index}/RESULT" for index in range(args.bridges)]
+
+    messages = []
+    for _ in range(args.frames):
+        if rng.random() < args.noise_ratio:
+            messages.append((rng.choice(topics), rng.choice(NOISE_PAYLOADS)))
+            continue
+        device = rng.choice(devices)
+        if rng.random() < args.change_ratio:
+            device["temperature"] = round(min(25, max(0, device["temperature"] + rng.choice((-0.1, 0.1)))), 1)
+            device["humidity"] = min(100, max(0, device["humidity"] + rng.choice((-1, 0, 1))))
+        payload, _data = device["frame"](device, rng)
+        # Sensors repeat every transmission and nearby bridges all hear it
+        for topic in rng.sample(topics, rng.randint(1, len(topics))):
+            messages.extend((topic, payload) for _ in range(args.repeats))
+    return messages
+
+
+def read_stream(path, default_topic):
+    """Iterate ``topic<TAB>payload`` or bare payload lines from a file, or a capture.
+
+    Messages are read as they are consumed, so replays of any size fit in memory.
+    """
+    if os.path.isdir(path) or path.endswith(".bin"):
+        for _timestamp, topic, kind, data in capture.read_capture(path):
+            yield topic or default_topic, json.dumps({kind or "RfReceived": {"Data": data}}).encode()
+        return
+    with open(path, "rb") as stream:
+        for line in stream:
+            line = line.rstrip(b"\r\n")
+            if not line or line.startswith(b"#"):
+                continue
+            topic, _, payload = line.rpartition(b"\t")
+            yield topic.decode() or default_topic, payload
+
+
+def rf_data_of(payload):
+    """Return the RF Data string of a payload, or None."""
+    frame = ingest.classify_payload(payload)
+    if frame is ingest.NEEDS_JSON:
+        try:
+            frame = ingest.extract_rf_data_json(payload)
+        except ValueError:
+            frame = None
+    return frame
+
+
+def configured_devices(messages, unconfigured_ratio, rng):
+    """Configure the RF IDs found in the stream, leaving some undiscovered.
+
+    Returns the devices, the number of RF IDs found and the number of messages.
+    """
+    modules = loader.ParserLoader(
+        os.path.join(COMPONENT_DIR, "parsers"), f"{PACKAGE}.parsers"
+    ).load_changed() or {}
+    dispatcher = dispatch.ParserDispatcher(modules)
+    rf_ids = {}
+    count = 0
+    for _topic, payload in messages:
+        count += 1
+        frame = rf_data_of(payload)
+        if frame is not None:
+            _name, parsed = dispatcher.dispatch(frame[1], frame[0])
+            if parsed is not None:
+                rf_ids.setdefault(parsed["id"], None)
+    return [
+        {"internal_id": str(uuid.uuid4()), "name": f"Bench {rf_id}", "rf_id": rf_id}
+        for rf_id in rf_ids
+        if rng.random() >= unconfigured_ratio
+    ], len(rf_ids), count
+
+
+async def run(args, messages, count, options):
+    """Set up the integration, replay the ``count`` messages of the stream and collect the results."""
+    loop = asyncio.get_running_loop()
+    broker = LocalBroker()
+    tracker = WriteTracker()
+    patch_home_assistant(broker, tracker)
+    hass = BenchHass(loop, args.config_dir)
+    entry = BenchConfigEntry(args.topic, options)
+
+    def add_entities(entities):
+        for entity in entities:
+            if not isinstance(entity, sensor.RFBridgeSensor):
+                continue
+            # Home Assistant only adds the entities that are enabled
+            if entity.entity_registry_enabled_default or args.aggregates:
+                entity._async_register()
+
+    await sensor.async_setup_entry(hass, entry, add_entities)
+    coordinator = hass.data[const.DOMAIN][entry.entry_id]
+
+    # Remember when the frames that make it into the queue were published
+    queue = coordinator._queue
+    queue_put = queue.put
+
+    def put(frame):
+        tracker.queued(frame[0])
+        return queue_put(frame)
+
+    queue.put = put
+    process = coordinator.async_process_rf_data
+
+    async def process_timed(rf_data, kind=None, source=None):
+        tracker.processing(rf_data)
+        try:
+            await process(rf_data, kind, source)
+        finally:
+            tracker.current = None
+
+    coordinator.async_process_rf_data = process_timed
+
+    checkpoints = []
+    checkpoint_every = max(1, count // 10)
+    if args.memory:
+        tracemalloc.start()
+        trace_filter = [tracemalloc.Filter(True, os.path.join(COMPONENT_DIR, "*"))]
+
+    start = time.perf_counter()
+    for index, (topic, payload) in enumerate(messages):
+        if args.rate:
+            delay = start + index / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif index % args.burst == 0:
+            await asyncio.sleep(0)
+        tracker.publish_time = time.perf_counter()
+        broker.publish(topic, payload)
+        if args.memory and index % checkpoint_every == checkpoint_every - 1:
+            gc.collect()
+            snap = tracemalloc.take_snapshot().filter_traces(trace_filter)
+            checkpoints.append(sum(stat.size for stat in snap.statistics("filename")))
+
+    # Let the consumer drain the queue; a batch is processed without yielding
+    while len(queue):
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    if args.memory:
+        tracemalloc.stop()
+    metrics = coordinator.metrics
+    result = {
+        "messages": count,
+        "elapsed_s": round(elapsed, 3),
+        "messages_per_s": round(count / elapsed, 1),
+        "frames_received": metrics.frames_received,
+        "frames_processed": metrics.matched_frames + metrics.unmatched_frames,
+        "frames_per_s": round((metrics.matched_frames + metrics.unmatched_frames) / elapsed, 1),
+        "repeats_suppressed": coordinator._repeats.suppressed,
+        "dropped": coordinator.dropped_frames,
+        "state_writes": tracker.writes,
+        "discovered_devices": len(coordinator.discovered_devices),
+        "latency_ms": latency_summary(tracker.samples),
+    }
+    if checkpoints:
+        result["memory_kib"] = [round(size / 1024, 1) for size in checkpoints]
+        # Growth after the first tenth, once caches and entities have filled up
+        result["memory_growth_kib"] = round((checkpoints[-1] - checkpoints[0]) / 1024, 1)
+
+    await entry.async_unload()
+    return result
+
+
+def latency_summary(samples):
+    """Return p50/p99/max of the latency samples in milliseconds."""
+    if not samples:
+        return None
+    samples = sorted(samples)
+
+    def percentile(fraction):
+        return round(samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000, 4)
+
+    return {
+        "samples": len(samples),
+        "p50": percentile(0.5),
+        "p99": percentile(0.99),
+        "max": round(samples[-1] * 1000, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an RF frame stream through the coordinator.")
+    parser.add_argument("--replay", help="Text file with one 'topic<TAB>payload' or payload per line.")
+    parser.add_argument("--topic", default="tele/+/RESULT", help="Topic(s) the integration subscribes to.")
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=20000, help="Synthetic transmissions.")
+    parser.add_argument("--bridges", type=int, default=2)
+    parser.add_argument("--repeats", type=int, default=3, help="Copies of every transmission.")
+    parser.add_argument("--change-ratio", type=float, default=0.3)
+    parser.add_argument("--noise-ratio", type=float, default=0.2, help="Share of non-RF messages.")
+    parser.add_argument("--unconfigured-ratio", type=float, default=0.1)
+    parser.add_argument("--rate", type=float, default=0,
+                        help="Messages per second; 0 publishes as fast as possible.")
+    parser.add_argument("--burst", type=int, default=1,
+                        help="Messages published between event loop yields when unthrottled.")
+    parser.add_argument("--option", action="append", default=[], metavar="KEY=VALUE",
+                        help="Integration option, e.g. dedupe_window=0 or min_interval=5.")
+    parser.add_argument("--config-dir", default=tempfile.gettempdir(),
+                        help="Directory used as the Home Assistant config dir (frame capture).")
+    parser.add_argument("--aggregates", action="store_true",
+                        help="Enable the rolling aggregate entities, which are disabled by default.")
+    parser.add_argument("--memory", action="store_true", help="Trace memory growth (slower).")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.replay:
+        # Bare payload lines are delivered on the first subscribed topic
+        default_topic = args.topic.split(",")[0].strip().replace("+", "rfbridge").replace("#", "RESULT")
+        # The replay is read twice, to find the RF IDs and to replay it, rather
+        # than kept in memory
+        messages = functools.partial(read_stream, args.replay, default_topic)
+    else:
+        synthetic = synthetic_stream(args, rng)
+        messages = functools.partial(iter, synthetic)
+    devices, found, count = configured_devices(messages(), args.unconfigured_ratio, rng)
+    options = {"devices": devices}
+    for option in args.option:
+        key, _, value = option.partition("=")
+        options[key] = json.loads(value) if value[:1].isdigit() or value in ("true", "false") else value
+
+    result = asyncio.run(run(args, messages(), count, options))
+    result["configured_devices"] = len(devices)
+    result["rf_ids"] = found
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    latency = result["latency_ms"] or {}
+    print(f"messages      {result['messages']} in {result['elapsed_s']} s "
+          f"({result['messages_per_s']} msg/s)")
+    print(f"frames        {result['frames_processed']} processed ({result['frames_per_s']} frames/s), "
+          f"{result['repeats_suppressed']} repeats suppressed, {result['dropped']} dropped")
+    print(f"devices       {result['configured_devices']} configured of {found} RF IDs, "
+          f"{result['discovered_devices']} discovered")
+    print(f"state writes  {result['state_writes']}, frame to write latency "
+          f"p50 {latency.get('p50')} ms  p99 {latency.get('p99')} ms  max {latency.get('max')} ms")
+    if "memory_growth_kib" in result:
+        print(f"memory        {result['memory_kib']} KiB, growth {result['memory_growth_kib']} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark the shared RfRaw bucket decoder against per-parser text handling.
+
+Usage:
+    python3 benchmarks/bench_rfraw.py [--frames N] [--number N]
+
+Every frame is handed to 1, 2 and 4 RfRaw parsers in turn, as the dispatcher
+does when several parsers accept the same frame shape. The frame cache is set
+up as the dispatcher does: on for 2 and more parsers using ``decode_b1``.
+
+    fieldspec  "per parser" decoders split and translate the frame text
+               themselves, as the field-spec engine did before
+               ``parsers/_rfraw.py``; "integration" ones are compiled
+               field-spec parsers, which split usual frames themselves as
+               well (the cache stays off) but also check the frame layout
+               the per parser ones assume, and fall back to ``decode_b1``
+               for unusual frames.
+    pwm        "per parser" decoders parse and demodulate the frame on their
+               own; "integration" ones use ``decode_b1(data).pwm()``, cached
+               from 2 parsers on.
+
+Timings are reported only, as they vary too much between runs to gate on;
+the script exits with status 1 if any decoder disagrees with its per parser
+counterpart.
+"""
+import argparse
+import random
+import sys
+import timeit
+
+from _component import component_module
+
+fieldspec = component_module("parsers._fieldspec")
+rfraw = component_module("parsers._rfraw")
+
+TABLE = bytearray(b"x" * 256)
+TABLE[0x81] = ord("0")
+TABLE[0x82] = ord("1")
+TABLE = bytes(TABLE)
+
+
+def per_parser_decoder(offset):
+    """Return a decoder doing its own text handling, like the old rfraw_b1 reader."""
+    def parse(data):
+        if not isinstance(data, str) or len(data) < 100:
+            return None
+        try:
+            tokens = data.split(" ", 8)
+            if len(tokens) <= 7:
+                return None
+            symbols = tokens[7]
+            if len(symbols) < 74:
+                return None
+            value = int(bytes.fromhex(symbols[:74]).translate(TABLE), 2)
+        except (ValueError, TypeError):
+            return None
+        return {"id": str((value >> (29 - offset)) & 255), "humidity": value & 255}
+    return parse
+
+
+def compiled_decoder(offset):
+    """Return a compiled field-spec parser, which uses the shared decoder for unusual frames."""
+    return fieldspec.compile_protocol({
+        "encoding": "rfraw_b1",
+        "bits": 37,
+        "id": "{device_id}",
+        "fields": {
+            "device_id": {"offset": offset, "width": 8, "hidden": True},
+            "humidity": {"offset": 29, "width": 8},
+        },
+    })
+
+
+def pwm_decoder(offset, shared):
+    """Return a decoder reading a byte from the PWM bits of a frame."""
+    def parse(data):
+        frame = rfraw.decode_b1(data) if shared else rfraw.BucketFrame.parse(data)
+        if frame is None:
+            return None
+        bits = frame.pwm()
+        if len(bits) < offset + 8:
+            return None
+        return {"id": str(int(bits[offset:offset + 8], 2))}
+    return parse
+
+
+def frames(rng, count):
+    """Generate Tasmota RfRaw bucket frames."""
+    result = []
+    for _ in range(count):
+        bits = "".join(rng.choice("01") for _ in range(42))
+        symbols = "".join("81" if bit == "0" else "82" for bit in bits)
+        result.append(f"AA B1 04 0190 03D4 0820 1F04 {symbols} 55")
+    return result
+
+
+def run(sample, parsers):
+    """Hand every frame to every parser."""
+    for frame in sample:
+        for parse in parsers:
+            parse(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared RfRaw decoder.")
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--number", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sample = frames(random.Random(42), args.frames)
+    # label -> per parser decoder, integration decoder, whether it uses decode_b1
+    decoders = {
+        "fieldspec": (per_parser_decoder, compiled_decoder, False),
+        "pwm": (lambda offset: pwm_decoder(offset, False), lambda offset: pwm_decoder(offset, True), True),
+    }
+    failures = []
+    for label, (make_old, make_new, decodes_b1) in decoders.items():
+        for count in (1, 2, 4):
+            rfraw.set_shared(decodes_b1 and count > 1)
+            old = [make_old(offset) for offset in range(count)]
+            new = [make_new(offset) for offset in range(count)]
+            mismatches = sum(
+                1 for frame in sample for a, b in zip(old, new) if a(frame) != b(frame)
+            )
+            old_time = min(timeit.repeat(lambda: run(sample, old), number=args.number, repeat=args.repeat))
+            new_time = min(timeit.repeat(lambda: run(sample, new), number=args.number, repeat=args.repeat))
+            calls = len(sample) * args.number
+            print(
+                f"{label:9} {count} parsers  per parser {old_time / calls * 1e6:6.2f} us/frame  "
+                f"integration {new_time / calls * 1e6:6.2f} us/frame  "
+                f"speedup {old_time / new_time:4.2f}x  mismatches {mismatches}"
+            )
+            if mismatches:
+                failures.append(f"{label} with {count} parsers")
+    if failures:
+        print(f"Decoders disagree with per parser decoding: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Micro-benchmark of per-frame entity updates: dispatcher signals vs routing table.
+
+Usage:
+    python3 benchmarks/bench_routing.py [--devices N] [--frames N]
+
+The dispatcher path models what the coordinator used to do for every matched
+frame: format ``SIGNAL_UPDATE_SENSOR`` for the device, look the signal up in
+the dispatcher's target map, run every connected callback, and let each
+sensor pick its own field out of the payload with ``data.get(type.lower())``.
+Home Assistant itself is not imported; the model keeps the same lookups and
+calls, without the job wrapping HA adds on top, so it understates the
+dispatcher cost.
+
+The routing path is the coordinator's ``internal_id -> {field -> entity}``
+table, which only calls entities whose field is present and changed.
+"""
+import argparse
+import random
+import timeit
+
+SIGNAL_UPDATE_SENSOR = "rf_bridge_update_{}"
+FIELDS = ("temperature", "humidity")
+
+
+class Entity:
+    """Stand-in for RFBridgeSensor counting state writes."""
+
+    def __init__(self, sensor_type):
+        self._sensor_type = sensor_type
+        self._field = sensor_type.lower()
+        self.value = None
+        self.writes = 0
+
+    def update_from_signal(self, data):
+        value = data.get(self._sensor_type.lower())
+        if value is not None:
+            self.value = value
+            self.writes += 1
+
+    def async_update_value(self, value):
+        self.value = value
+        self.writes += 1
+
+
+def build_frames(devices, count, rng, change_ratio):
+    """Return (internal_id, payload) frames; repeats keep the previous value."""
+    last = {}
+    frames = []
+    for _ in range(count):
+        internal_id = f"device-{rng.randrange(devices)}"
+        payload = last.get(internal_id)
+        if payload is None or rng.random() < change_ratio:
+            payload = {
+                "id": internal_id,
+                "temperature": round(rng.uniform(-10, 30), 1),
+                "humidity": rng.randrange(20, 90),
+            }
+        last[internal_id] = payload
+        frames.append((internal_id, dict(payload)))
+    return frames
+
+
+def dispatcher_path(devices, frames):
+    """Signal based fan-out."""
+    targets = {}
+    for index in range(devices):
+        signal = SIGNAL_UPDATE_SENSOR.format(f"device-{index}")
+        targets[signal] = {
+            Entity(name.capitalize()).update_from_signal: None for name in FIELDS
+        }
+
+    def run():
+        for internal_id, payload in frames:
+            signal_targets = targets.get(SIGNAL_UPDATE_SENSOR.format(internal_id))
+            if signal_targets:
+                for target in list(signal_targets):
+                    target(payload)
+
+    return run
+
+
+def routing_path(devices, frames):
+    """Routing table with change detection against the previous payload."""
+    routes = {
+        f"device-{index}": {name: Entity(name.capitalize()) for name in FIELDS}
+        for index in range(devices)
+    }
+    previous = {}
+
+    def run():
+        for internal_id, payload in frames:
+            last = previous.get(internal_id)
+            previous[internal_id] = payload
+            device_routes = routes.get(internal_id)
+            if not device_routes:
+                continue
+            for field, entity in device_routes.items():
+                value = payload.get(field)
+                if value is None or (last is not None and value == last.get(field)):
+                    continue
+                entity.async_update_value(value)
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark entity update routing.")
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=50000)
+    parser.add_argument("--change-ratio", type=float, default=0.3,
+                        help="Share of frames carrying a new reading.")
+    parser.add_argument("--number", type=int, default=10)
+    args = parser.parse_args()
+
+    frames = build_frames(args.devices, args.frames, random.Random(1), args.change_ratio)
+    dispatcher = dispatcher_path(args.devices, frames)
+    routing = routing_path(args.devices, frames)
+
+    dispatcher_time = timeit.timeit(dispatcher, number=args.number)
+    routing_time = timeit.timeit(routing, number=args.number)
+    calls = args.frames * args.number
+    print(f"devices {args.devices}, frames {args.frames}, change ratio {args.change_ratio}")
+    print(f"dispatcher signals {dispatcher_time / calls * 1e6:6.3f} us/frame")
+    print(f"routing table      {routing_time / calls * 1e6:6.3f} us/frame")
+    print(f"speedup            {dispatcher_time / routing_time:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
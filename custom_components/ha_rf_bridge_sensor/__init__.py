@@ -1,10 +1,9 @@
 """The RF Bridge Sensor integration."""
 import logging
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
 from homeassistant.helpers import device_registry as dr
-from .const import DOMAIN
+from homeassistant.helpers.storage import Store
+from .const import DOMAIN, STORAGE_VERSION, STORAGE_KEY_DISCOVERED, STORAGE_KEY_SNAPSHOT
 
 PLATFORMS = ["sensor"]
 _LOGGER = logging.getLogger(__name__)
@@ -27,14 +26,14 @@ async def async_setup_entry(hass, entry):
     
     return True
 
-async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
-    """Handle options update."""
-    _LOGGER.info("Options update listener in __init__.py triggered, reloading entry: %s", entry.entry_id)
-    # This reloads the integration, causing sensor.py to run again with the new list
-    await hass.config_entries.async_reload(entry.entry_id)
-    
 async def async_unload_entry(hass, entry):
     """Unload a config entry."""
     _LOGGER.info("Unloading RF Bridge Sensor entry: %s", entry.entry_id)
     # Forward the unload to the sensor platform.
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+
+async def async_remove_entry(hass, entry):
+    """Remove persisted data when a config entry is deleted."""
+    _LOGGER.info("Removing stored data of RF Bridge Sensor entry: %s", entry.entry_id)
+    for key in (STORAGE_KEY_DISCOVERED, STORAGE_KEY_SNAPSHOT):
+        await Store(hass, STORAGE_VERSION, key.format(entry.entry_id)).async_remove()
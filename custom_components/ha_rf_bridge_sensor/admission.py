@@ -0,0 +1,104 @@
+"""Noise admission filter for RF device discovery.
+
+Corrupted frames and distant transmitters produce a steady stream of RF IDs
+that are heard once and never again. Rather than recording each of them in
+the discovered devices, an ID is only admitted once it was heard ``threshold``
+times. Sightings are counted in a count-min sketch of fixed size, so memory
+stays flat however much noise arrives.
+"""
+
+# Sketch dimensions: ``depth`` rows of ``width`` one byte counters, twice
+SKETCH_WIDTH = 8192
+SKETCH_DEPTH = 4
+_MASK64 = (1 << 64) - 1
+
+
+class NoiseAdmission:
+    """Admits an ID after ``threshold`` sightings within about ``window`` seconds.
+
+    Sightings are counted in two count-min sketches, one for the current and
+    one for the previous window; every ``window`` seconds the previous one is
+    cleared and the two swap roles. An ID is admitted once its count in both
+    together reaches the threshold, so sightings spread over up to two
+    windows count. The estimate never undercounts; with conservative updates
+    (only the smallest counters of an ID are raised) hash collisions rarely
+    admit an ID early.
+
+    As the sketches fill up, collisions would admit noise. A window therefore
+    also ends once ``width / 4`` IDs were counted in it, which keeps false
+    admissions below about 1% under any load; a flood of noise shortens the
+    window instead.
+    """
+
+    def __init__(self, threshold, window, width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+        self.threshold = threshold
+        self.window = window
+        self._width = width
+        self._depth = depth
+        self._current = bytearray(width * depth)
+        self._previous = bytearray(width * depth)
+        self._rotate_at = None
+        self._counted = 0
+        self._capacity = width // 4
+        self.admitted = 0
+        self.held_back = 0
+        self.early_rotations = 0
+
+    def configure(self, threshold):
+        """Change the number of sightings needed; 1 admits every ID."""
+        self.threshold = threshold
+
+    def admit(self, key, now):
+        """Count a sighting of ``key``; returns True once it reached the threshold."""
+        threshold = self.threshold
+        if threshold <= 1:
+            return True
+        if self._rotate_at is None or now >= self._rotate_at:
+            self._rotate(now)
+        elif self._counted >= self._capacity:
+            self.early_rotations += 1
+            self._rotate(now)
+
+        current = self._current
+        previous = self._previous
+        width = self._width
+        # Double hashing: row i uses h1 + i * h2
+        digest = hash(key) & _MASK64
+        h1 = digest & 0xFFFFFFFF
+        h2 = (digest >> 32) | 1
+        slots = [row * width + (h1 + row * h2) % width for row in range(self._depth)]
+        count = min(current[slot] + previous[slot] for slot in slots)
+
+        if count + 1 >= threshold:
+            self.admitted += 1
+            return True
+        # Conservative update: raise only the counters holding the minimum
+        for slot in slots:
+            if current[slot] + previous[slot] == count and current[slot] < 255:
+                current[slot] += 1
+        self._counted += 1
+        self.held_back += 1
+        return False
+
+    def _rotate(self, now):
+        """Start a new window, forgetting the sightings of the one before last."""
+        self._counted = 0
+        if self._rotate_at is not None and now < self._rotate_at + self.window:
+            self._previous, self._current = self._current, self._previous
+            self._current[:] = bytes(len(self._current))
+        else:
+            # Idle for more than a window: everything counted is stale
+            self._current[:] = bytes(len(self._current))
+            self._previous[:] = bytes(len(self._previous))
+        self._rotate_at = now + self.window
+
+    def as_dict(self):
+        """Return the filter state for diagnostics."""
+        return {
+            "threshold": self.threshold,
+            "window_s": self.window,
+            "sketch_bytes": len(self._current) + len(self._previous),
+            "admitted": self.admitted,
+            "held_back": self.held_back,
+            "early_rotations": self.early_rotations,
+        }
@@ -0,0 +1,131 @@
+"""Rolling window aggregates of device fields for the RF Bridge Sensor integration.
+
+A ``RollingAggregate`` summarizes the samples of one field over a sliding
+time window without keeping the samples. The window is split into a fixed
+number of buckets held in ``array`` columns (count, sum, min, max and the
+first sample of every bucket). Adding a sample updates its bucket and the
+running totals in O(1); when the window moves on, expired buckets are
+cleared and the totals recomputed from the buckets, which happens at most
+once per bucket length. The window therefore slides in bucket steps.
+"""
+from array import array
+from math import inf
+
+# Buckets per window; 60 gives one minute steps for a one hour window
+AGGREGATE_BUCKETS = 60
+
+
+class RollingAggregate:
+    """Mean, min, max and rate of change of a field over ``window`` seconds."""
+
+    __slots__ = (
+        "window", "_bucket_length", "_counts", "_sums", "_mins", "_maxs",
+        "_firsts", "_first_times", "_head", "_oldest", "_count", "_sum", "_min", "_max",
+        "_last", "_last_time",
+    )
+
+    def __init__(self, window, buckets=AGGREGATE_BUCKETS):
+        self.window = window
+        self._bucket_length = window / buckets
+        self._counts = array("L", bytes(array("L").itemsize * buckets))
+        self._sums = array("d", bytes(8 * buckets))
+        self._mins = array("d", bytes(8 * buckets))
+        self._maxs = array("d", bytes(8 * buckets))
+        self._firsts = array("d", bytes(8 * buckets))
+        self._first_times = array("d", bytes(8 * buckets))
+        self._head = None
+        self._oldest = None
+        self._count = 0
+        self._sum = 0.0
+        self._min = inf
+        self._max = -inf
+        self._last = None
+        self._last_time = None
+
+    def add(self, now, value):
+        """Add a sample taken at ``now`` (monotonic seconds)."""
+        self._advance(now)
+        index = self._head % len(self._counts)
+        if self._counts[index]:
+            self._counts[index] += 1
+            self._sums[index] += value
+            if value < self._mins[index]:
+                self._mins[index] = value
+            if value > self._maxs[index]:
+                self._maxs[index] = value
+        else:
+            self._counts[index] = 1
+            self._sums[index] = value
+            self._mins[index] = self._maxs[index] = value
+            self._firsts[index] = value
+            self._first_times[index] = now
+        if not self._count:
+            self._oldest = index
+        self._count += 1
+        self._sum += value
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+        self._last = value
+        self._last_time = now
+
+    def _advance(self, now):
+        """Move the window to ``now``, clearing the buckets that expired."""
+        bucket = int(now // self._bucket_length)
+        head = self._head
+        if head is not None and bucket <= head:
+            return
+        self._head = bucket
+        if head is None:
+            return
+        counts = self._counts
+        size = len(counts)
+        for expired in range(head + 1, min(bucket, head + size) + 1):
+            counts[expired % size] = 0
+        # Recompute the totals from the remaining buckets, oldest first
+        self._count = 0
+        self._sum = 0.0
+        self._min = inf
+        self._max = -inf
+        self._oldest = None
+        for offset in range(1, size + 1):
+            index = (bucket + offset) % size
+            if counts[index]:
+                if self._oldest is None:
+                    self._oldest = index
+                self._count += counts[index]
+                self._sum += self._sums[index]
+                self._min = min(self._min, self._mins[index])
+                self._max = max(self._max, self._maxs[index])
+
+    def mean(self):
+        """Return the mean of the window, or None if it is empty."""
+        return self._sum / self._count if self._count else None
+
+    def minimum(self):
+        """Return the smallest sample of the window, or None."""
+        return self._min if self._count else None
+
+    def maximum(self):
+        """Return the largest sample of the window, or None."""
+        return self._max if self._count else None
+
+    def rate(self):
+        """Return the change per hour from the oldest to the latest sample, or None."""
+        if not self._count:
+            return None
+        elapsed = self._last_time - self._first_times[self._oldest]
+        if elapsed <= 0:
+            return None
+        return (self._last - self._firsts[self._oldest]) / elapsed * 3600
+
+    def value(self, stat):
+        """Return the ``mean``, ``min``, ``max`` or ``rate`` of the window."""
+        if stat == "mean":
+            return self.mean()
+        if stat == "min":
+            return self.minimum()
+        if stat == "max":
+            return self.maximum()
+        return self.rate()
@@ -0,0 +1,253 @@
+"""Raw frame capture for the RF Bridge Sensor integration.
+
+Captured frames are written to a ring of segment files in a compact binary
+format. Every segment starts with a header and holds a sequence of records:
+
+    header:  magic b"RFBCAP01", segment sequence number (uint64)
+    record:  timestamp (float64), kind (uint8), topic id (uint8),
+             length (uint16), followed by ``length`` bytes
+
+Kind 0 records define a topic: the payload is the topic name and the topic id
+field is the id used by the frame records after it. The other kinds are
+payload kinds (``KINDS``) and their payload is the raw ``Data`` string. Topic
+ids start over in every segment, so each segment can be read on its own.
+
+The writer is meant to run in the executor; this module does not depend on
+Home Assistant so ``test_parser.py`` and the benchmarks can read captures.
+"""
+import asyncio
+import logging
+import mmap
+import os
+import struct
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"RFBCAP01"
+HEADER = struct.Struct("<8sQ")
+RECORD = struct.Struct("<dBBH")
+# Record kind codes; 0 defines a topic
+KIND_TOPIC = 0
+KINDS = {"RfReceived": 1, "RfRaw": 2}
+KIND_NAMES = {code: kind for kind, code in KINDS.items()}
+MAX_TOPICS = 255
+SEGMENT_NAME = "capture.{}.bin"
+
+
+class CaptureWriter:
+    """Appends frames to a ring of ``segments`` files of at most ``max_bytes`` in total.
+
+    When the current segment is full the next one is truncated and written,
+    so the ring always holds the most recent frames.
+    """
+
+    def __init__(self, directory, max_bytes, segments=4):
+        self._directory = directory
+        self._segment_size = max(HEADER.size + 4096, max_bytes // segments)
+        self._segments = segments
+        self._file = None
+        self._index = 0
+        self._sequence = 0
+        self._size = 0
+        self._topics = {}
+
+    def write(self, frames):
+        """Append ``(timestamp, topic, kind, data)`` frames to the ring."""
+        if self._file is None:
+            self._start()
+        buffer = bytearray()
+        pack = RECORD.pack
+        for timestamp, topic, kind, data in frames:
+            topic_id = self._topics.get(topic)
+            if topic_id is None:
+                if len(self._topics) >= MAX_TOPICS:
+                    self._flush(buffer)
+                    buffer = bytearray()
+                    self._next_segment()
+                topic_id = self._topics[topic] = len(self._topics)
+                name = topic.encode()[:0xFFFF]
+                buffer += pack(timestamp, KIND_TOPIC, topic_id, len(name))
+                buffer += name
+            raw = data.encode()[:0xFFFF]
+            buffer += pack(timestamp, KINDS.get(kind, 0xFF), topic_id, len(raw))
+            buffer += raw
+            if self._size + len(buffer) >= self._segment_size:
+                self._flush(buffer)
+                buffer = bytearray()
+                self._next_segment()
+        self._flush(buffer)
+
+    def close(self):
+        """Close the current segment."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _flush(self, buffer):
+        """Write encoded records to the current segment."""
+        if buffer:
+            self._file.write(buffer)
+            self._file.flush()
+            self._size += len(buffer)
+
+    def _start(self):
+        """Continue the ring after the newest existing segment."""
+        os.makedirs(self._directory, exist_ok=True)
+        newest = None
+        for index, sequence, _path in _segments(self._directory):
+            if newest is None or sequence > newest[1]:
+                newest = (index, sequence)
+        if newest is not None:
+            self._index = newest[0]
+            self._sequence = newest[1]
+            self._next_segment()
+        else:
+            self._open_segment()
+
+    def _next_segment(self):
+        """Move on to the next segment of the ring, overwriting its frames."""
+        self.close()
+        self._index = (self._index + 1) % self._segments
+        self._sequence += 1
+        self._open_segment()
+
+    def _open_segment(self):
+        """Truncate the current segment file and write its header."""
+        path = os.path.join(self._directory, SEGMENT_NAME.format(self._index))
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, self._sequence))
+        self._size = HEADER.size
+        self._topics = {}
+        _LOGGER.debug("Capturing RF frames to %s", path)
+
+
+def _segments(directory):
+    """Return ``(index, sequence, path)`` of the segment files in a directory."""
+    found = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return found
+    for name in names:
+        prefix, _, rest = name.partition(".")
+        index, _, suffix = rest.partition(".")
+        if prefix != "capture" or suffix != "bin" or not index.isdigit():
+            continue
+        path = os.path.join(directory, name)
+        with open(path, "rb") as segment:
+            header = segment.read(HEADER.size)
+        if len(header) == HEADER.size:
+            magic, sequence = HEADER.unpack(header)
+            if magic == MAGIC:
+                found.append((int(index), sequence, path))
+    return found
+
+
+def read_capture(path):
+    """Iterate the ``(timestamp, topic, kind, data)`` frames of a capture, oldest first.
+
+    ``path`` is a capture directory or a single segment file. Segments are
+    memory-mapped and decoded record by record, so captures of any size can
+    be iterated without loading them into memory. A record cut short by a
+    crash ends its segment.
+    """
+    if os.path.isdir(path):
+        paths = [segment[2] for segment in sorted(_segments(path), key=lambda segment: segment[1])]
+    else:
+        paths = [path]
+    for segment_path in paths:
+        yield from _read_segment(segment_path)
+
+
+def _read_segment(path):
+    """Iterate the frames of a single segment file."""
+    with open(path, "rb") as segment:
+        if os.fstat(segment.fileno()).st_size <= HEADER.size:
+            return
+        with mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            if HEADER.unpack_from(view)[0] != MAGIC:
+                _LOGGER.warning("Not an RF capture segment: %s", path)
+                return
+            unpack = RECORD.unpack_from
+            record_size = RECORD.size
+            end = len(view)
+            offset = HEADER.size
+            topics = {}
+            while offset + record_size <= end:
+                timestamp, kind, topic_id, length = unpack(view, offset)
+                offset += record_size
+                if offset + length > end:
+                    break
+                payload = view[offset:offset + length].decode(errors="replace")
+                offset += length
+                if kind == KIND_TOPIC:
+                    topics[topic_id] = payload
+                else:
+                    yield timestamp, topics.get(topic_id), KIND_NAMES.get(kind), payload
+
+
+class FrameCapture:
+    """Buffers captured frames on the event loop and writes them in batches.
+
+    ``record`` only appends to a list; ``async_flush`` hands the collected
+    batch to a ``CaptureWriter`` in the executor, one batch at a time. If the
+    disk cannot keep up, frames beyond ``max_pending`` are dropped and counted.
+    """
+
+    def __init__(self, directory, max_bytes, batch_size, max_pending):
+        self.directory = directory
+        self._writer = CaptureWriter(directory, max_bytes)
+        self._pending = []
+        # Future completed when the batch being written is done, or None
+        self._flushing = None
+        self.batch_size = batch_size
+        self._max_pending = max_pending
+        self.captured = 0
+        self.dropped = 0
+
+    def record(self, timestamp, topic, kind, data):
+        """Queue a frame; returns True once a batch is ready to be flushed."""
+        pending = self._pending
+        if len(pending) >= self._max_pending:
+            self.dropped += 1
+            return False
+        pending.append((timestamp, topic, kind, data))
+        return len(pending) >= self.batch_size and self._flushing is None
+
+    async def async_flush(self, hass):
+        """Write the pending frames in the executor."""
+        if self._flushing is not None or not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self._flushing = asyncio.get_running_loop().create_future()
+        try:
+            await hass.async_add_executor_job(self._writer.write, batch)
+            self.captured += len(batch)
+        except OSError as e:
+            self.dropped += len(batch)
+            _LOGGER.error("Failed to write RF capture to %s: %s", self.directory, e)
+        finally:
+            flushing, self._flushing = self._flushing, None
+            flushing.set_result(None)
+
+    async def async_close(self, hass):
+        """Write the remaining frames and close the capture file.
+
+        A batch still being written is waited for first, and so are the
+        frames recorded meanwhile.
+        """
+        while self._flushing is not None or self._pending:
+            if self._flushing is not None:
+                await self._flushing
+            else:
+                await self.async_flush(hass)
+        await hass.async_add_executor_job(self._writer.close)
+
+    def as_dict(self):
+        """Return the capture state for diagnostics."""
+        return {
+            "directory": self.directory,
+            "captured": self.captured,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+        }
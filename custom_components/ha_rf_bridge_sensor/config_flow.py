@@ -2,11 +2,47 @@ import voluptuous as vol
 import logging
 import uuid
 from homeassistant import config_entries
+from homeassistant.components.mqtt import valid_subscribe_topic
 from homeassistant.core import callback
 from homeassistant.helpers import config_validation as cv
 from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, CONF_TOPIC
+from .const import (
+    DOMAIN,
+    CONF_TOPIC,
+    CONF_QUEUE_SIZE,
+    CONF_BATCH_SIZE,
+    CONF_OVERFLOW_POLICY,
+    OVERFLOW_POLICIES,
+    DEFAULT_QUEUE_SIZE,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_OVERFLOW_POLICY,
+    CONF_DEDUPE_WINDOW,
+    DEFAULT_DEDUPE_WINDOW,
+    CONF_PARSER_BUDGET,
+    CONF_QUARANTINE_TIME,
+    DEFAULT_PARSER_BUDGET,
+    DEFAULT_QUARANTINE_TIME,
+    CONF_DEADBAND,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_SILENCE,
+    DEFAULT_DEADBAND,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_MAX_SILENCE,
+    CONF_STALE_TIMEOUT,
+    DEFAULT_STALE_TIMEOUT,
+    CONF_CAPTURE,
+    CONF_CAPTURE_SIZE,
+    DEFAULT_CAPTURE,
+    DEFAULT_CAPTURE_SIZE,
+    CONF_VOTE_WINDOW,
+    CONF_OUTLIER_FILTER,
+    DEFAULT_VOTE_WINDOW,
+    DEFAULT_OUTLIER_FILTER,
+    CONF_DISCOVERY_MIN_HITS,
+    DEFAULT_DISCOVERY_MIN_HITS,
+)
+from .devices import DeviceRegistry, RFDevice
 
 # Schema for setting up the integration
 DATA_SCHEMA = vol.Schema({
@@ -14,8 +50,31 @@ DATA_SCHEMA = vol.Schema({
     vol.Required(CONF_TOPIC, default="tele/RF_Bridge/RESULT"): str,
 })
 
+# Validators of the state write policy settings
+WRITE_POLICY_VALIDATORS = {
+    CONF_DEADBAND: vol.All(vol.Coerce(float), vol.Range(min=0)),
+    CONF_MIN_INTERVAL: vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+    CONF_MAX_SILENCE: vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+}
+
+# Validators of the settings a device can override
+DEVICE_OVERRIDE_VALIDATORS = {
+    **WRITE_POLICY_VALIDATORS,
+    CONF_STALE_TIMEOUT: vol.All(vol.Coerce(int), vol.Range(min=0, max=7 * 86400)),
+}
+
 _LOGGER = logging.getLogger(__name__)
 
+
+def _valid_topics(value):
+    """Return True for one or more comma separated topics, MQTT wildcards allowed."""
+    try:
+        for topic in value.split(","):
+            valid_subscribe_topic(topic.strip())
+    except vol.Invalid:
+        return False
+    return True
+
 class RFBridgeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for RF Bridge Sensor."""
     VERSION = 1
@@ -31,11 +90,15 @@ class RFBridgeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if self._async_current_entries():
             return self.async_abort(reason="single_instance_allowed")
 
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title=user_input["name"], data=user_input)
+            if not _valid_topics(user_input[CONF_TOPIC]):
+                errors[CONF_TOPIC] = "invalid_topic"
+            else:
+                return self.async_create_entry(title=user_input["name"], data=user_input)
 
         return self.async_show_form(
-            step_id="user", data_schema=DATA_SCHEMA
+            step_id="user", data_schema=DATA_SCHEMA, errors=errors
         )
 
 class RFBridgeOptionsFlowHandler(config_entries.OptionsFlow):
@@ -44,9 +107,27 @@ class RFBridgeOptionsFlowHandler(config_entries.OptionsFlow):
     def __init__(self, config_entry: config_entries.ConfigEntry):
         """Initialize options flow."""
         self.options = dict(config_entry.options)
+        # Edits are made to a registry built from the options, not to the
+        # entry's current options; the coordinator applies the difference
+        # once the options are saved
+        self.devices = DeviceRegistry.from_options(self.options.get("devices", []))
         self.coordinator = None
         self.device_info = {}
 
+    def _save(self):
+        """Store the options together with the edited devices."""
+        self.options["devices"] = self.devices.as_options()
+        return self.async_create_entry(title="", data=self.options)
+
+    def _rf_id_taken(self, rf_id, device=None):
+        """Return True if a device other than ``device`` already has the RF ID."""
+        owner = self.devices.by_rf_id(rf_id)
+        return owner is not None and owner is not device
+
+    def _device_choices(self):
+        """Return the configured devices as ``{internal_id: label}``."""
+        return {device.internal_id: f"{device.name} ({device.rf_id})" for device in self.devices}
+
     async def async_step_init(self, user_input=None):
         """Main menu."""
         _LOGGER.debug("Options flow: step_init")
@@ -54,7 +135,7 @@ class RFBridgeOptionsFlowHandler(config_entries.OptionsFlow):
         
         return self.async_show_menu(
             step_id="init",
-            menu_options=["add", "edit", "delete"],
+            menu_options=["add", "edit", "delete", "settings"],
         )
 
     async def async_step_add(self, user_input=None):
@@ -68,21 +149,19 @@ class RFBridgeOptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_add_manual(self, user_input=None):
         """Form to add a device manually."""
         _LOGGER.debug("Options flow: step_add_manual")
+        errors = {}
         if user_input is not None:
-            devices = self.options.get("devices", [])
-            new_device = {
-                "internal_id": str(uuid.uuid4()),
-                "name": user_input["name"],
-                "rf_id": user_input["rf_id"],
-            }
-            devices.append(new_device)
-            self.options["devices"] = devices
-            _LOGGER.info(f"Adding new device manually: {new_device}. New options: {self.options}")
-            self.hass.data[DOMAIN][self.config_entry.entry_id].load_configured_devices()
-            return self.async_create_entry(title="", data=self.options)
+            if self._rf_id_taken(user_input["rf_id"]):
+                errors["rf_id"] = "rf_id_in_use"
+            else:
+                new_device = RFDevice(str(uuid.uuid4()), user_input["name"], user_input["rf_id"])
+                self.devices.add(new_device)
+                _LOGGER.info(f"Adding new device manually: {new_device}")
+                return self._save()
 
         return self.async_show_form(
             step_id="add_manual",
+            errors=errors,
             data_schema=vol.Schema({
                 vol.Required("name"): str,
                 vol.Required("rf_id"): str,
@@ -105,7 +184,11 @@ class RFBridgeOptionsFlowHandler(config_entries.OptionsFlow):
         discovered_map = {
             dev_id: f"{dev_id} (seen: {dt_util.as_local(dt_util.utc_from_timestamp(info['last_seen'])).strftime('%d-%b %H:%M')})"
             for dev_id, info in discovered.items()
+            if not self._rf_id_taken(dev_id)
         }
+        if not discovered_map:
+            _LOGGER.warning("All discovered devices are configured already.")
+            return self.async_abort(reason="no_discovered_devices")
         
         return self.async_show_form(
             step_id="add_from_discovered",
@@ -118,17 +201,10 @@ class RFBridgeOptionsFlowHandler(config_entries.OptionsFlow):
         """Form to give a name to a discovered device."""
         _LOGGER.debug("Options flow: step_name_discovered")
         if user_input is not None:
-            devices = self.options.get("devices", [])
-            new_device = {
-                "internal_id": str(uuid.uuid4()),
-                "name": user_input["name"],
-                "rf_id": self.device_info["rf_id"],
-            }
-            devices.append(new_device)
-            self.options["devices"] = devices
-            _LOGGER.info(f"Adding new device from discovered: {new_device}. New options: {self.options}")
-            self.hass.data[DOMAIN][self.config_entry.entry_id].load_configured_devices()
-            return self.async_create_entry(title="", data=self.options)
+            new_device = RFDevice(str(uuid.uuid4()), user_input["name"], self.device_info["rf_id"])
+            self.devices.add(new_device)
+            _LOGGER.info(f"Adding new device from discovered: {new_device}")
+            return self._save()
 
         return self.async_show_form(
             step_id="name_discovered",
@@ -139,8 +215,7 @@ class RFBridgeOptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_edit(self, user_input=None):
         """Form to select a device to edit."""
         _LOGGER.debug("Options flow: step_edit")
-        configured_devices = self.options.get("devices", [])
-        if not configured_devices:
+        if not self.devices:
             _LOGGER.warning("No configured devices to edit.")
             return self.async_abort(reason="no_devices_to_edit")
 
@@ -149,71 +224,148 @@ class RFBridgeOptionsFlowHandler(config_entries.OptionsFlow):
             _LOGGER.debug(f"Selected device to edit with internal ID: {self.device_info['internal_id']}")
             return await self.async_step_edit_form()
 
-        device_map = {
-            dev["internal_id"]: f"{dev['name']} ({dev['rf_id']})" for dev in configured_devices
-        }
-
         return self.async_show_form(
             step_id="edit",
             data_schema=vol.Schema({
-                vol.Required("internal_id"): vol.In(device_map)
+                vol.Required("internal_id"): vol.In(self._device_choices())
             })
         )
 
     async def async_step_edit_form(self, user_input=None):
         """Form to edit device name and RF ID."""
         _LOGGER.debug("Options flow: step_edit_form")
+        device_to_edit = self.devices.get(self.device_info["internal_id"])
+        errors = {}
         if user_input is not None:
-            devices = self.options.get("devices", [])
-            for i, dev in enumerate(devices):
-                if dev["internal_id"] == self.device_info["internal_id"]:
-                    devices[i]["name"] = user_input["name"]
-                    devices[i]["rf_id"] = user_input["rf_id"]
-                    break
-            self.options["devices"] = devices
-            _LOGGER.info(f"Editing device {self.device_info['internal_id']}. New options: {self.options}")
-            self.hass.data[DOMAIN][self.config_entry.entry_id].load_configured_devices()
-            return self.async_create_entry(title="", data=self.options)
-
-        device_to_edit = next(
-            dev for dev in self.options.get("devices", []) 
-            if dev["internal_id"] == self.device_info["internal_id"]
-        )
+            if self._rf_id_taken(user_input["rf_id"], device_to_edit):
+                errors["rf_id"] = "rf_id_in_use"
+            else:
+                # Per device overrides of the integration settings; empty means default
+                overrides = dict(device_to_edit.overrides)
+                for key in DEVICE_OVERRIDE_VALIDATORS:
+                    if user_input.get(key) is not None:
+                        overrides[key] = user_input[key]
+                    else:
+                        overrides.pop(key, None)
+                self.devices.update(device_to_edit, user_input["name"], user_input["rf_id"], overrides)
+                _LOGGER.info(f"Editing device {self.device_info['internal_id']}: {device_to_edit}")
+                return self._save()
 
         return self.async_show_form(
             step_id="edit_form",
+            errors=errors,
             data_schema=vol.Schema({
-                vol.Required("name", default=device_to_edit["name"]): str,
-                vol.Required("rf_id", default=device_to_edit["rf_id"]): str,
+                vol.Required("name", default=device_to_edit.name): str,
+                vol.Required("rf_id", default=device_to_edit.rf_id): str,
+                **{
+                    vol.Optional(key, description={"suggested_value": device_to_edit.overrides.get(key)}): validator
+                    for key, validator in DEVICE_OVERRIDE_VALIDATORS.items()
+                },
             })
         )
 
     async def async_step_delete(self, user_input=None):
         """Form to delete devices."""
         _LOGGER.debug("Options flow: step_delete")
-        configured_devices = self.options.get("devices", [])
-        if not configured_devices:
+        if not self.devices:
             _LOGGER.warning("No configured devices to delete.")
             return self.async_abort(reason="no_devices_to_delete")
 
         if user_input is not None:
             to_delete = user_input["internal_ids"]
             _LOGGER.debug(f"Deleting devices with internal IDs: {to_delete}")
-            devices = [
-                dev for dev in configured_devices if dev["internal_id"] not in to_delete
-            ]
-            self.options["devices"] = devices
-            _LOGGER.info(f"Devices deleted. New options: {self.options}")
-            self.hass.data[DOMAIN][self.config_entry.entry_id].load_configured_devices()
-            return self.async_create_entry(title="", data=self.options)
-        
-        device_map = {
-            dev["internal_id"]: f"{dev['name']} ({dev['rf_id']})" for dev in configured_devices
-        }
+            for internal_id in to_delete:
+                self.devices.remove(internal_id)
+            _LOGGER.info(f"Devices deleted, {len(self.devices)} left")
+            return self._save()
 
         return self.async_show_form(
             step_id="delete",
             data_schema=vol.Schema({
-                vol.Required("internal_ids"): cv.multi_select(device_map)
+                vol.Required("internal_ids"): cv.multi_select(self._device_choices())
+            })
+        )
+
+    async def async_step_settings(self, user_input=None):
+        """Form to tune frame ingestion."""
+        _LOGGER.debug("Options flow: step_settings")
+        errors = {}
+        if user_input is not None:
+            if not _valid_topics(user_input[CONF_TOPIC]):
+                errors[CONF_TOPIC] = "invalid_topic"
+            else:
+                self.options.update(user_input)
+                _LOGGER.info(f"Updating settings: {user_input}")
+                return self._save()
+
+        return self.async_show_form(
+            step_id="settings",
+            errors=errors,
+            data_schema=vol.Schema({
+                # The topics entered at setup, until they are changed here
+                vol.Required(
+                    CONF_TOPIC,
+                    default=self.options.get(CONF_TOPIC, self.config_entry.data[CONF_TOPIC]),
+                ): str,
+                vol.Required(
+                    CONF_QUEUE_SIZE,
+                    default=self.options.get(CONF_QUEUE_SIZE, DEFAULT_QUEUE_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=100000)),
+                vol.Required(
+                    CONF_BATCH_SIZE,
+                    default=self.options.get(CONF_BATCH_SIZE, DEFAULT_BATCH_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+                vol.Required(
+                    CONF_OVERFLOW_POLICY,
+                    default=self.options.get(CONF_OVERFLOW_POLICY, DEFAULT_OVERFLOW_POLICY),
+                ): vol.In(OVERFLOW_POLICIES),
+                vol.Required(
+                    CONF_DEDUPE_WINDOW,
+                    default=self.options.get(CONF_DEDUPE_WINDOW, DEFAULT_DEDUPE_WINDOW),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+                vol.Required(
+                    CONF_VOTE_WINDOW,
+                    default=self.options.get(CONF_VOTE_WINDOW, DEFAULT_VOTE_WINDOW),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                vol.Required(
+                    CONF_OUTLIER_FILTER,
+                    default=self.options.get(CONF_OUTLIER_FILTER, DEFAULT_OUTLIER_FILTER),
+                ): bool,
+                vol.Required(
+                    CONF_DISCOVERY_MIN_HITS,
+                    default=self.options.get(CONF_DISCOVERY_MIN_HITS, DEFAULT_DISCOVERY_MIN_HITS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=50)),
+                vol.Required(
+                    CONF_PARSER_BUDGET,
+                    default=self.options.get(CONF_PARSER_BUDGET, DEFAULT_PARSER_BUDGET),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=1000)),
+                vol.Required(
+                    CONF_QUARANTINE_TIME,
+                    default=self.options.get(CONF_QUARANTINE_TIME, DEFAULT_QUARANTINE_TIME),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=86400)),
+                vol.Required(
+                    CONF_DEADBAND,
+                    default=self.options.get(CONF_DEADBAND, DEFAULT_DEADBAND),
+                ): WRITE_POLICY_VALIDATORS[CONF_DEADBAND],
+                vol.Required(
+                    CONF_MIN_INTERVAL,
+                    default=self.options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+                ): WRITE_POLICY_VALIDATORS[CONF_MIN_INTERVAL],
+                vol.Required(
+                    CONF_MAX_SILENCE,
+                    default=self.options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+                ): WRITE_POLICY_VALIDATORS[CONF_MAX_SILENCE],
+                vol.Required(
+                    CONF_STALE_TIMEOUT,
+                    default=self.options.get(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT),
+                ): DEVICE_OVERRIDE_VALIDATORS[CONF_STALE_TIMEOUT],
+                vol.Required(
+                    CONF_CAPTURE,
+                    default=self.options.get(CONF_CAPTURE, DEFAULT_CAPTURE),
+                ): bool,
+                vol.Required(
+                    CONF_CAPTURE_SIZE,
+                    default=self.options.get(CONF_CAPTURE_SIZE, DEFAULT_CAPTURE_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
             })
-        )
\ No newline at end of file
+        )
@@ -1,4 +1,93 @@
 """Constants for the RF Bridge Sensor integration."""
+from datetime import timedelta
 
 DOMAIN = "ha_rf_bridge_sensor"
 CONF_TOPIC = "topic"
+
+# Tasmota payload kinds carrying RF data
+PAYLOAD_RF_RECEIVED = "RfReceived"
+PAYLOAD_RF_RAW = "RfRaw"
+PAYLOAD_KINDS = (PAYLOAD_RF_RECEIVED, PAYLOAD_RF_RAW)
+
+# Maximum number of learned "frame shape -> parser" entries
+SHAPE_CACHE_SIZE = 256
+
+# Ingest queue settings
+CONF_QUEUE_SIZE = "queue_size"
+CONF_BATCH_SIZE = "batch_size"
+CONF_OVERFLOW_POLICY = "overflow_policy"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_DUPLICATES = "drop_duplicates"
+OVERFLOW_POLICIES = [OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_DUPLICATES]
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_OVERFLOW_POLICY = OVERFLOW_DROP_DUPLICATES
+
+# Repeat-burst deduplication
+CONF_DEDUPE_WINDOW = "dedupe_window"
+DEFAULT_DEDUPE_WINDOW = 2.0
+DEDUPE_CACHE_SIZE = 512
+
+# How often the parsers directory is checked for changed parsers
+PARSER_SCAN_INTERVAL = timedelta(seconds=30)
+
+# Per-parser execution budget
+CONF_PARSER_BUDGET = "parser_budget"
+CONF_QUARANTINE_TIME = "quarantine_time"
+DEFAULT_PARSER_BUDGET = 5  # milliseconds
+DEFAULT_QUARANTINE_TIME = 300
+
+# Persistent storage
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 30
+STORAGE_KEY_DISCOVERED = DOMAIN + ".{}.discovered"
+STORAGE_KEY_SNAPSHOT = DOMAIN + ".{}.snapshot"
+
+# Discovered devices are kept for 24 hours, up to this many entries
+DISCOVERY_CAPACITY = 500
+DISCOVERY_TTL = 86400
+# An unconfigured RF ID is only listed once heard this many times within
+# about DISCOVERY_ADMISSION_WINDOW seconds
+CONF_DISCOVERY_MIN_HITS = "discovery_min_hits"
+DEFAULT_DISCOVERY_MIN_HITS = 2
+DISCOVERY_ADMISSION_WINDOW = 600
+
+# State write coalescing (integration defaults, overridable per device)
+CONF_DEADBAND = "deadband"
+CONF_MIN_INTERVAL = "min_interval"
+CONF_MAX_SILENCE = "max_silence"
+DEFAULT_DEADBAND = 0.0
+DEFAULT_MIN_INTERVAL = 0
+DEFAULT_MAX_SILENCE = 0
+WRITE_POLICY_KEYS = (CONF_DEADBAND, CONF_MIN_INTERVAL, CONF_MAX_SILENCE)
+
+# Entities of a device become unavailable when it sends no frame for this
+# many seconds (integration default, overridable per device; 0 disables)
+CONF_STALE_TIMEOUT = "stale_timeout"
+DEFAULT_STALE_TIMEOUT = 0
+
+# How often the metric entities and the frame rate are refreshed
+METRICS_INTERVAL = timedelta(seconds=30)
+
+# Optional raw frame capture to a ring of segment files
+CONF_CAPTURE = "capture"
+CONF_CAPTURE_SIZE = "capture_size"
+DEFAULT_CAPTURE = False
+DEFAULT_CAPTURE_SIZE = 10  # megabytes
+CAPTURE_DIR = DOMAIN + "_capture"
+CAPTURE_FLUSH_INTERVAL = timedelta(seconds=5)
+CAPTURE_BATCH_SIZE = 500
+CAPTURE_MAX_PENDING = 20000
+
+# Validation of parsed frames before they reach the entities
+CONF_VOTE_WINDOW = "vote_window"
+CONF_OUTLIER_FILTER = "outlier_filter"
+DEFAULT_VOTE_WINDOW = 0.0  # seconds, 0 disables voting
+DEFAULT_OUTLIER_FILTER = True
+VOTE_MAX_CANDIDATES = 4
+OUTLIER_WINDOW = 5
+OUTLIER_MAX_REJECTS = 3
+
+# Thread pool running parsers that declare CPU_HEAVY
+OFFLOAD_WORKERS = 2
+OFFLOAD_MAX_PENDING = 100
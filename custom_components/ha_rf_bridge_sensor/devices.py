@@ -0,0 +1,150 @@
+"""Configured device registry for the RF Bridge Sensor integration.
+
+Configured devices are stored as plain dicts in the config entry options
+(``{"internal_id", "name", "rf_id"}`` plus optional per device overrides).
+In memory they are ``RFDevice`` records held by a ``DeviceRegistry``, which
+indexes them by internal ID, RF ID and the parser that decodes them, so the
+coordinator and the options flow never scan the device list.
+"""
+
+# Keys of a device option that are not overrides
+DEVICE_KEYS = ("internal_id", "name", "rf_id")
+
+
+class RFDevice:
+    """A configured RF device."""
+
+    __slots__ = (
+        "internal_id", "name", "rf_id", "overrides", "parser", "fields",
+        "last_frame", "available",
+    )
+
+    def __init__(self, internal_id, name, rf_id, overrides=None):
+        self.internal_id = internal_id
+        self.name = name
+        self.rf_id = rf_id
+        # Per device settings, e.g. the state write policy
+        self.overrides = dict(overrides or {})
+        # Parser that last decoded the device, kept up to date by the coordinator
+        self.parser = None
+        # Fields that have an entity (and "id")
+        self.fields = {"id"}
+        # Monotonic time of the last frame and availability, kept by the coordinator
+        self.last_frame = None
+        self.available = True
+
+    @classmethod
+    def from_option(cls, option):
+        """Create a device from its config entry option."""
+        overrides = {key: value for key, value in option.items() if key not in DEVICE_KEYS}
+        return cls(option["internal_id"], option["name"], option["rf_id"], overrides)
+
+    def as_option(self):
+        """Return the device as stored in the config entry options."""
+        return {
+            "internal_id": self.internal_id,
+            "name": self.name,
+            "rf_id": self.rf_id,
+            **self.overrides,
+        }
+
+    def __repr__(self):
+        return f"RFDevice({self.name!r}, rf_id={self.rf_id!r}, internal_id={self.internal_id!r})"
+
+
+class DeviceRegistry:
+    """Configured devices indexed by internal ID, RF ID and parser.
+
+    Devices keep their insertion order. Records are updated in place through
+    ``update`` and ``set_parser`` so every index stays consistent and code
+    holding a record sees the change.
+    """
+
+    def __init__(self, devices=()):
+        self._by_internal_id = {}
+        self._by_rf_id = {}
+        # parser name -> {internal_id: device}
+        self._by_parser = {}
+        for device in devices:
+            self.add(device)
+
+    @classmethod
+    def from_options(cls, options):
+        """Create a registry from the ``devices`` list of the config entry options."""
+        return cls(RFDevice.from_option(option) for option in options)
+
+    def __len__(self):
+        return len(self._by_internal_id)
+
+    def __iter__(self):
+        return iter(self._by_internal_id.values())
+
+    def __contains__(self, internal_id):
+        return internal_id in self._by_internal_id
+
+    def get(self, internal_id):
+        """Return the device with the given internal ID, or None."""
+        return self._by_internal_id.get(internal_id)
+
+    def by_rf_id(self, rf_id):
+        """Return the device transmitting the given RF ID, or None."""
+        return self._by_rf_id.get(rf_id)
+
+    def by_parser(self, parser_name):
+        """Return the devices last decoded by the given parser."""
+        return list(self._by_parser.get(parser_name, {}).values())
+
+    def parser_counts(self):
+        """Return the number of devices per parser."""
+        return {name: len(devices) for name, devices in self._by_parser.items()}
+
+    def add(self, device):
+        """Add a device; a device already using its RF ID loses it."""
+        self._by_internal_id[device.internal_id] = device
+        self._by_rf_id[device.rf_id] = device
+        if device.parser is not None:
+            self._by_parser.setdefault(device.parser, {})[device.internal_id] = device
+
+    def remove(self, internal_id):
+        """Remove a device, returning it (or None if unknown)."""
+        device = self._by_internal_id.pop(internal_id, None)
+        if device is None:
+            return None
+        if self._by_rf_id.get(device.rf_id) is device:
+            del self._by_rf_id[device.rf_id]
+        self._unindex_parser(device)
+        return device
+
+    def update(self, device, name, rf_id, overrides):
+        """Change the name, RF ID and overrides of a device in place."""
+        if rf_id != device.rf_id:
+            if self._by_rf_id.get(device.rf_id) is device:
+                del self._by_rf_id[device.rf_id]
+            self._by_rf_id[rf_id] = device
+            # The new transmitter may be decoded by another parser
+            self._unindex_parser(device)
+            device.parser = None
+        device.name = name
+        device.rf_id = rf_id
+        device.overrides = dict(overrides)
+
+    def set_parser(self, device, parser_name):
+        """Record the parser that decodes a device."""
+        if device.parser == parser_name:
+            return
+        self._unindex_parser(device)
+        device.parser = parser_name
+        if parser_name is not None:
+            self._by_parser.setdefault(parser_name, {})[device.internal_id] = device
+
+    def _unindex_parser(self, device):
+        """Drop a device from the parser index."""
+        devices = self._by_parser.get(device.parser)
+        if devices is not None:
+            devices.pop(device.internal_id, None)
+            if not devices:
+                del self._by_parser[device.parser]
+
+    def as_options(self):
+        """Return the ``devices`` list for the config entry options."""
+        return [device.as_option() for device in self]
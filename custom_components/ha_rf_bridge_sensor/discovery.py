@@ -0,0 +1,102 @@
+"""Discovered device tracking for the RF Bridge Sensor integration."""
+from collections import OrderedDict
+import logging
+
+from homeassistant.helpers.storage import Store
+
+from .const import STORAGE_VERSION, STORAGE_SAVE_DELAY, STORAGE_KEY_DISCOVERED
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DiscoveredDevices:
+    """Capacity bounded LRU/TTL map of RF IDs heard but not configured.
+
+    Entries are kept in last-seen order, so expired and surplus entries are
+    evicted from the front as new IDs are recorded. Each entry keeps the last
+    parsed sample, the parser that decoded it and a hit count. The map is persisted with a ``Store`` so
+    discovery state survives restarts.
+    """
+
+    def __init__(self, hass, entry_id, capacity, ttl):
+        self._entries = OrderedDict()
+        self._capacity = capacity
+        self._ttl = ttl
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY_DISCOVERED.format(entry_id))
+        self._save_pending = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, rf_id):
+        return rf_id in self._entries
+
+    async def async_load(self, now):
+        """Restore the persisted entries."""
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        entries = sorted(stored.get("devices", {}).items(), key=lambda item: item[1]["last_seen"])
+        self._entries = OrderedDict(entries)
+        self._evict(now)
+        _LOGGER.debug("Restored %d discovered RF devices", len(self._entries))
+
+    def items(self, now):
+        """Return the unexpired entries as a ``{rf_id: info}`` mapping."""
+        self._evict(now)
+        return self._entries
+
+    def record(self, rf_id, parser_name, parsed_data, now):
+        """Record a frame from an unconfigured RF ID."""
+        entry = self._entries.get(rf_id)
+        if entry is None:
+            self._entries[rf_id] = {
+                "parser": parser_name,
+                "data": parsed_data,
+                "first_seen": now,
+                "last_seen": now,
+                "hits": 1,
+            }
+        else:
+            entry["parser"] = parser_name
+            entry["data"] = parsed_data
+            entry["last_seen"] = now
+            entry["hits"] += 1
+            self._entries.move_to_end(rf_id)
+        self._evict(now)
+        self._schedule_save()
+
+    def pop(self, rf_id):
+        """Forget an RF ID, returning its entry if it was discovered."""
+        entry = self._entries.pop(rf_id, None)
+        if entry is not None:
+            self._schedule_save()
+        return entry
+
+    def remove(self, rf_ids):
+        """Forget the given RF IDs, e.g. once they are configured."""
+        removed = False
+        for rf_id in rf_ids:
+            removed |= self._entries.pop(rf_id, None) is not None
+        if removed:
+            self._schedule_save()
+
+    def _evict(self, now):
+        """Drop entries from the front while expired or over capacity."""
+        entries = self._entries
+        cutoff = now - self._ttl
+        while entries and (
+            len(entries) > self._capacity or next(iter(entries.values()))["last_seen"] <= cutoff
+        ):
+            entries.popitem(last=False)
+
+    def _schedule_save(self):
+        """Persist the entries after a delay, once per batch of changes."""
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    def _data_to_save(self):
+        """Return the data to persist."""
+        self._save_pending = False
+        return {"devices": dict(self._entries)}
@@ -0,0 +1,441 @@
+"""Indexed parser dispatch for the RF Bridge Sensor integration.
+
+Parser modules may declare cheap metadata next to their ``parse`` function.
+All of it is optional; a parser without metadata is tried for every frame.
+
+    PAYLOAD_KINDS = ("RfRaw",)   # payload kinds handled (RfReceived / RfRaw)
+    MIN_LENGTH = 100             # minimum length of the Data string
+    MAX_LENGTH = 200             # maximum length of the Data string
+    MIN_TOKENS = 8               # minimum number of space separated tokens
+    MAX_TOKENS = 9               # maximum number of space separated tokens
+    PREFIX = "AA B1"             # required prefix of the Data string
+    CPU_HEAVY = True             # run off the event loop (see below)
+
+A parser can also describe the fields it returns, which decides the entities
+created for its devices. Fields without a description get a plain sensor.
+
+    FIELDS = {
+        "temperature": {"device_class": "temperature", "unit": "°C",
+                        "state_class": "measurement", "max_jump": 10,
+                        "aggregates": ["mean_1h", "min_24h", "max_24h"]},
+        "battery_low": {"name": "Battery low"},
+    }
+
+``max_jump`` is the largest plausible change of a numeric measurement field
+between readings; only fields with one are checked by the outlier filter
+(see validation.py). ``aggregates`` lists the rolling aggregate sensors (see
+``AGGREGATE_SENSORS`` in sensor.py) offered for the field.
+
+Parsers compiled with ``parsers/_fieldspec.py`` take the descriptions from
+their protocol fields.
+
+Every parser call is timed and its exceptions are counted. A parser that
+keeps exceeding the latency budget is demoted to the end of the dispatch
+order, and quarantined for a cooldown period if it stays slow. A parser that
+keeps raising is quarantined straight away. A demoted parser, also one
+released from quarantine, moves back up once it stayed within the budget
+for a run of calls.
+
+A parser that declares ``CPU_HEAVY`` (checksum brute-forcing, rolling codes,
+multi-protocol demodulation) is not bound by the latency budget. When the
+caller passes a ``heavy`` list to ``dispatch``, such parsers are not run but
+collected, after the light parsers had their turn; the caller runs them with
+``run_heavy`` off the event loop and hands the outcome back to
+``complete_heavy``.
+"""
+import logging
+import sys
+from time import perf_counter
+
+from .const import (
+    PAYLOAD_KINDS,
+    SHAPE_CACHE_SIZE,
+    DEFAULT_PARSER_BUDGET,
+    DEFAULT_QUARANTINE_TIME,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Field descriptions assumed for parsers that do not declare any, matching
+# the entities created before parsers could describe their fields
+LEGACY_FIELDS = {
+    "temperature": {
+        "device_class": "temperature", "unit": "°C", "state_class": "measurement", "max_jump": 10,
+    },
+    "humidity": {
+        "device_class": "humidity", "unit": "%", "state_class": "measurement", "max_jump": 20,
+    },
+}
+
+# Consecutive slow calls before a parser is demoted / quarantined
+DEMOTE_STRIKES = 3
+QUARANTINE_STRIKES = 10
+# Consecutive exceptions before a parser is quarantined
+ERROR_STRIKES = 5
+# Consecutive calls within the budget before a demoted parser is promoted again
+PROMOTE_CALLS = 100
+
+
+class ParserHealth:
+    """Execution statistics and health state of a single parser."""
+
+    __slots__ = (
+        "calls", "matches", "errors", "slow_calls", "total_time", "max_time",
+        "slow_strikes", "error_strikes", "good_calls", "demoted", "quarantined_until",
+        "quarantines", "last_error",
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.matches = 0
+        self.errors = 0
+        self.slow_calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.slow_strikes = 0
+        self.error_strikes = 0
+        self.good_calls = 0
+        self.demoted = False
+        self.quarantined_until = None
+        self.quarantines = 0
+        self.last_error = None
+
+    def as_dict(self, now):
+        """Return the statistics for diagnostics."""
+        return {
+            "calls": self.calls,
+            "matches": self.matches,
+            "errors": self.errors,
+            "slow_calls": self.slow_calls,
+            "avg_time_ms": round(self.total_time / self.calls * 1000, 4) if self.calls else None,
+            "max_time_ms": round(self.max_time * 1000, 4),
+            "demoted": self.demoted,
+            "quarantined_for_s": (
+                round(self.quarantined_until - now, 1) if self.quarantined_until else None
+            ),
+            "quarantines": self.quarantines,
+            "last_error": self.last_error,
+        }
+
+
+class ParserSpec:
+    """A loaded parser together with its declared frame prefilter."""
+
+    __slots__ = (
+        "name", "parse", "kinds", "min_length", "max_length",
+        "min_tokens", "max_tokens", "prefix", "fields", "cpu_heavy", "rfraw", "health",
+    )
+
+    def __init__(self, name, module, health):
+        self.name = name
+        self.health = health
+        self.parse = module.parse
+        self.kinds = tuple(getattr(module, "PAYLOAD_KINDS", None) or PAYLOAD_KINDS)
+        self.min_length = getattr(module, "MIN_LENGTH", 0)
+        self.max_length = getattr(module, "MAX_LENGTH", None)
+        self.min_tokens = getattr(module, "MIN_TOKENS", 0)
+        self.max_tokens = getattr(module, "MAX_TOKENS", None)
+        self.prefix = getattr(module, "PREFIX", None)
+        self.cpu_heavy = bool(getattr(module, "CPU_HEAVY", False))
+        self.fields = (
+            getattr(module, "FIELDS", None) or getattr(module.parse, "fields", None) or LEGACY_FIELDS
+        )
+        # The shared RfRaw decoder module of a parser that imported decode_b1;
+        # taken from the parser since the loader re-imports changed helpers
+        decode_b1 = getattr(module, "decode_b1", None)
+        self.rfraw = sys.modules.get(getattr(decode_b1, "__module__", None))
+
+    def accepts(self, data, length, tokens):
+        """Return True if a frame passes this parser's prefilter."""
+        if length < self.min_length or tokens < self.min_tokens:
+            return False
+        if self.max_length is not None and length > self.max_length:
+            return False
+        if self.max_tokens is not None and tokens > self.max_tokens:
+            return False
+        if self.prefix and not data.startswith(self.prefix):
+            return False
+        return True
+
+
+class ParserDispatcher:
+    """Routes RF frames to the parsers that can possibly handle them.
+
+    Parsers are indexed by payload kind and filtered by their declared
+    prefilter. The parser that matched a given frame shape (payload kind,
+    length and token count) is remembered and tried first for the next frame
+    of the same shape, so a frame normally costs one parser call.
+    """
+
+    def __init__(self, modules, cache_size=SHAPE_CACHE_SIZE, affinity=None, health=None):
+        health = health or {}
+        self._modules = modules
+        self._health = {name: health.get(name) or ParserHealth() for name in modules}
+        self._specs = [
+            ParserSpec(name, modules[name], self._health[name]) for name in sorted(modules)
+        ]
+        self._cache_size = cache_size
+        self._shape_cache = {}
+        # rf_id -> parser name, learned from frames of configured devices
+        self._affinity = dict(affinity or {})
+        self._budget = DEFAULT_PARSER_BUDGET / 1000
+        self._quarantine_time = DEFAULT_QUARANTINE_TIME
+        self._next_release = None
+        self._index = {}
+        self._build_index()
+        # Decoded RfRaw frames are only worth caching if several parsers decode
+        # them; field-spec parsers split usual frames themselves, for less
+        # than a cache lookup costs
+        decoders = [spec.rfraw for spec in self._specs if spec.rfraw is not None]
+        for rfraw in set(decoders):
+            rfraw.set_shared(len(decoders) > 1)
+
+    def with_parsers(self, modules):
+        """Return a new dispatcher for another set of parser modules.
+
+        Learned device affinities and settings are carried over, as is the
+        health of parsers whose module did not change. The shape cache is
+        not, since it may point at replaced parsers.
+        """
+        health = {
+            name: self._health[name]
+            for name, module in modules.items()
+            if self._modules.get(name) is module
+        }
+        dispatcher = ParserDispatcher(modules, self._cache_size, self._affinity, health)
+        dispatcher.configure(self._budget, self._quarantine_time)
+        return dispatcher
+
+    def configure(self, budget, quarantine_time):
+        """Set the per call latency budget and quarantine cooldown (seconds)."""
+        self._budget = budget
+        self._quarantine_time = quarantine_time
+
+    def health_report(self):
+        """Return the health of every parser, in dispatch order."""
+        now = perf_counter()
+        return {spec.name: spec.health.as_dict(now) for spec in self._specs}
+
+    @property
+    def parser_names(self):
+        """Return the names of all indexed parsers."""
+        return [spec.name for spec in self._specs]
+
+    def field_descriptions(self, parser_name):
+        """Return the ``{field: description}`` declared by a parser."""
+        for spec in self._specs:
+            if spec.name == parser_name:
+                return spec.fields
+        return LEGACY_FIELDS
+
+    def _build_index(self):
+        """Build the per payload kind candidate lists.
+
+        Quarantined parsers are left out and demoted parsers go last. Parsers
+        that produced IDs of configured devices come first, the rest keep their
+        (alphabetical) load order.
+        """
+        preferred = set(self._affinity.values())
+        ordered = sorted(
+            (spec for spec in self._specs if spec.health.quarantined_until is None),
+            key=lambda spec: (spec.health.demoted, spec.name not in preferred),
+        )
+        releases = [
+            spec.health.quarantined_until
+            for spec in self._specs
+            if spec.health.quarantined_until is not None
+        ]
+        self._next_release = min(releases) if releases else None
+        self._index = {
+            kind: [spec for spec in ordered if kind in spec.kinds]
+            for kind in PAYLOAD_KINDS
+        }
+        self._index[None] = ordered
+
+    def learn_affinity(self, rf_id, parser_name):
+        """Record that a configured device is decoded by the given parser."""
+        if self._affinity.get(rf_id) == parser_name:
+            return
+        self._affinity[rf_id] = parser_name
+        self._build_index()
+
+    def forget_affinity(self, rf_id):
+        """Drop the parser affinity of a device that is no longer configured."""
+        if self._affinity.pop(rf_id, None) is not None:
+            self._build_index()
+
+    def dispatch(self, data, kind=None, heavy=None):
+        """Parse a frame, returning ``(parser_name, parsed_data)``.
+
+        ``(None, None)`` is returned when no parser claims the frame. If a
+        ``heavy`` list is given, CPU heavy candidates are appended to it
+        instead of being run, and the frame is still unclaimed if none of
+        the light parsers matched.
+        """
+        if self._next_release is not None and perf_counter() >= self._next_release:
+            self._release_quarantined()
+
+        length = len(data)
+        tokens = data.count(" ") + 1
+        shape = (kind, length, tokens)
+
+        cached = self._shape_cache.get(shape)
+        if cached is not None:
+            if heavy is not None and cached.cpu_heavy:
+                heavy.append(cached)
+            else:
+                parsed = self._try_parse(cached, data)
+                if parsed:
+                    return cached.name, parsed
+
+        for spec in self._index.get(kind, self._index[None]):
+            if spec is cached or not spec.accepts(data, length, tokens):
+                continue
+            if heavy is not None and spec.cpu_heavy:
+                heavy.append(spec)
+                continue
+            parsed = self._try_parse(spec, data)
+            if parsed:
+                self._remember(shape, spec)
+                return spec.name, parsed
+        return None, None
+
+    @staticmethod
+    def run_heavy(specs, data):
+        """Run CPU heavy parsers until one claims the frame; safe in any thread.
+
+        Returns ``(spec, parsed, error, elapsed)`` for every parser run, for
+        ``complete_heavy`` to account on the event loop.
+        """
+        outcomes = []
+        for spec in specs:
+            start = perf_counter()
+            try:
+                parsed = spec.parse(data)
+            except Exception as e:
+                outcomes.append((spec, None, e, perf_counter() - start))
+                continue
+            outcomes.append((spec, parsed, None, perf_counter() - start))
+            if parsed and "id" in parsed:
+                break
+        return outcomes
+
+    def complete_heavy(self, data, kind, outcomes):
+        """Account the outcomes of ``run_heavy``, returning ``(parser_name, parsed_data)``."""
+        for spec, parsed, error, elapsed in outcomes:
+            parsed = self._account(spec, parsed, error, elapsed)
+            if parsed:
+                self._remember((kind, len(data), data.count(" ") + 1), spec)
+                return spec.name, parsed
+        return None, None
+
+    def _remember(self, shape, spec):
+        """Store the parser for a frame shape, evicting the oldest entry."""
+        cache = self._shape_cache
+        if shape not in cache and len(cache) >= self._cache_size:
+            del cache[next(iter(cache))]
+        cache[shape] = spec
+
+    def _try_parse(self, spec, data):
+        """Run a single parser, returning its result only if it has an ID."""
+        start = perf_counter()
+        try:
+            parsed = spec.parse(data)
+        except Exception as e:
+            return self._account(spec, None, e, perf_counter() - start)
+        return self._account(spec, parsed, None, perf_counter() - start)
+
+    def _account(self, spec, parsed, error, elapsed):
+        """Update the health of a parser after a call; returns ``parsed`` if it has an ID."""
+        health = spec.health
+        if error is not None:
+            health.calls += 1
+            health.errors += 1
+            health.error_strikes += 1
+            health.good_calls = 0
+            health.last_error = repr(error)
+            _LOGGER.error("Error in parser '%s': %s", spec.name, error)
+            if health.error_strikes >= ERROR_STRIKES:
+                self._quarantine(spec, f"{health.error_strikes} consecutive errors")
+            return None
+
+        health.calls += 1
+        health.error_strikes = 0
+        health.total_time += elapsed
+        if elapsed > health.max_time:
+            health.max_time = elapsed
+        if elapsed > self._budget and not spec.cpu_heavy:
+            self._record_slow_call(spec, elapsed)
+        else:
+            health.slow_strikes = 0
+            if health.demoted:
+                self._record_good_call(spec)
+
+        if parsed and "id" in parsed:
+            health.matches += 1
+            return parsed
+        return None
+
+    def _record_slow_call(self, spec, elapsed):
+        """Demote or quarantine a parser that keeps exceeding the budget."""
+        health = spec.health
+        health.slow_calls += 1
+        health.slow_strikes += 1
+        health.good_calls = 0
+        if health.slow_strikes >= QUARANTINE_STRIKES:
+            self._quarantine(
+                spec, f"{health.slow_strikes} consecutive calls over budget ({elapsed * 1000:.1f} ms)"
+            )
+        elif health.slow_strikes >= DEMOTE_STRIKES and not health.demoted:
+            _LOGGER.warning(
+                "RF parser '%s' exceeded its %.1f ms budget %d times in a row, demoting it",
+                spec.name, self._budget * 1000, health.slow_strikes,
+            )
+            health.demoted = True
+            self._drop_cached(spec)
+            self._build_index()
+
+    def _record_good_call(self, spec):
+        """Promote a demoted parser once it kept within the budget long enough."""
+        health = spec.health
+        health.good_calls += 1
+        if health.good_calls >= PROMOTE_CALLS:
+            _LOGGER.info(
+                "RF parser '%s' stayed within its budget %d times in a row, promoting it",
+                spec.name, health.good_calls,
+            )
+            health.demoted = False
+            health.good_calls = 0
+            health.slow_strikes = 0
+            self._build_index()
+
+    def _quarantine(self, spec, reason):
+        """Take a parser out of dispatch for the cooldown period."""
+        health = spec.health
+        _LOGGER.warning(
+            "Quarantining RF parser '%s' for %d seconds: %s",
+            spec.name, self._quarantine_time, reason,
+        )
+        health.quarantined_until = perf_counter() + self._quarantine_time
+        health.quarantines += 1
+        health.slow_strikes = 0
+        health.error_strikes = 0
+        health.good_calls = 0
+        self._drop_cached(spec)
+        self._build_index()
+
+    def _release_quarantined(self):
+        """Put parsers whose cooldown has expired back into dispatch, demoted."""
+        now = perf_counter()
+        for spec in self._specs:
+            health = spec.health
+            if health.quarantined_until is not None and health.quarantined_until <= now:
+                _LOGGER.info("RF parser '%s' released from quarantine", spec.name)
+                health.quarantined_until = None
+                health.demoted = True
+        self._build_index()
+
+    def _drop_cached(self, spec):
+        """Forget all frame shapes learned for a parser."""
+        for shape in [shape for shape, cached in self._shape_cache.items() if cached is spec]:
+            del self._shape_cache[shape]
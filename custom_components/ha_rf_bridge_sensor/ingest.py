@@ -0,0 +1,218 @@
+"""Frame ingestion helpers for the RF Bridge Sensor integration."""
+import asyncio
+from collections import OrderedDict, deque
+import json
+import re
+
+from .const import OVERFLOW_DROP_DUPLICATES, PAYLOAD_RF_RECEIVED, PAYLOAD_RF_RAW
+
+# Returned by classify_payload when the payload needs a full JSON decode
+NEEDS_JSON = object()
+
+_RF_RECEIVED_MARKER = b'"' + PAYLOAD_RF_RECEIVED.encode() + b'"'
+_RF_RAW_MARKER = b'"' + PAYLOAD_RF_RAW.encode() + b'"'
+
+# Common Tasmota layouts: a top-level object whose leading members are plain
+# scalars (e.g. "Time"), followed by an RfReceived/RfRaw object holding a
+# "Data" string. Strings with escapes and nested objects do not match and
+# fall back to a full JSON decode.
+_STRING = rb'"[^"\\]*"'
+_SCALAR = rb'(?:' + _STRING + rb'|[-+.\w]+)'
+_RF_PAYLOAD = re.compile(
+    rb'\s*\{(?:\s*' + _STRING + rb'\s*:\s*' + _SCALAR + rb'\s*,)*'
+    rb'\s*"(' + PAYLOAD_RF_RECEIVED.encode() + rb'|' + PAYLOAD_RF_RAW.encode() + rb')"\s*:\s*\{'
+    rb'(?:[^{}"\\]|' + _STRING + rb')*?'
+    rb'"Data"\s*:\s*"([^"\\]*)"'
+)
+
+
+def classify_payload(payload):
+    """Pull ``(kind, data)`` out of a raw MQTT payload without decoding it.
+
+    Returns None for messages that carry no RF data (command results,
+    ``RfKey`` results, status messages...), and ``NEEDS_JSON`` for RF
+    payloads in a layout the fast path does not recognise.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    has_received = _RF_RECEIVED_MARKER in payload
+    has_raw = _RF_RAW_MARKER in payload
+    if not (has_received or has_raw):
+        return None
+    if has_received and has_raw:
+        return NEEDS_JSON
+    match = _RF_PAYLOAD.match(payload)
+    if match is None:
+        return NEEDS_JSON
+    data = match.group(2)
+    if not data:
+        return None
+    return match.group(1).decode(), data.decode()
+
+
+def extract_rf_data_json(payload):
+    """Pull ``(kind, data)`` out of an MQTT payload with a full JSON decode.
+
+    Returns None for messages that carry no RF data. Raises
+    ``json.JSONDecodeError`` for invalid JSON.
+    """
+    decoded = json.loads(payload)
+    if not isinstance(decoded, dict):
+        return None
+    for kind in (PAYLOAD_RF_RECEIVED, PAYLOAD_RF_RAW):
+        section = decoded.get(kind)
+        if isinstance(section, dict):
+            data = section.get("Data")
+            return (kind, data) if data else None
+    return None
+
+
+class FrameQueue:
+    """Bounded FIFO of RF frames drained by a single long-lived consumer.
+
+    Frames are ``(rf_data, kind, source)`` tuples. When the queue is full the overflow
+    policy decides what is shed: ``drop_oldest`` discards the oldest queued
+    frame, ``drop_duplicates`` first discards an incoming frame whose data is
+    already queued and only then falls back to dropping the oldest frame.
+    """
+
+    def __init__(self, maxsize, policy):
+        self._frames = deque()
+        self._queued = {}
+        self._event = asyncio.Event()
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.dropped_duplicates = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    def configure(self, maxsize, policy):
+        """Apply new limits, shedding the oldest frames if the queue shrank."""
+        self.maxsize = maxsize
+        self.policy = policy
+        while len(self._frames) > maxsize:
+            self._drop_oldest()
+
+    def put(self, frame):
+        """Queue a frame, returning False if a frame had to be shed."""
+        data = frame[0]
+        shed = False
+        if len(self._frames) >= self.maxsize:
+            if self.policy == OVERFLOW_DROP_DUPLICATES and data in self._queued:
+                self.dropped += 1
+                self.dropped_duplicates += 1
+                return False
+            self._drop_oldest()
+            shed = True
+        self._frames.append(frame)
+        self._queued[data] = self._queued.get(data, 0) + 1
+        self._event.set()
+        return not shed
+
+    def _drop_oldest(self):
+        """Discard the oldest queued frame."""
+        self._forget(self._frames.popleft()[0])
+        self.dropped += 1
+
+    def _forget(self, data):
+        """Decrement the queued count of a frame's data."""
+        count = self._queued[data] - 1
+        if count:
+            self._queued[data] = count
+        else:
+            del self._queued[data]
+
+    def pop_batch(self, size):
+        """Remove and return up to ``size`` frames in arrival order."""
+        frames = self._frames
+        batch = []
+        while frames and len(batch) < size:
+            frame = frames.popleft()
+            self._forget(frame[0])
+            batch.append(frame)
+        return batch
+
+    async def async_wait(self):
+        """Wait until at least one frame is queued."""
+        while not self._frames:
+            self._event.clear()
+            await self._event.wait()
+
+
+class RepeatFilter:
+    """Time windowed filter for repeated copies of the same RF frame.
+
+    Cheap RF sensors send every reading several times in a row, and with
+    several bridges the same transmission is heard more than once. The first
+    copy of a ``Data`` string is let through and identical copies arriving
+    within ``window`` seconds of it are suppressed, whichever bridge they
+    come from. The suppressed copies are counted per frame, so they can be
+    used as votes (see ``validation.RepeatVoter``). Entries are kept in
+    first-seen order, so expired entries are evicted from the front as new
+    frames arrive and at most ``maxsize`` entries are ever held.
+    """
+
+    def __init__(self, window, maxsize):
+        self._seen = OrderedDict()
+        self.window = window
+        self.maxsize = maxsize
+        self.suppressed = 0
+
+    def configure(self, window):
+        """Change the deduplication window."""
+        self.window = window
+        if not window:
+            self._seen.clear()
+
+    def first_source(self, data, source, now):
+        """Check a frame against the window.
+
+        Returns None for a new frame, or the source that delivered the first
+        copy if ``data`` repeats a frame seen within the window.
+        """
+        if not self.window:
+            return None
+        seen = self._seen
+        first = seen.get(data)
+        if first is not None:
+            if now - first[0] < self.window:
+                self.suppressed += 1
+                first[2] += 1
+                return first[1]
+            del seen[data]
+
+        cutoff = now - self.window
+        while seen and (len(seen) >= self.maxsize or next(iter(seen.values()))[0] <= cutoff):
+            seen.popitem(last=False)
+        seen[data] = [now, source, 0]
+        return None
+
+    def repeats(self, data):
+        """Return how many copies of ``data`` were suppressed in its window."""
+        first = self._seen.get(data)
+        return first[2] if first is not None else 0
+
+
+class BridgeStats:
+    """Reception statistics of a single RF bridge (MQTT topic)."""
+
+    __slots__ = ("frames", "first_copies", "repeats", "cross_bridge_copies", "last_seen")
+
+    def __init__(self):
+        self.frames = 0
+        self.first_copies = 0
+        self.repeats = 0
+        self.cross_bridge_copies = 0
+        self.last_seen = None
+
+    def as_dict(self):
+        """Return the statistics for diagnostics."""
+        return {
+            "frames": self.frames,
+            "first_copies": self.first_copies,
+            "repeats": self.repeats,
+            "cross_bridge_copies": self.cross_bridge_copies,
+            "last_seen": self.last_seen,
+        }
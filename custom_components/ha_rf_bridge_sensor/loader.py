@@ -0,0 +1,105 @@
+"""Parser module loading for the RF Bridge Sensor integration.
+
+Everything in this module does blocking file system I/O and is meant to run
+in the executor.
+"""
+import importlib.util
+import logging
+import os
+import sys
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ParserLoader:
+    """Loads parser modules and reloads them when their files change.
+
+    Compiled modules are cached together with the modification time of their
+    file, so a rescan only re-imports parsers that were changed or added.
+    Modules starting with an underscore are shared helpers rather than
+    parsers; when one of them changes every parser is re-imported.
+    """
+
+    def __init__(self, parsers_dir, package):
+        self._parsers_dir = parsers_dir
+        self._package = package
+        self._mtimes = None
+        self._modules = {}
+
+    def _scan(self):
+        """Return the modification time of every module in the parsers directory."""
+        try:
+            with os.scandir(self._parsers_dir) as entries:
+                return {
+                    entry.name: entry.stat().st_mtime_ns
+                    for entry in entries
+                    if entry.name.endswith(".py") and entry.is_file()
+                }
+        except FileNotFoundError:
+            _LOGGER.warning("Parsers directory not found: %s", self._parsers_dir)
+            return {}
+
+    def _load_module(self, module_name):
+        """Import a single parser module, returning None on failure."""
+        try:
+            spec = importlib.util.spec_from_file_location(
+                f"{self._package}.{module_name}",
+                os.path.join(self._parsers_dir, f"{module_name}.py"),
+            )
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except Exception as e:
+            _LOGGER.error("Failed to load RF parser '%s': %s", module_name, e)
+            return None
+        if not hasattr(module, "parse"):
+            _LOGGER.warning("RF Parser '%s' does not have a 'parse' function.", module_name)
+            return None
+        _LOGGER.info("Successfully loaded RF parser: %s", module_name)
+        return module
+
+    def load_changed(self):
+        """Reload changed parsers.
+
+        Returns the complete ``{name: module}`` mapping if anything was
+        added, changed or removed since the previous call, otherwise None.
+        """
+        mtimes = self._scan()
+        if mtimes == self._mtimes:
+            return None
+        previous = self._mtimes or {}
+
+        # Helpers imported before the first scan are current, and purging
+        # them would leave other importers holding a stale copy
+        helpers_changed = self._mtimes is not None and any(
+            previous.get(name) != mtimes.get(name)
+            for name in set(previous) | set(mtimes)
+            if name.startswith("_") and name != "__init__.py"
+        )
+        if helpers_changed:
+            # Drop cached helpers so parsers pick up the new version on import
+            prefix = f"{self._package}._"
+            for name in [name for name in sys.modules if name.startswith(prefix)]:
+                del sys.modules[name]
+
+        modules = {}
+        for file_name, mtime in sorted(mtimes.items()):
+            if file_name.startswith("_"):
+                continue
+            module_name = file_name[:-3]
+            cached = self._modules.get(module_name)
+            if cached is not None and not helpers_changed and previous.get(file_name) == mtime:
+                modules[module_name] = cached
+                continue
+            module = self._load_module(module_name)
+            if module is None and cached is not None:
+                _LOGGER.warning("Keeping previous version of RF parser '%s'", module_name)
+                module = cached
+            if module is not None:
+                modules[module_name] = module
+
+        for module_name in set(self._modules) - set(modules):
+            _LOGGER.info("Removed RF parser: %s", module_name)
+
+        self._mtimes = mtimes
+        self._modules = modules
+        return dict(modules)
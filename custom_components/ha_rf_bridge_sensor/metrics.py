@@ -0,0 +1,112 @@
+"""Cheap in-memory hot path metrics for the RF Bridge Sensor integration."""
+from bisect import bisect_left
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+)
+
+
+class LatencyHistogram:
+    """Fixed bucket latency histogram; recording a sample is O(log buckets)."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Add a sample."""
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self):
+        """Return the histogram in milliseconds for diagnostics."""
+        buckets = {
+            f"<={bound * 1000:g}ms": count
+            for bound, count in zip(LATENCY_BUCKETS, self.counts)
+        }
+        buckets[f">{LATENCY_BUCKETS[-1] * 1000:g}ms"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 4) if self.count else None,
+            "p50_ms": _ms(self.percentile(0.5)),
+            "p99_ms": _ms(self.percentile(0.99)),
+            "max_ms": round(self.max * 1000, 4),
+            "buckets": buckets,
+        }
+
+
+def _ms(seconds):
+    """Convert seconds to rounded milliseconds."""
+    return None if seconds is None else round(seconds * 1000, 4)
+
+
+class CoordinatorMetrics:
+    """Counters updated by the coordinator for every MQTT message and frame.
+
+    Per-parser hits and misses are kept by the parser dispatcher.
+    """
+
+    __slots__ = (
+        "messages", "non_rf_messages", "json_fallbacks", "json_errors", "frames_received",
+        "matched_frames", "unmatched_frames", "unmatched_ids",
+        "dispatch_latency", "frame_rate", "_rate_frames", "_rate_time",
+    )
+
+    def __init__(self):
+        self.messages = 0
+        self.non_rf_messages = 0
+        self.json_fallbacks = 0
+        self.json_errors = 0
+        self.frames_received = 0
+        self.matched_frames = 0
+        self.unmatched_frames = 0
+        self.unmatched_ids = 0
+        self.dispatch_latency = LatencyHistogram()
+        self.frame_rate = 0.0
+        self._rate_frames = 0
+        self._rate_time = None
+
+    def update_rate(self, now):
+        """Recompute frames per second since the previous call."""
+        if self._rate_time is not None and now > self._rate_time:
+            self.frame_rate = round(
+                (self.frames_received - self._rate_frames) / (now - self._rate_time), 2
+            )
+        self._rate_frames = self.frames_received
+        self._rate_time = now
+
+    def as_dict(self):
+        """Return the metrics for diagnostics."""
+        return {
+            "messages": self.messages,
+            "non_rf_messages": self.non_rf_messages,
+            "json_fallbacks": self.json_fallbacks,
+            "json_errors": self.json_errors,
+            "frames_received": self.frames_received,
+            "frames_per_second": self.frame_rate,
+            "matched_frames": self.matched_frames,
+            "unmatched_frames": self.unmatched_frames,
+            "unmatched_ids": self.unmatched_ids,
+            "dispatch_latency": self.dispatch_latency.as_dict(),
+        }
@@ -0,0 +1,110 @@
+"""Ordered executor offload of CPU heavy parsers for the RF Bridge Sensor integration.
+
+Parsers declaring ``CPU_HEAVY`` run on a small dedicated thread pool instead
+of the event loop. Results are handed back in the order the frames were
+received, whichever call finishes first, so updates of a device are never
+reordered: once a frame is offloaded, frames parsed on the loop after it are
+queued behind it until it completes.
+
+A thread pool is used because parser modules are loaded by file path and
+cannot be imported by name in a worker process. Pure Python parsers still
+share the GIL with the loop, but the loop gets it back every switch interval
+instead of waiting for the whole call, and parsers built on ``hashlib``,
+``zlib`` and the like run in parallel.
+"""
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OrderedOffload:
+    """Bounded pool running calls off the loop, delivering results in submission order.
+
+    ``deliver(context, result)`` is called on the event loop for every
+    submitted or appended item, in order. At most ``max_pending`` items wait
+    for delivery; ``async_wait_room`` lets the producer wait for a slot.
+    """
+
+    def __init__(self, workers, max_pending, deliver):
+        self._workers = workers
+        self._max_pending = max_pending
+        self._deliver = deliver
+        self._executor = None
+        # (future, context) in submission order
+        self._pending = deque()
+        self._room = None
+        self.submitted = 0
+        self.max_depth = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    @property
+    def full(self):
+        """Return True if no more items can be queued for delivery."""
+        return len(self._pending) >= self._max_pending
+
+    def submit(self, loop, context, func, *args):
+        """Run ``func(*args)`` in the pool; its result is delivered in order."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="rf_bridge_parser")
+        future = loop.run_in_executor(self._executor, func, *args)
+        self.submitted += 1
+        self._append(future, context)
+        future.add_done_callback(self._drain)
+
+    def append(self, loop, context, result):
+        """Queue an already known result behind the items in flight."""
+        future = loop.create_future()
+        future.set_result(result)
+        self._append(future, context)
+
+    def _append(self, future, context):
+        """Queue a future for delivery."""
+        self._pending.append((future, context))
+        if len(self._pending) > self.max_depth:
+            self.max_depth = len(self._pending)
+
+    def _drain(self, _future=None):
+        """Deliver the completed items at the head of the queue."""
+        pending = self._pending
+        while pending and pending[0][0].done():
+            future, context = pending.popleft()
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                _LOGGER.error("Offloaded RF parser call failed: %r", error)
+                continue
+            try:
+                self._deliver(context, future.result())
+            except Exception:
+                _LOGGER.exception("Unexpected error delivering offloaded RF data")
+        if self._room is not None and not self.full:
+            self._room.set_result(None)
+            self._room = None
+
+    async def async_wait_room(self):
+        """Wait until an item can be queued."""
+        while self.full:
+            if self._room is None:
+                self._room = asyncio.get_running_loop().create_future()
+            await asyncio.shield(self._room)
+
+    def shutdown(self):
+        """Stop the pool; calls not started yet are cancelled."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def as_dict(self):
+        """Return the offload state for diagnostics."""
+        return {
+            "workers": self._workers,
+            "pending": len(self._pending),
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+        }
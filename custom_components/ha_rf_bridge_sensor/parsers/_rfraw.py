@@ -0,0 +1,273 @@
+"""
+Shared decoder for Tasmota RfRaw bucket frames.
+
+With ``RfRaw 177`` the bridge reports frames in the Portisch ``B1`` format:
+
+    AA B1 04 0190 03D4 0820 1F04 818282...8283 55
+    |  |  |  `-- bucket table --' `- pulses -' `- end
+    |  |  `-- number of buckets
+    `--`-- start and frame type
+
+Each bucket is a pulse duration in microseconds. Every hex digit of the pulse
+string is one pulse: bit 3 is the signal level and the low bits index the
+bucket holding its duration, so ``81`` is a high pulse of bucket 0 followed by
+a low pulse of bucket 1.
+
+``decode_b1`` parses a frame once and caches the result by its data string,
+and every demodulation of a ``BucketFrame`` is cached on the frame. However
+many RfRaw parsers look at a frame during dispatch, its text is parsed once
+and each demodulation runs once. Parsers declaring ``CPU_HEAVY`` run in
+worker threads, so the cache and the frames are safe to use from any
+thread. With fewer than two parsers importing ``decode_b1`` nothing is
+shared, so the dispatcher turns the frame cache off (``set_shared``) and
+``decode_b1`` only parses the frame.
+
+Example:
+
+    from ._rfraw import decode_b1
+
+    def parse(data):
+        frame = decode_b1(data)
+        if frame is None:
+            return None
+        bits = frame.pwm()            # or frame.ppm(), frame.manchester()
+        ...
+"""
+import threading
+
+# Number of recently decoded frames kept; a frame only needs to stay cached
+# while the dispatcher hands it to the parsers
+CACHE_SIZE = 32
+_MISSING = object()
+_DIGITS = "0123456789ABCDEF"
+_FRAMES = {}
+# Guards the eviction and insertion of cached frames
+_FRAMES_LOCK = threading.Lock()
+# Whether several parsers decode the same frames, set by the dispatcher
+_shared = False
+# Frame header -> bucket count, faster than int(token, 16)
+B1_HEADERS = {f"AA B1 {count:02X} ": count for count in range(256)}
+
+
+class BucketFrame:
+    """A parsed B1 bucket frame with cached demodulations."""
+
+    __slots__ = (
+        "data", "_tokens", "_buckets", "_pulses", "_symbols",
+        "_demodulated",
+    )
+
+    def __init__(self, tokens, data):
+        self.data = data
+        self._tokens = tokens
+        self._buckets = None
+        self._pulses = None
+        # (table, translated characters, bits), replaced as a whole so
+        # threads never see a table paired with another table's bits
+        self._symbols = (None, 0, b"")
+        self._demodulated = None
+
+    @classmethod
+    def parse(cls, data):
+        """Parse a B1 frame, returning None if ``data`` is not one.
+
+        Only the frame layout is checked here; the bucket table is converted
+        when a demodulation needs the pulse durations.
+        """
+        split = _split_b1(data)
+        return None if split is None else cls(*split)
+
+    @property
+    def buckets(self):
+        """Return the bucket durations in microseconds."""
+        if self._buckets is None:
+            tokens = self._tokens
+            try:
+                self._buckets = tuple(int(token, 16) for token in tokens[3:int(tokens[2], 16) + 3])
+            except ValueError:
+                self._buckets = ()
+        return self._buckets
+
+    @property
+    def pulses(self):
+        """Return the ``(level, duration)`` pulses of the frame."""
+        if self._pulses is None:
+            # One (level, duration) pair per bucket and level, looked up per digit
+            buckets = self.buckets
+            pairs = {}
+            for index, duration in enumerate(buckets[:8]):
+                pairs[_DIGITS[index]] = pairs[_DIGITS[index].lower()] = (0, duration)
+                pairs[_DIGITS[index + 8]] = pairs[_DIGITS[index + 8].lower()] = (1, duration)
+            try:
+                self._pulses = [pairs[digit] for digit in self.data]
+            except KeyError:
+                self._pulses = []
+        return self._pulses
+
+    def symbol_bits(self, table, count=None):
+        """Map pulse pair bytes to bits with a 256 byte translation table.
+
+        ``table`` maps symbol bytes to ``ord("0")`` / ``ord("1")``; unknown
+        symbols should map to another character, which makes ``int(bits, 2)``
+        reject the frame. Only the first ``count`` symbols are translated if
+        given, though more may be returned. Returns the bit characters as bytes.
+        """
+        data = self.data
+        chars = len(data) if count is None else min(len(data), count * 2)
+        # Parsers normally use the same table, so only the last one is kept
+        cached_table, translated, bits = self._symbols
+        if (table is cached_table or table == cached_table) and translated >= chars:
+            return bits
+        try:
+            bits = bytes.fromhex(data[:chars]).translate(table)
+        except ValueError:
+            bits = b""
+        self._symbols = (table, chars, bits)
+        return bits
+
+    def _cached(self, key):
+        """Return a cached demodulation, or None."""
+        if self._demodulated is None:
+            self._demodulated = {}
+            return None
+        return self._demodulated.get(key)
+
+    def pwm(self):
+        """Pulse width modulation: a high pulse longer than its gap is a 1."""
+        bits = self._cached("pwm")
+        if bits is None:
+            pulses = self.pulses
+            bits = "".join(
+                "1" if high[1] > low[1] else "0"
+                for high, low in zip(pulses[0::2], pulses[1::2])
+                if high[0] and not low[0]
+            )
+            self._demodulated["pwm"] = bits
+        return bits
+
+    def ppm(self):
+        """Pulse position (distance) modulation: a long gap after a pulse is a 1.
+
+        Gaps are split at the midpoint between the shortest and the longest
+        gap of the frame; a trailing sync gap far longer than the rest should
+        be cut off by the parser.
+        """
+        bits = self._cached("ppm")
+        if bits is None:
+            gaps = [duration for level, duration in self.pulses[1::2] if not level]
+            if gaps:
+                threshold = (min(gaps) + max(gaps)) / 2
+                bits = "".join("1" if gap > threshold else "0" for gap in gaps)
+            else:
+                bits = ""
+            self._demodulated["ppm"] = bits
+        return bits
+
+    def manchester(self, inverted=False):
+        """Manchester decoding: a high to low transition is a 1 (0 if ``inverted``).
+
+        Pulses are quantized to one or two half-bit periods of the shortest
+        duration used. Decoding runs until the first invalid pair, starting at
+        the first or the second half-bit, whichever decodes more bits.
+        """
+        key = ("manchester", inverted)
+        bits = self._cached(key)
+        if bits is None:
+            bits = _manchester(self.pulses, "0" if inverted else "1", "1" if inverted else "0")
+            self._demodulated[key] = bits
+        return bits
+
+
+def _manchester(pulses, high_low, low_high):
+    """Decode Manchester coded pulses into bit characters."""
+    if not pulses:
+        return ""
+    half = min(duration for _level, duration in pulses)
+    if not half:
+        return ""
+    levels = []
+    for level, duration in pulses:
+        levels += [level] * (2 if duration > half * 1.5 else 1)
+    best = ""
+    for start in (0, 1):
+        bits = []
+        for first, second in zip(levels[start::2], levels[start + 1::2]):
+            if first == second:
+                break
+            bits.append(high_low if first else low_high)
+        if len(bits) > len(best):
+            best = "".join(bits)
+    return best
+
+
+def _split_b1(data):
+    """Return the tokens up to the pulse string and the pulse string of a B1 frame, or None."""
+    if not isinstance(data, str):
+        return None
+    count = B1_HEADERS.get(data[:9])
+    if count is None:
+        if not data.startswith("AA B1 "):
+            return None
+        try:
+            count = int(data[6:data.find(" ", 6)], 16)
+        except ValueError:
+            return None
+    # Split off the header and bucket tokens only; the pulse string is
+    # normally a single token followed by the end marker
+    tokens = data.split(" ", count + 4)
+    pulse_index = count + 3
+    if len(tokens) <= pulse_index:
+        return None
+    pulses = tokens[pulse_index]
+    if len(tokens) == count + 5:
+        if tokens[-1] != "55":
+            rest = tokens[-1].split(" ")
+            if rest[-1] == "55":
+                del rest[-1]
+            pulses += "".join(rest)
+    elif pulses == "55":
+        return None
+    if len(pulses) % 2:
+        return None
+    return tokens, pulses
+
+
+def set_shared(shared):
+    """Cache decoded frames for several parsers, or only parse them (one parser)."""
+    global _shared
+    _shared = shared
+    if not shared:
+        with _FRAMES_LOCK:
+            _FRAMES.clear()
+
+
+def decode_b1(data):
+    """Return the (cached, if shared) ``BucketFrame`` of a B1 frame, or None."""
+    if not _shared:
+        return BucketFrame.parse(data)
+    frame = _FRAMES.get(data, _MISSING)
+    if frame is _MISSING:
+        frame = BucketFrame.parse(data)
+        with _FRAMES_LOCK:
+            if data not in _FRAMES and len(_FRAMES) >= CACHE_SIZE:
+                del _FRAMES[next(iter(_FRAMES))]
+            _FRAMES[data] = frame
+    return frame
+
+
+def b1_symbol_bits(data, table, count):
+    """Return ``decode_b1(data).symbol_bits(table, count)``, or None if not a B1 frame.
+
+    When frames are not shared, the symbols are translated straight from the
+    text without creating a ``BucketFrame``.
+    """
+    if _shared:
+        frame = decode_b1(data)
+        return None if frame is None else frame.symbol_bits(table, count)
+    split = _split_b1(data)
+    if split is None:
+        return None
+    try:
+        return bytes.fromhex(split[1][:count * 2]).translate(table)
+    except ValueError:
+        return b""
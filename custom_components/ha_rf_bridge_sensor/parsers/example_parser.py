@@ -1,48 +1,37 @@
 """
 Example parser for RF Bridge data.
-"""
-
-def parse(data: str):
-    """
-    Parses a raw RF data string and extracts sensor values.
-
-    The data is expected to be in a specific hex format.
-    - The first 4 characters are the device ID.
-    - The next 4 characters are the temperature.
-    - The next 2 characters are the humidity.
-
-    Args:
-        data: The raw RF data string (e.g., "A1B201F43C").
-
-    Returns:
-        A dictionary with the parsed data if successful, otherwise None.
-        Example: {'id': 'A1B2', 'temperature': 25.0, 'humidity': 60}
-    """
-    if not isinstance(data, str) or len(data) < 10:
-        return None
 
-    try:
-        device_id = data[0:4]
-        
-        temp_hex = data[4:8]
-        temperature = int(temp_hex, 16) / 10.0
+The data is expected to be in a specific hex format.
+- The first 4 characters are the device ID.
+- The next 4 characters are the temperature.
+- The next 2 characters are the humidity.
 
+Example: "A1B201F43C" -> {'id': 'A1B2', 'temperature': 50.0, 'humidity': 60}
+"""
+from ._fieldspec import compile_protocol
+
+# Dispatch prefilter: only hex RfReceived frames of at least 10 characters
+PAYLOAD_KINDS = ("RfReceived",)
+MIN_LENGTH = 10
+MAX_TOKENS = 1
+
+PROTOCOL = {
+    "encoding": "hex",
+    "bits": 40,
+    "id": "{device_id}",
+    "fields": {
+        "device_id": {"offset": 0, "width": 16, "text": True, "hidden": True},
         # Make sure temperature is within a reasonable range
-        if not -50 < temperature < 150:
-            return None
-
-        humidity_hex = data[8:10]
-        humidity = int(humidity_hex, 16)
-
+        "temperature": {
+            "offset": 16, "width": 16, "scale": 0.1, "max": 149.9,
+            "device_class": "temperature", "unit": "°C", "max_jump": 10,
+        },
         # Make sure humidity is within a reasonable range
-        if not 0 <= humidity <= 100:
-            return None
-
-        return {
-            "id": device_id,
-            "temperature": temperature,
-            "humidity": humidity,
-        }
-    except (ValueError, TypeError):
-        # This will catch errors if the hex conversion fails
-        return None
+        "humidity": {
+            "offset": 32, "width": 8, "min": 0, "max": 100,
+            "device_class": "humidity", "unit": "%", "max_jump": 20,
+        },
+    },
+}
+
+parse = compile_protocol(PROTOCOL)
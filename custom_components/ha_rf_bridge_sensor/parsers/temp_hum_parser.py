@@ -1,50 +1,36 @@
 """
 Parser for Temperature and Humidity sensors based on a specific RF data format.
-"""
-
-def parse(data: str):
-    """
-    Parses RF data with a fix for negative temperature handling (Two's Complement).
-    """
-    if not isinstance(data, str) or len(data) < 100:
-        return None
-
-    try:
-        data_array = data.replace('81', '0').replace('82', '1').split(' ')
-
-        if len(data_array) <= 7 or len(data_array[7]) < 37:
-            return None
-
-        binary_data = data_array[7]
-
-        # Extract device_type and device_id
-        device_type = int(binary_data[12:15], 2)
-        device_id = int(binary_data[5:13], 2)
-        composite_id = f"{device_type}-{device_id}"
 
-        # --- TEMPERATURE FIX START ---
-        temp_binary = binary_data[20:29]
-        temp_int = int(temp_binary, 2)
-        
-        # Check if the 9th bit (Sign Bit) is set. 
-        # In a 9-bit integer, if the value is >= 256 (1 << 8), it is negative.
-        if temp_int & (1 << 8):  # Checks if the bit at index 8 (9th bit) is 1
-            temp_int = temp_int - 512
-
-        temperature = temp_int / 10.0
-        # --- TEMPERATURE FIX END ---
-
-        # Extract humidity
-        humidity_binary = binary_data[29:37]
-        humidity = int(humidity_binary, 2)
-
-        return {
-            "id": composite_id,
-            "temperature": temperature,
-            "humidity": humidity,
-        }
-
-    except (ValueError, IndexError, TypeError):
-        return None
-    
-    return None
\ No newline at end of file
+The sensor is received as a Tasmota RfRaw bucket frame. Its pulse string
+holds the bits, encoded as symbol "81" for 0 and "82" for 1. The temperature is a 9 bit
+two's complement value in tenths of a degree.
+"""
+from ._fieldspec import compile_protocol
+
+# Dispatch prefilter: RfRaw frames with at least 8 tokens and 100 characters
+PAYLOAD_KINDS = ("RfRaw",)
+MIN_LENGTH = 100
+MIN_TOKENS = 8
+
+PROTOCOL = {
+    "encoding": "rfraw_b1",
+    "symbols": {"81": 0, "82": 1},
+    "bits": 37,
+    "min_length": 100,
+    "id": "{device_type}-{device_id}",
+    "fields": {
+        "device_type": {"offset": 12, "width": 3, "hidden": True},
+        "device_id": {"offset": 5, "width": 8, "hidden": True},
+        "temperature": {
+            "offset": 20, "width": 9, "signed": True, "scale": 0.1,
+            "device_class": "temperature", "unit": "°C", "max_jump": 10,
+            "aggregates": ["mean_1h", "min_1h", "max_1h", "rate_1h", "mean_24h", "min_24h", "max_24h"],
+        },
+        "humidity": {
+            "offset": 29, "width": 8, "device_class": "humidity", "unit": "%", "max_jump": 20,
+            "aggregates": ["mean_1h", "mean_24h", "min_24h", "max_24h"],
+        },
+    },
+}
+
+parse = compile_protocol(PROTOCOL)
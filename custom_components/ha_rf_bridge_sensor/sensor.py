@@ -1,53 +1,93 @@
+import asyncio
 import json
 import logging
 import os
-import importlib.util
 import time
 import uuid
 
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorEntity,
-    SensorDeviceClass,
     SensorStateClass,
 )
 from homeassistant.components import mqtt
 from homeassistant.core import callback
-from homeassistant.helpers.dispatcher import async_dispatcher_send, async_dispatcher_connect
-from homeassistant.const import UnitOfTemperature, PERCENTAGE
-from .const import DOMAIN, CONF_TOPIC
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.const import EntityCategory
+from .const import (
+    DOMAIN,
+    CONF_TOPIC,
+    CONF_QUEUE_SIZE,
+    CONF_BATCH_SIZE,
+    CONF_OVERFLOW_POLICY,
+    DEFAULT_QUEUE_SIZE,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_OVERFLOW_POLICY,
+    CONF_DEDUPE_WINDOW,
+    DEFAULT_DEDUPE_WINDOW,
+    DEDUPE_CACHE_SIZE,
+    PARSER_SCAN_INTERVAL,
+    CONF_PARSER_BUDGET,
+    CONF_QUARANTINE_TIME,
+    DEFAULT_PARSER_BUDGET,
+    DEFAULT_QUARANTINE_TIME,
+    DISCOVERY_CAPACITY,
+    DISCOVERY_TTL,
+    CONF_DISCOVERY_MIN_HITS,
+    DEFAULT_DISCOVERY_MIN_HITS,
+    DISCOVERY_ADMISSION_WINDOW,
+    CONF_DEADBAND,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_SILENCE,
+    DEFAULT_DEADBAND,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_MAX_SILENCE,
+    WRITE_POLICY_KEYS,
+    METRICS_INTERVAL,
+    CONF_CAPTURE,
+    CONF_CAPTURE_SIZE,
+    DEFAULT_CAPTURE,
+    DEFAULT_CAPTURE_SIZE,
+    CAPTURE_DIR,
+    CAPTURE_FLUSH_INTERVAL,
+    CAPTURE_BATCH_SIZE,
+    CAPTURE_MAX_PENDING,
+    CONF_VOTE_WINDOW,
+    CONF_OUTLIER_FILTER,
+    DEFAULT_VOTE_WINDOW,
+    DEFAULT_OUTLIER_FILTER,
+    VOTE_MAX_CANDIDATES,
+    OUTLIER_WINDOW,
+    OUTLIER_MAX_REJECTS,
+    OFFLOAD_WORKERS,
+    OFFLOAD_MAX_PENDING,
+    CONF_STALE_TIMEOUT,
+    DEFAULT_STALE_TIMEOUT,
+)
+from .admission import NoiseAdmission
+from .aggregates import RollingAggregate
+from .capture import FrameCapture
+from .devices import DeviceRegistry, RFDevice
+from .discovery import DiscoveredDevices
+from .dispatch import ParserDispatcher
+from .ingest import (
+    NEEDS_JSON,
+    BridgeStats,
+    FrameQueue,
+    RepeatFilter,
+    classify_payload,
+    extract_rf_data_json,
+)
+from .loader import ParserLoader
+from .metrics import CoordinatorMetrics, _ms
+from .offload import OrderedOffload
+from .snapshot import CoordinatorSnapshot
+from .staleness import StalenessTracker
+from .validation import OutlierFilter, RepeatVoter
 
 _LOGGER = logging.getLogger(__name__)
 
-# Signal for the coordinator to send updates to sensors
-SIGNAL_UPDATE_SENSOR = "rf_bridge_update_{}"
-
-def load_parsers():
-    """Loads all parser modules from the 'parsers' directory."""
-    parsers_dir = os.path.join(os.path.dirname(__file__), "parsers")
-    if not os.path.exists(parsers_dir):
-        _LOGGER.warning(f"Parsers directory not found: {parsers_dir}")
-        return {}
-        
-    parser_files = [f for f in os.listdir(parsers_dir) if f.endswith(".py") and not f.startswith("__")]
-    
-    loaded_parsers = {}
-    for f in parser_files:
-        module_name = f[:-3]
-        try:
-            spec = importlib.util.spec_from_file_location(
-                f"parsers.{module_name}", os.path.join(parsers_dir, f)
-            )
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            if hasattr(module, "parse"):
-                loaded_parsers[module_name] = module.parse
-                _LOGGER.info(f"Successfully loaded RF parser: {module_name}")
-            else:
-                _LOGGER.warning(f"RF Parser '{module_name}' does not have a 'parse' function.")
-        except Exception as e:
-            _LOGGER.error(f"Failed to load RF parser '{module_name}': {e}")
-    return loaded_parsers
-
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the sensor platform."""
     _LOGGER.info("Setting up sensor platform for entry: %s", config_entry.entry_id)
@@ -72,8 +112,23 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     # Store coordinator in hass.data
     hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = coordinator
     
-    # Load devices immediately
+    # Restore persisted state and load devices immediately
+    await coordinator.async_load_state()
     coordinator.load_configured_devices()
+
+    # Import parsers in the executor and watch them for changes
+    await coordinator.async_load_parsers()
+    config_entry.async_on_unload(
+        async_track_time_interval(hass, coordinator.async_load_parsers, PARSER_SCAN_INTERVAL)
+    )
+
+    # Bring up the entities of every device seen before the restart at once
+    coordinator.async_add_configured_sensors()
+
+    # Start the single consumer draining the ingest queue
+    config_entry.async_create_background_task(
+        hass, coordinator.async_consume_frames(), "rf_bridge_ingest"
+    )
     
     # Subscribe to MQTT and get the unsubscribe callback
     mqtt_unsub = await coordinator.async_subscribe()
@@ -82,6 +137,23 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     if mqtt_unsub:
         config_entry.async_on_unload(mqtt_unsub)
 
+    # Optional diagnostic entities exposing the hot path metrics
+    async_add_entities(
+        [RFBridgeMetricSensor(coordinator, *description) for description in METRIC_SENSORS]
+    )
+    config_entry.async_on_unload(
+        async_track_time_interval(hass, coordinator.async_update_metrics, METRICS_INTERVAL)
+    )
+
+    # Write captured frames in batches and close the capture on unload
+    config_entry.async_on_unload(
+        async_track_time_interval(hass, coordinator.async_flush_capture, CAPTURE_FLUSH_INTERVAL)
+    )
+    config_entry.async_on_unload(coordinator.async_stop_capture)
+    config_entry.async_on_unload(coordinator.async_stop_voting)
+    config_entry.async_on_unload(coordinator.async_stop_offload)
+    config_entry.async_on_unload(coordinator.async_stop_staleness)
+
     # Listen for option updates
     config_entry.async_on_unload(config_entry.add_update_listener(update_listener))
 
@@ -89,7 +161,77 @@ async def update_listener(hass, entry):
     """Handle options update."""
     _LOGGER.info("Options update listener called.")
     coordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator.apply_settings()
     coordinator.load_configured_devices()
+    await coordinator.async_update_subscriptions()
+
+class StateWritePolicy:
+    """When a sensor publishes a new value to the state machine.
+
+    A value is written when it moves more than ``deadband`` away from the last
+    written value, but not more often than every ``min_interval`` seconds.
+    An unchanged value is still written after ``max_silence`` seconds (if
+    non-zero) as a heartbeat.
+    """
+
+    __slots__ = ("deadband", "min_interval", "max_silence")
+
+    def __init__(self, deadband, min_interval, max_silence):
+        self.deadband = deadband
+        self.min_interval = min_interval
+        self.max_silence = max_silence
+
+def _parser_hits(coordinator):
+    """Return the parser hits and misses as state attributes."""
+    return {
+        name: {"hits": health["matches"], "misses": health["calls"] - health["matches"]}
+        for name, health in coordinator.dispatcher.health_report().items()
+    }
+
+
+# key, name, unit, state class, value function, attributes function
+METRIC_SENSORS = (
+    ("frames_received", "Frames received", "frames", SensorStateClass.TOTAL_INCREASING,
+     lambda c: c.metrics.frames_received, None),
+    ("frame_rate", "Frame rate", "frames/s", SensorStateClass.MEASUREMENT,
+     lambda c: c.metrics.frame_rate, None),
+    ("json_errors", "JSON decode failures", None, SensorStateClass.TOTAL_INCREASING,
+     lambda c: c.metrics.json_errors, None),
+    ("parser_matches", "Parser matches", "frames", SensorStateClass.TOTAL_INCREASING,
+     lambda c: c.metrics.matched_frames, _parser_hits),
+    ("unmatched_frames", "Unmatched frames", "frames", SensorStateClass.TOTAL_INCREASING,
+     lambda c: c.metrics.unmatched_frames, None),
+    ("unmatched_ids", "Frames from unconfigured IDs", "frames", SensorStateClass.TOTAL_INCREASING,
+     lambda c: c.metrics.unmatched_ids, None),
+    ("dropped_frames", "Dropped frames", "frames", SensorStateClass.TOTAL_INCREASING,
+     lambda c: c.dropped_frames, None),
+    ("dispatch_latency_p50", "Dispatch latency p50", "ms", SensorStateClass.MEASUREMENT,
+     lambda c: _ms(c.metrics.dispatch_latency.percentile(0.5)), None),
+    ("dispatch_latency_p99", "Dispatch latency p99", "ms", SensorStateClass.MEASUREMENT,
+     lambda c: _ms(c.metrics.dispatch_latency.percentile(0.99)), None),
+)
+
+
+# Rolling aggregates a parser can declare for its numeric measurement fields
+# (the "aggregates" list of a field description), as entities that are
+# disabled by default: key, name suffix, window (seconds), statistic
+AGGREGATE_SENSORS = (
+    ("mean_1h", "1h mean", 3600, "mean"),
+    ("min_1h", "1h min", 3600, "min"),
+    ("max_1h", "1h max", 3600, "max"),
+    ("rate_1h", "1h rate of change", 3600, "rate"),
+    ("mean_24h", "24h mean", 86400, "mean"),
+    ("min_24h", "24h min", 86400, "min"),
+    ("max_24h", "24h max", 86400, "max"),
+)
+
+
+def _is_measurement(value, description):
+    """Return True if a field value is a number described as a measurement."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return description is None or description.get("state_class") == SensorStateClass.MEASUREMENT
+
 
 class RFBridgeCoordinator:
     """Handles MQTT messages and sensor discovery."""
@@ -97,147 +239,804 @@ class RFBridgeCoordinator:
         self.hass = hass
         self.config_entry = config_entry
         self.async_add_entities = None
-        self.topic = config_entry.data.get(CONF_TOPIC)
-        self.parsers = load_parsers()
-        self.created_sensors = set()
-        self.configured_devices = []
-        self._rf_id_map = {}
-        self._discovered_devices = {}
+        self.topics = self._configured_topics()
+        # topic -> unsubscribe callback of the live MQTT subscriptions
+        self._mqtt_unsubs = {}
+        self._message_received = None
+        self._bridges = {}
+        self.metrics = CoordinatorMetrics()
+        self._metric_entities = []
+        self._parser_loader = ParserLoader(
+            os.path.join(os.path.dirname(__file__), "parsers"), f"{__package__}.parsers"
+        )
+        self.dispatcher = ParserDispatcher({})
+        # Configured devices, updated in place by load_configured_devices
+        self._devices = DeviceRegistry()
+        self._discovered = DiscoveredDevices(
+            hass, config_entry.entry_id, DISCOVERY_CAPACITY, DISCOVERY_TTL
+        )
+        self._admission = NoiseAdmission(DEFAULT_DISCOVERY_MIN_HITS, DISCOVERY_ADMISSION_WINDOW)
+        self._snapshot = CoordinatorSnapshot(hass, config_entry.entry_id)
+        self._default_policy = StateWritePolicy(
+            DEFAULT_DEADBAND, DEFAULT_MIN_INTERVAL, DEFAULT_MAX_SILENCE
+        )
+        self._write_policies = {}
+        # internal_id -> {field -> entity}, filled by the entities themselves
+        self._routes = {}
+        # internal_id -> {field -> {window -> (RollingAggregate, {stat -> entity})}},
+        # only for aggregate entities that are enabled
+        self._aggregates = {}
+        self._queue = FrameQueue(DEFAULT_QUEUE_SIZE, DEFAULT_OVERFLOW_POLICY)
+        self._batch_size = DEFAULT_BATCH_SIZE
+        self._repeats = RepeatFilter(DEFAULT_DEDUPE_WINDOW, DEDUPE_CACHE_SIZE)
+        self._voter = RepeatVoter(DEFAULT_VOTE_WINDOW, VOTE_MAX_CANDIDATES)
+        self._vote_unsub = None
+        self._outliers = OutlierFilter(OUTLIER_WINDOW, OUTLIER_MAX_REJECTS)
+        self._offload = OrderedOffload(OFFLOAD_WORKERS, OFFLOAD_MAX_PENDING, self._deliver_offloaded)
+        # Staleness deadlines of all devices, with one timer for the earliest
+        self._staleness = StalenessTracker(DEFAULT_STALE_TIMEOUT)
+        self._stale_unsub = None
+        self._stale_at = None
+        self._reported_drops = 0
+        self._capture = None
+        self._capture_size = None
+        self.apply_settings()
 
     def set_async_add_entities(self, async_add_entities):
         self.async_add_entities = async_add_entities
 
+    @property
+    def configured_devices(self):
+        """Return the configured devices."""
+        return list(self._devices)
+
     def load_configured_devices(self):
-        """Load configured devices from config entry options."""
-        self.configured_devices = self.config_entry.options.get("devices", [])
-        self._rf_id_map = {dev["rf_id"]: dev for dev in self.configured_devices}
-        _LOGGER.debug(f"Loaded configured devices: {self.configured_devices}")
-        _LOGGER.debug(f"RF ID map updated: {self._rf_id_map}")
+        """Apply the configured devices from the config entry options.
+
+        The options are applied as a diff against the devices already loaded:
+        devices are added, renamed, re-keyed or removed one at a time together
+        with their entities, so an options change needs no reload of the entry
+        and frames keep flowing while it is applied.
+        """
+        options = {dev["internal_id"]: dev for dev in self.config_entry.options.get("devices", [])}
+        devices = self._devices
+        for device in [device for device in devices if device.internal_id not in options]:
+            self._remove_device(device)
+
+        sensors = []
+        for internal_id, option in options.items():
+            device = devices.get(internal_id)
+            if device is None:
+                device = RFDevice.from_option(option)
+                devices.add(device)
+                sensors += self._add_device(device)
+            elif device.as_option() != option:
+                self._update_device(device, RFDevice.from_option(option))
+        self._add_sensors(sensors)
+        _LOGGER.debug("Loaded %d configured devices", len(devices))
+
+    def _add_device(self, device):
+        """Start routing frames of a new device; returns its sensors, if known yet."""
+        rf_id = device.rf_id
+        self._update_write_policy(device)
+        discovered = self._discovered.pop(rf_id)
+        _LOGGER.info("Added RF device '%s' (%s)", device.name, rf_id)
+        # The staleness timeout runs from the last frame heard, also before a restart
+        heard = discovered or self._snapshot.get(device.internal_id)
+        now = time.monotonic()
+        device.last_frame = now - max(0.0, time.time() - heard["last_seen"]) if heard else now
+        self._track_staleness(device)
+        if discovered is None:
+            return []
+
+        # A device added from the discovered list gets its sensors right away
+        parser_name = discovered.get("parser")
+        if parser_name:
+            self.dispatcher.learn_affinity(rf_id, parser_name)
+            self._devices.set_parser(device, parser_name)
+        self._snapshot.update(
+            device.internal_id, parser_name, discovered["data"], discovered["last_seen"]
+        )
+        return self._new_sensors(device, parser_name, discovered["data"])
+
+    def _update_device(self, device, updated):
+        """Apply a rename, a new RF ID or new overrides to a loaded device."""
+        old_rf_id = device.rf_id
+        old_name = device.name
+        self._devices.update(device, updated.name, updated.rf_id, updated.overrides)
+        self._update_write_policy(device)
+        self._track_staleness(device)
+
+        if device.rf_id != old_rf_id:
+            # The entities stay and follow the new transmitter
+            if self._devices.by_rf_id(old_rf_id) is None:
+                self.dispatcher.forget_affinity(old_rf_id)
+            self._outliers.forget(device.internal_id)
+            self._discovered.remove([device.rf_id])
+            _LOGGER.info(
+                "RF device '%s' now uses RF ID %s instead of %s",
+                device.name, device.rf_id, old_rf_id,
+            )
+        if device.name != old_name:
+            registry = dr.async_get(self.hass)
+            entry = registry.async_get_device(identifiers={(DOMAIN, device.internal_id)})
+            if entry is not None:
+                registry.async_update_device(entry.id, name=device.name)
+            _LOGGER.info("Renamed RF device '%s' to '%s'", old_name, device.name)
+
+    def _remove_device(self, device):
+        """Stop routing frames of a removed device and remove its entities."""
+        rf_id = device.rf_id
+        internal_id = device.internal_id
+        self._devices.remove(internal_id)
+        if self._devices.by_rf_id(rf_id) is None:
+            self.dispatcher.forget_affinity(rf_id)
+        self._write_policies.pop(internal_id, None)
+        self._outliers.forget(internal_id)
+        self._staleness.untrack(internal_id)
+        self._snapshot.remove(internal_id)
+
+        # Removing the device also removes its entities from the registry and from hass
+        registry = dr.async_get(self.hass)
+        entry = registry.async_get_device(identifiers={(DOMAIN, internal_id)})
+        if entry is not None:
+            registry.async_remove_device(entry.id)
+        _LOGGER.info("Removed RF device '%s' (%s)", device.name, rf_id)
+
+    async def async_load_state(self):
+        """Restore the persisted discovered devices and device snapshot."""
+        await self._discovered.async_load(time.time())
+        await self._snapshot.async_load()
+
+    def async_add_configured_sensors(self):
+        """Create the sensors of all configured devices in the snapshot in one batch.
+
+        Devices that never sent a frame get their sensors with the first one,
+        as their fields are not known until then.
+        """
+        # Forget devices removed from the options while they were not loaded
+        self._snapshot.retain(self._devices)
+        sensors = []
+        for device in self._devices:
+            stored = self._snapshot.get(device.internal_id)
+            if stored is None:
+                continue
+            if stored.get("parser"):
+                self.dispatcher.learn_affinity(device.rf_id, stored["parser"])
+                self._devices.set_parser(device, stored["parser"])
+            sensors += self._new_sensors(device, stored.get("parser"), stored["data"])
+        self._add_sensors(sensors)
+
+    async def async_load_parsers(self, _now=None):
+        """Import new or changed parsers in the executor and swap them in."""
+        modules = await self.hass.async_add_executor_job(self._parser_loader.load_changed)
+        if modules is None:
+            return
+        # Replace the dispatcher in one assignment so frames never see a partial set
+        self.dispatcher = self.dispatcher.with_parsers(modules)
+        _LOGGER.info("Active RF parsers: %s", ", ".join(self.dispatcher.parser_names))
+        for parser_name in self._devices.parser_counts():
+            if parser_name not in modules:
+                _LOGGER.warning(
+                    "RF parser '%s' was removed, devices decoded by it: %s", parser_name,
+                    ", ".join(device.name for device in self._devices.by_parser(parser_name)),
+                )
+
+    def apply_settings(self):
+        """Apply the tuning settings stored in the config entry options."""
+        options = self.config_entry.options
+        self._batch_size = options.get(CONF_BATCH_SIZE, DEFAULT_BATCH_SIZE)
+        self._queue.configure(
+            options.get(CONF_QUEUE_SIZE, DEFAULT_QUEUE_SIZE),
+            options.get(CONF_OVERFLOW_POLICY, DEFAULT_OVERFLOW_POLICY),
+        )
+        self._repeats.configure(options.get(CONF_DEDUPE_WINDOW, DEFAULT_DEDUPE_WINDOW))
+        self._admission.configure(options.get(CONF_DISCOVERY_MIN_HITS, DEFAULT_DISCOVERY_MIN_HITS))
+        vote_window = options.get(CONF_VOTE_WINDOW, DEFAULT_VOTE_WINDOW)
+        if vote_window != self._voter.window:
+            self._voter.configure(vote_window)
+            # The open ballots were moved to the new window
+            self.async_stop_voting()
+            if vote_window:
+                self._schedule_ballots()
+            else:
+                # Hand over the frames still waiting for their vote
+                self._deliver_ballots(self._voter.close_all(self._repeats.repeats))
+        self._outliers.configure(options.get(CONF_OUTLIER_FILTER, DEFAULT_OUTLIER_FILTER))
+        self.dispatcher.configure(
+            options.get(CONF_PARSER_BUDGET, DEFAULT_PARSER_BUDGET) / 1000,
+            options.get(CONF_QUARANTINE_TIME, DEFAULT_QUARANTINE_TIME),
+        )
+        self._default_policy = StateWritePolicy(
+            options.get(CONF_DEADBAND, DEFAULT_DEADBAND),
+            options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+            options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+        )
+        self._build_write_policies()
+        self._staleness.configure(options.get(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT))
+        for device in self._devices:
+            self._track_staleness(device)
+        self._configure_capture(
+            options.get(CONF_CAPTURE, DEFAULT_CAPTURE),
+            options.get(CONF_CAPTURE_SIZE, DEFAULT_CAPTURE_SIZE),
+        )
+
+    def _configure_capture(self, enabled, size):
+        """Start, stop or resize the raw frame capture."""
+        capture = self._capture
+        if capture is not None and (not enabled or size != self._capture_size):
+            self._capture = None
+            self.hass.async_create_task(capture.async_close(self.hass))
+            _LOGGER.info("Stopped capturing RF frames to %s", capture.directory)
+        if enabled and self._capture is None:
+            directory = self.hass.config.path(CAPTURE_DIR, self.config_entry.entry_id)
+            self._capture = FrameCapture(
+                directory, size * 1024 * 1024, CAPTURE_BATCH_SIZE, CAPTURE_MAX_PENDING
+            )
+            self._capture_size = size
+            _LOGGER.info("Capturing RF frames to %s (up to %d MB)", directory, size)
+
+    async def async_flush_capture(self, _now=None):
+        """Write the captured frames collected since the last flush."""
+        if self._capture is not None:
+            await self._capture.async_flush(self.hass)
+
+    async def async_stop_capture(self):
+        """Write the remaining captured frames and close the capture."""
+        capture, self._capture = self._capture, None
+        if capture is not None:
+            await capture.async_close(self.hass)
+
+    def _build_write_policies(self):
+        """Resolve the state write policy of every device with overrides."""
+        self._write_policies = {}
+        for device in self._devices:
+            self._update_write_policy(device)
+
+    def _update_write_policy(self, device):
+        """Resolve the state write policy of a device, if it has overrides."""
+        internal_id = device.internal_id
+        overrides = device.overrides
+        if not any(key in overrides for key in WRITE_POLICY_KEYS):
+            self._write_policies.pop(internal_id, None)
+            return
+        default = self._default_policy
+        self._write_policies[internal_id] = StateWritePolicy(
+            overrides.get(CONF_DEADBAND, default.deadband),
+            overrides.get(CONF_MIN_INTERVAL, default.min_interval),
+            overrides.get(CONF_MAX_SILENCE, default.max_silence),
+        )
+
+    def write_policy(self, internal_id):
+        """Return the state write policy of a device."""
+        return self._write_policies.get(internal_id, self._default_policy)
+
+    def _track_staleness(self, device):
+        """Track the staleness deadline of a device.
+
+        A stale device becomes available again once it is heard from or its
+        timeout no longer expired.
+        """
+        staleness = self._staleness
+        if not device.available:
+            if staleness.is_stale(device, time.monotonic()):
+                return
+            self._set_available(device, True)
+        deadline = staleness.track(device)
+        if deadline is not None and (self._stale_at is None or deadline < self._stale_at):
+            self._schedule_staleness()
+
+    def _schedule_staleness(self):
+        """Wake up at the earliest staleness deadline."""
+        if self._stale_unsub is not None:
+            self._stale_unsub()
+            self._stale_unsub = None
+        self._stale_at = self._staleness.next_deadline()
+        if self._stale_at is not None:
+            self._stale_unsub = async_call_later(
+                self.hass, max(0.0, self._stale_at - time.monotonic()), self._async_check_stale
+            )
+
+    @callback
+    def _async_check_stale(self, _now):
+        """Mark the devices whose deadline passed without a frame unavailable."""
+        self._stale_unsub = None
+        for device in self._staleness.pop_expired(time.monotonic(), self._devices):
+            _LOGGER.info(
+                "RF device '%s' sent no frame for %d seconds, marking it unavailable",
+                device.name, self._staleness.timeout(device),
+            )
+            self._set_available(device, False)
+        self._schedule_staleness()
+
+    def _set_available(self, device, available):
+        """Change the availability of a device and write the state of its entities."""
+        device.available = available
+        internal_id = device.internal_id
+        for entity in self._routes.get(internal_id, {}).values():
+            entity.async_write_ha_state()
+        for windows in self._aggregates.get(internal_id, {}).values():
+            for _aggregate, entities in windows.values():
+                for entity in entities.values():
+                    entity.async_write_ha_state()
+
+    def device_available(self, internal_id):
+        """Return False if a device went silent for longer than its staleness timeout."""
+        device = self._devices.get(internal_id)
+        return device is None or device.available
+
+    @callback
+    def async_stop_staleness(self):
+        """Cancel the staleness timer."""
+        if self._stale_unsub is not None:
+            self._stale_unsub()
+            self._stale_unsub = None
+        self._stale_at = None
+
+    @property
+    def dropped_frames(self):
+        """Return the number of frames shed by the ingest queue."""
+        return self._queue.dropped
+
+    def diagnostics(self):
+        """Return the coordinator state for the diagnostics download."""
+        return {
+            "topics": self.topics,
+            "bridges": {topic: stats.as_dict() for topic, stats in self._bridges.items()},
+            "configured_devices": len(self._devices),
+            "devices_per_parser": self._devices.parser_counts(),
+            "discovered_devices": len(self._discovered),
+            "discovery_admission": self._admission.as_dict(),
+            "snapshot_devices": len(self._snapshot),
+            "ingest": {
+                "queued": len(self._queue),
+                "dropped": self._queue.dropped,
+                "dropped_duplicates": self._queue.dropped_duplicates,
+                "repeats_suppressed": self._repeats.suppressed,
+            },
+            "capture": self._capture.as_dict() if self._capture else None,
+            "offload": self._offload.as_dict(),
+            "staleness": {
+                "default_timeout_s": self._staleness.default_timeout,
+                "tracked": len(self._staleness),
+                "heap_entries": self._staleness.heap_entries,
+                "unavailable": sum(not device.available for device in self._devices),
+            },
+            "validation": {
+                "voting": self._voter.as_dict(),
+                "outliers": self._outliers.as_dict(),
+            },
+            "metrics": self.metrics.as_dict(),
+            "parsers": self.dispatcher.health_report(),
+        }
 
     @property
     def discovered_devices(self):
         """Return recently discovered devices."""
-        now = time.time()
-        # Keep devices for 24 hours
-        recent_devices = {
-            dev_id: info
-            for dev_id, info in self._discovered_devices.items()
-            if now - info["last_seen"] < 86400
-        }
-        return recent_devices
+        return self._discovered.items(time.time())
+
+    def _configured_topics(self):
+        """Return the bridge topics, as changed in the settings or entered at setup."""
+        # A comma separated list of topics, which may contain MQTT wildcards
+        topic = self.config_entry.options.get(CONF_TOPIC, self.config_entry.data.get(CONF_TOPIC))
+        return [topic.strip() for topic in topic.split(",") if topic.strip()]
 
     async def async_subscribe(self):
-        """Subscribe to the MQTT topic."""
-        _LOGGER.info(f"Subscribing to MQTT topic: {self.topic}")
+        """Subscribe to the MQTT topics of all bridges."""
+        metrics = self.metrics
+
         @callback
         def message_received(message):
             """Handle new MQTT messages."""
+            metrics.messages += 1
+            source = message.topic
+            stats = self._bridges.get(source)
+            if stats is None:
+                stats = self._bridges[source] = BridgeStats()
             try:
-                payload = json.loads(message.payload)
-                
-                rf_data = None
-                if "RfReceived" in payload and isinstance(payload.get("RfReceived"), dict):
-                    rf_data = payload["RfReceived"].get("Data")
-                elif "RfRaw" in payload and isinstance(payload.get("RfRaw"), dict):
-                    rf_data = payload["RfRaw"].get("Data")
-
-                if not rf_data:
-                    _LOGGER.debug(f"Ignoring MQTT message, no 'Data' found in payload: {payload}")
-                    return
+                # Classify the raw bytes; only unusual layouts get a full JSON decode
+                frame = classify_payload(message.payload)
+                if frame is NEEDS_JSON:
+                    metrics.json_fallbacks += 1
+                    frame = extract_rf_data_json(message.payload)
 
-                # Process data in the background
-                self.hass.async_create_task(self.async_process_rf_data(rf_data))
+                if frame is None:
+                    metrics.non_rf_messages += 1
+                    _LOGGER.debug("Ignoring MQTT message without RF data: %s", message.payload)
+                    return
+                kind, rf_data = frame
 
-            except (json.JSONDecodeError, Exception) as e:
-                _LOGGER.debug(f"Error processing MQTT payload: {e}")
+                metrics.frames_received += 1
+                now = time.monotonic()
+                stats.frames += 1
+                stats.last_seen = time.time()
 
-        # RETURN the unsubscribe callback
-        return await mqtt.async_subscribe(self.hass, self.topic, message_received)
+                # Record every copy, repeats included, when capturing
+                capture = self._capture
+                if capture is not None and capture.record(stats.last_seen, source, kind, rf_data):
+                    self.hass.async_create_task(capture.async_flush(self.hass))
 
-    async def async_process_rf_data(self, rf_data):
-        """Test RF data against all available parsers."""
-        _LOGGER.debug(f"Processing RF data: {rf_data}")
-        for parser_name, parse_func in self.parsers.items():
-            try:
-                parsed_data = parse_func(rf_data)
-                if parsed_data and "id" in parsed_data:
-                    _LOGGER.debug(f"Parser '{parser_name}' matched data: {parsed_data}")
-                    rf_id = parsed_data["id"]
-                    
-                    device_config = self._rf_id_map.get(rf_id)
-                    _LOGGER.debug(f"Device config for RF ID '{rf_id}': {device_config}")
-                    _LOGGER.debug(f"Configured RF ID map: {self._rf_id_map}")
-                    
-                    if device_config:
-                        internal_id = device_config["internal_id"]
-                        
-                        # Only add sensors if we haven't seen this internal_id in this session
-                        if internal_id not in self.created_sensors:
-                            _LOGGER.info(f"New configured device matched. Internal ID '{internal_id}' not in created_sensors set. Adding new sensors.")
-                            self.async_add_new_sensors(device_config, parsed_data)
-                            self.created_sensors.add(internal_id)
-                        else:
-                            _LOGGER.debug(f"Device with internal ID '{internal_id}' already has sensors created. Skipping sensor creation.")
-                        # Dispatch update signal
-                        async_dispatcher_send(self.hass, SIGNAL_UPDATE_SENSOR.format(internal_id), parsed_data)
-                    elif rf_id not in self._rf_id_map:
-                        # Add to discovered list if not configured
-                        if rf_id not in self._rf_id_map:
-                            self._discovered_devices[rf_id] = {
-                                "data": parsed_data,
-                                "last_seen": time.time()
-                            }
+                # Drop repeated copies of a frame we just handled, from any bridge
+                first_source = self._repeats.first_source(rf_data, source, now)
+                if first_source is not None:
+                    if first_source == source:
+                        stats.repeats += 1
+                    else:
+                        stats.cross_bridge_copies += 1
                     return
-                _LOGGER.debug(f"Parser '{parser_name}' did not match or returned no ID.")
+                stats.first_copies += 1
+
+                # Hand the frame to the ingest consumer
+                self._queue.put((rf_data, kind, source))
+
+            except json.JSONDecodeError as e:
+                metrics.json_errors += 1
+                _LOGGER.debug("Invalid JSON in MQTT payload: %s", e)
             except Exception as e:
-                _LOGGER.error(f"Error in parser '{parser_name}': {e}")
+                _LOGGER.debug("Error processing MQTT payload: %s", e)
 
-    def async_add_new_sensors(self, device_config, parsed_data):
-        """Add new sensor entities for a newly discovered device."""
-        if not self.async_add_entities:
-            _LOGGER.error("Cannot add entities because async_add_entities is not set.")
+        self._message_received = message_received
+        await self.async_update_subscriptions()
+
+        # RETURN the unsubscribe callback
+        return self.async_unsubscribe
+
+    async def async_update_subscriptions(self):
+        """Bring the MQTT subscriptions in line with the configured topics."""
+        self.topics = self._configured_topics()
+        if self._message_received is None:
+            # Not subscribed (yet), async_subscribe picks the topics up
             return
+        unsubs = self._mqtt_unsubs
+        for topic in [topic for topic in unsubs if topic not in self.topics]:
+            _LOGGER.info("Unsubscribing from MQTT topic: %s", topic)
+            unsubs.pop(topic)()
+        for topic in self.topics:
+            if topic not in unsubs:
+                _LOGGER.info("Subscribing to MQTT topic: %s", topic)
+                unsubs[topic] = await mqtt.async_subscribe(
+                    self.hass, topic, self._message_received, encoding=None
+                )
+
+    @callback
+    def async_unsubscribe(self):
+        """Drop all MQTT subscriptions."""
+        self._message_received = None
+        for unsub in self._mqtt_unsubs.values():
+            unsub()
+        self._mqtt_unsubs.clear()
 
-        new_sensors = []
-        internal_id = device_config["internal_id"]
-        device_name = device_config["name"]
+    async def async_consume_frames(self):
+        """Drain the ingest queue in micro-batches for the lifetime of the entry."""
+        queue = self._queue
+        record_latency = self.metrics.dispatch_latency.record
+        while True:
+            await queue.async_wait()
+            for rf_data, kind, source in queue.pop_batch(self._batch_size):
+                start = time.perf_counter()
+                try:
+                    await self.async_process_rf_data(rf_data, kind, source)
+                except Exception:
+                    _LOGGER.exception("Unexpected error processing RF data: %s", rf_data)
+                record_latency(time.perf_counter() - start)
 
-        if "temperature" in parsed_data:
-            new_sensors.append(RFBridgeSensor(
-                self.hass, self.config_entry, internal_id, device_name, 
-                "Temperature", UnitOfTemperature.CELSIUS, SensorDeviceClass.TEMPERATURE
-            ))
-        if "humidity" in parsed_data:
-            new_sensors.append(RFBridgeSensor(
-                self.hass, self.config_entry, internal_id, device_name, 
-                "Humidity", PERCENTAGE, SensorDeviceClass.HUMIDITY
+            if queue.dropped != self._reported_drops and not queue:
+                _LOGGER.warning(
+                    "RF ingest queue overflowed, dropped %d frames (%d total)",
+                    queue.dropped - self._reported_drops, queue.dropped,
+                )
+                self._reported_drops = queue.dropped
+
+            # Give the event loop back between batches
+            await asyncio.sleep(0)
+
+    async def async_process_rf_data(self, rf_data, kind=None, source=None):
+        """Parse RF data with the parsers indexed for its payload kind.
+
+        CPU heavy parsers run in the offload pool when no light parser claims
+        the frame. While offloaded frames are in flight, the results of later
+        frames queue up behind them, so frames are handled in arrival order.
+        """
+        dispatcher = self.dispatcher
+        heavy = []
+        parser_name, parsed_data = dispatcher.dispatch(rf_data, kind, heavy)
+        offload = self._offload
+        if heavy and parsed_data is None:
+            if offload.full:
+                await offload.async_wait_room()
+            offload.submit(
+                self.hass.loop, (dispatcher, rf_data, kind, source),
+                dispatcher.run_heavy, heavy, rf_data,
+            )
+            return
+        if offload:
+            offload.append(self.hass.loop, (None, rf_data, kind, source), (parser_name, parsed_data))
+            return
+        self._handle_parsed(rf_data, kind, source, parser_name, parsed_data)
+
+    def _deliver_offloaded(self, context, result):
+        """Handle a frame from the offload pool, in arrival order."""
+        dispatcher, rf_data, kind, source = context
+        if dispatcher is not None:
+            parser_name, parsed_data = dispatcher.complete_heavy(rf_data, kind, result)
+        else:
+            parser_name, parsed_data = result
+        self._handle_parsed(rf_data, kind, source, parser_name, parsed_data)
+
+    def _handle_parsed(self, rf_data, kind, source, parser_name, parsed_data):
+        """Route a parsed frame to its device, or record it as discovered."""
+        if parsed_data is None:
+            self.metrics.unmatched_frames += 1
+            _LOGGER.debug("No parser matched %s data from %s: %s", kind, source, rf_data)
+            return
+
+        self.metrics.matched_frames += 1
+        rf_id = parsed_data["id"]
+        device = self._devices.by_rf_id(rf_id)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Parser '%s' matched %s data from %s: %s (device: %s)",
+                parser_name, kind, source, parsed_data,
+                device.internal_id if device else None,
+            )
+
+        if device:
+            device.last_frame = time.monotonic()
+            if not device.available:
+                _LOGGER.info("RF device '%s' is sending again", device.name)
+                self._track_staleness(device)
+            if device.parser != parser_name:
+                self.dispatcher.learn_affinity(rf_id, parser_name)
+                self._devices.set_parser(device, parser_name)
+            voter = self._voter
+            if not voter.window:
+                self._deliver(device, parser_name, parsed_data)
+            elif voter.submit(
+                device.internal_id, rf_data, (device, parser_name, parsed_data), time.monotonic(),
+            ) and self._vote_unsub is None:
+                self._schedule_ballots()
+        else:
+            # List unconfigured IDs once they were heard often enough to not be noise
+            self.metrics.unmatched_ids += 1
+            now = time.time()
+            if rf_id in self._discovered or self._admission.admit(rf_id, now):
+                self._discovered.record(rf_id, parser_name, parsed_data, now)
+
+    def _deliver(self, device, parser_name, parsed_data):
+        """Validate a parsed frame of a configured device and update its entities."""
+        internal_id = device.internal_id
+        previous = self._snapshot.get(internal_id)
+        previous_data = previous["data"] if previous else None
+        if self._outliers.enabled:
+            parsed_data = self._reject_outliers(internal_id, parser_name, parsed_data, previous_data)
+
+        # Add sensors for the device's first frame and for fields not seen before
+        if not device.fields.issuperset(parsed_data):
+            self._add_sensors(self._new_sensors(device, parser_name, parsed_data))
+        self._snapshot.update(internal_id, parser_name, parsed_data, time.time())
+        self._route_update(internal_id, parsed_data, previous_data)
+        aggregates = self._aggregates.get(internal_id)
+        if aggregates:
+            self._update_aggregates(aggregates, parsed_data)
+
+    def _update_aggregates(self, aggregates, parsed_data):
+        """Add the field values to the enabled rolling aggregates of a device."""
+        now = time.monotonic()
+        for field, windows in aggregates.items():
+            value = parsed_data.get(field)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            for aggregate, entities in windows.values():
+                aggregate.add(now, value)
+                for stat, entity in entities.items():
+                    result = aggregate.value(stat)
+                    if result is not None:
+                        entity.async_update_value(round(result, 3))
+
+    def _reject_outliers(self, internal_id, parser_name, parsed_data, previous_data):
+        """Replace outlying measurements with the last known values.
+
+        Only numeric measurement fields whose description gives a
+        ``max_jump`` are checked; a rejected field keeps its previous value,
+        or is left out if there is none.
+        """
+        descriptions = self.dispatcher.field_descriptions(parser_name)
+        accepted = parsed_data
+        for field, value in parsed_data.items():
+            description = descriptions.get(field)
+            max_jump = description.get("max_jump") if description else None
+            if max_jump is None or not _is_measurement(value, description):
+                continue
+            if self._outliers.accept(internal_id, field, value, max_jump):
+                continue
+            if accepted is parsed_data:
+                accepted = dict(parsed_data)
+            if previous_data is not None and field in previous_data:
+                accepted[field] = previous_data[field]
+            else:
+                del accepted[field]
+            _LOGGER.debug("Rejected outlier %s=%s of device %s", field, value, internal_id)
+        return accepted
+
+    def _schedule_ballots(self):
+        """Wake up when the oldest open ballot closes."""
+        deadline = self._voter.next_deadline()
+        if deadline is not None:
+            self._vote_unsub = async_call_later(
+                self.hass, max(0.0, deadline - time.monotonic()), self._async_close_ballots
+            )
+
+    @callback
+    def _async_close_ballots(self, _now):
+        """Deliver the winners of the ballots that closed."""
+        self._vote_unsub = None
+        self._deliver_ballots(self._voter.close_due(time.monotonic(), self._repeats.repeats))
+        self._schedule_ballots()
+
+    def _deliver_ballots(self, winners):
+        """Deliver voted frames of devices that are still configured."""
+        for device, parser_name, parsed_data in winners:
+            if self._devices.get(device.internal_id) is device:
+                self._deliver(device, parser_name, parsed_data)
+
+    @callback
+    def async_stop_offload(self):
+        """Stop the offload pool; frames still being parsed there are dropped."""
+        self._offload.shutdown()
+
+    @callback
+    def async_stop_voting(self):
+        """Cancel the ballot timer; frames still waiting for their vote are dropped."""
+        if self._vote_unsub is not None:
+            self._vote_unsub()
+            self._vote_unsub = None
+
+    def _route_update(self, internal_id, parsed_data, previous_data):
+        """Hand changed field values straight to the entities that show them."""
+        routes = self._routes.get(internal_id)
+        if not routes:
+            return
+        # Unchanged values only matter when a heartbeat write may be due
+        skip_unchanged = previous_data is not None and not self.write_policy(internal_id).max_silence
+        for field, entity in routes.items():
+            value = parsed_data.get(field)
+            if value is None or (skip_unchanged and value == previous_data.get(field)):
+                continue
+            entity.async_update_value(value)
+
+    @callback
+    def async_update_metrics(self, _now=None):
+        """Refresh the frame rate and the enabled metric entities."""
+        self.metrics.update_rate(time.monotonic())
+        for entity in self._metric_entities:
+            entity.async_write_ha_state()
+
+    @callback
+    def async_register_metric_entity(self, entity):
+        """Refresh a metric entity periodically; returns the unregister callback."""
+        self._metric_entities.append(entity)
+
+        @callback
+        def unregister():
+            self._metric_entities.remove(entity)
+
+        return unregister
+
+    @callback
+    def async_register_entity(self, internal_id, field, entity):
+        """Route a device field to an entity; returns the unregister callback."""
+        self._routes.setdefault(internal_id, {})[field] = entity
+
+        @callback
+        def unregister():
+            routes = self._routes.get(internal_id)
+            if routes and routes.get(field) is entity:
+                del routes[field]
+                if not routes:
+                    del self._routes[internal_id]
+
+        return unregister
+
+    @callback
+    def async_register_aggregate(self, internal_id, field, window, stat, entity):
+        """Keep a rolling aggregate for an entity; returns the unregister callback.
+
+        Entities of the same field and window share one aggregate.
+        """
+        windows = self._aggregates.setdefault(internal_id, {}).setdefault(field, {})
+        if window not in windows:
+            windows[window] = (RollingAggregate(window), {})
+        windows[window][1][stat] = entity
+
+        @callback
+        def unregister():
+            fields = self._aggregates.get(internal_id, {})
+            windows = fields.get(field, {})
+            entities = windows.get(window, (None, {}))[1]
+            if entities.get(stat) is entity:
+                del entities[stat]
+                if not entities:
+                    del windows[window]
+                    if not windows:
+                        del fields[field]
+                        if not fields:
+                            del self._aggregates[internal_id]
+
+        return unregister
+
+    def _new_sensors(self, device, parser_name, parsed_data):
+        """Return sensors for the fields of a device that have none yet.
+
+        Entities are described by the field descriptions of the parser that
+        decodes the device; fields it does not describe get a plain sensor.
+        Numeric measurement fields also get the (disabled) rolling aggregate
+        sensors their description asks for.
+        """
+        internal_id = device.internal_id
+        created = device.fields
+        descriptions = self.dispatcher.field_descriptions(parser_name)
+        sensors = []
+        for field, value in parsed_data.items():
+            if field in created:
+                continue
+            created.add(field)
+            if isinstance(value, (dict, list)):
+                continue
+            description = descriptions.get(field)
+            measurement = _is_measurement(value, description)
+            if description is None:
+                description = {"state_class": SensorStateClass.MEASUREMENT} if measurement else {}
+            sensors.append(RFBridgeSensor(
+                self, internal_id, device.name, field, description, value
             ))
-        
-        if new_sensors:
-            _LOGGER.info(f"Creating sensors for configured RF device '{device_name}'.")
-            self.async_add_entities(new_sensors)
+            if measurement:
+                wanted = description.get("aggregates", ())
+                sensors += [
+                    RFBridgeAggregateSensor(
+                        self, internal_id, device.name, field, description, *aggregate
+                    )
+                    for aggregate in AGGREGATE_SENSORS
+                    if aggregate[0] in wanted
+                ]
+        return sensors
 
-class RFBridgeSensor(SensorEntity):
+    def _add_sensors(self, sensors):
+        """Add new sensor entities in one batch."""
+        if not sensors:
+            return
+        if not self.async_add_entities:
+            _LOGGER.error("Cannot add entities because async_add_entities is not set.")
+            return
+        _LOGGER.info("Creating %d sensors for configured RF devices", len(sensors))
+        self.async_add_entities(sensors)
+
+class RFBridgeSensor(RestoreSensor):
     """Representation of a sensor that is updated by the coordinator."""
     
     _attr_has_entity_name = True # Modern HA naming convention
 
-    def __init__(self, hass, config_entry, internal_id, device_name, sensor_type, unit, device_class):
-        self._hass = hass
-        self._config_entry = config_entry
+    def __init__(self, coordinator, internal_id, device_name, field, description, value=None):
+        self._coordinator = coordinator
+        self._hass = coordinator.hass
+        self._config_entry = coordinator.config_entry
         self._internal_id = internal_id
         self._device_name = device_name
-        self._sensor_type = sensor_type
-        
-        # Name of the sensor (e.g., "Temperature"). 
+
+        # Name of the sensor (e.g., "Temperature").
         # Combined with device name because _attr_has_entity_name = True
-        self._attr_name = sensor_type
-        
-        self._attr_unique_id = f"{config_entry.entry_id}_{internal_id}_{sensor_type.lower()}"
-        self._attr_native_unit_of_measurement = unit
-        self._attr_device_class = device_class
-        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_name = description.get("name") or field.replace("_", " ").capitalize()
+
+        self._attr_unique_id = f"{self._config_entry.entry_id}_{internal_id}_{field}"
+        self._attr_native_unit_of_measurement = description.get("unit")
+        self._attr_device_class = description.get("device_class")
+        self._attr_state_class = description.get("state_class")
         self._attr_should_poll = False
+        # Last known value (from the snapshot or the frame that created the sensor)
+        self._attr_native_value = value
+        self._field = field
+        self._last_written = None
+        self._last_write_time = None
+        self._flush_unsub = None
 
     @property
     def device_info(self):
@@ -252,20 +1051,169 @@ class RFBridgeSensor(SensorEntity):
         }
 
     async def async_added_to_hass(self):
-        """Register for updates."""
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self._hass,
-                SIGNAL_UPDATE_SENSOR.format(self._internal_id),
-                self._async_update_state,
-            )
-        )
+        """Restore the last state and register for updates."""
+        await super().async_added_to_hass()
+        if self._attr_native_value is None:
+            last_data = await self.async_get_last_sensor_data()
+            if last_data is not None:
+                self._attr_native_value = last_data.native_value
+
+        self.async_on_remove(self._async_register())
+
+    @property
+    def available(self):
+        """Return False while the device is stale."""
+        return self._coordinator.device_available(self._internal_id)
+
+    @callback
+    def _async_register(self):
+        """Register with the coordinator for updates; returns the unregister callback."""
+        return self._coordinator.async_register_entity(self._internal_id, self._field, self)
+
+    async def async_will_remove_from_hass(self):
+        """Cancel a pending deferred write."""
+        if self._flush_unsub:
+            self._flush_unsub()
+            self._flush_unsub = None
 
     @callback
-    def _async_update_state(self, data):
-        """Update the sensor's state."""
-        value = data.get(self._sensor_type.lower())
-        if value is not None:
-            self._attr_native_value = value
+    def async_update_value(self, value):
+        """Update the sensor's state, coalescing writes per its write policy."""
+        self._attr_native_value = value
+
+        now = time.monotonic()
+        last_write = self._last_write_time
+        if last_write is None:
+            self._async_write(value, now)
+            return
+
+        policy = self._coordinator.write_policy(self._internal_id)
+        elapsed = now - last_write
+        if self._is_change(value, policy.deadband):
+            if elapsed >= policy.min_interval:
+                self._async_write(value, now)
+            elif self._flush_unsub is None:
+                # Publish the latest value once the minimum interval has passed
+                self._flush_unsub = async_call_later(
+                    self._hass, policy.min_interval - elapsed, self._async_flush
+                )
+        elif policy.max_silence and elapsed >= policy.max_silence:
+            # Heartbeat write of an unchanged value, which Home Assistant
+            # would otherwise discard as a duplicate state
+            self._async_write(value, now, force=True)
+
+    def _is_change(self, value, deadband):
+        """Return True if a value differs enough from the last written one."""
+        last = self._last_written
+        if last is None:
+            return True
+        try:
+            return abs(value - last) > deadband if deadband else value != last
+        except TypeError:
+            return value != last
+
+    @callback
+    def _async_write(self, value, now, force=False):
+        """Write the state and remember what was written.
+
+        ``force`` writes the state even if it is unchanged, for this write only.
+        """
+        if self._flush_unsub:
+            self._flush_unsub()
+            self._flush_unsub = None
+        self._last_written = value
+        self._last_write_time = now
+        if not force:
+            self.async_write_ha_state()
+            return
+        self._attr_force_update = True
+        try:
             self.async_write_ha_state()
-        _LOGGER.debug(f"State update for {self.unique_id}. New value: {value}")
\ No newline at end of file
+        finally:
+            self._attr_force_update = False
+
+    @callback
+    def _async_flush(self, _now):
+        """Write a value held back by the minimum interval."""
+        self._flush_unsub = None
+        value = self._attr_native_value
+        if self._is_change(value, self._coordinator.write_policy(self._internal_id).deadband):
+            self._async_write(value, time.monotonic())
+
+
+class RFBridgeAggregateSensor(RFBridgeSensor):
+    """Rolling aggregate of a device field, kept by the coordinator.
+
+    The aggregate is computed from the frames received while the entity is
+    enabled; it starts over after a restart and never queries the recorder.
+    The value from before a restart is therefore not restored: the entity is
+    unknown until the next frame instead of showing a window that is gone.
+    """
+
+    # Optional: users enable the aggregates they want
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, internal_id, device_name, field, description, key, label, window, stat):
+        if stat == "rate":
+            unit = description.get("unit")
+            description = {
+                "name": description.get("name"),
+                "unit": f"{unit}/h" if unit else None,
+                "state_class": SensorStateClass.MEASUREMENT,
+            }
+        super().__init__(coordinator, internal_id, device_name, field, description)
+        self._attr_name = f"{self._attr_name} {label}"
+        self._attr_unique_id = f"{self._attr_unique_id}_{key}"
+        self._window = window
+        self._stat = stat
+
+    async def async_added_to_hass(self):
+        """Register for updates without restoring the last state."""
+        await super(RFBridgeSensor, self).async_added_to_hass()
+        self.async_on_remove(self._async_register())
+
+    @callback
+    def _async_register(self):
+        """Register for the aggregate instead of the raw field."""
+        return self._coordinator.async_register_aggregate(
+            self._internal_id, self._field, self._window, self._stat, self
+        )
+
+class RFBridgeMetricSensor(SensorEntity):
+    """Diagnostic sensor exposing one of the coordinator's hot path metrics."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    # Optional: users enable the metrics they want to watch
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, key, name, unit, state_class, value_fn, attributes_fn):
+        self._coordinator = coordinator
+        self._value_fn = value_fn
+        self._attributes_fn = attributes_fn
+        self._attr_name = name
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_metric_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+
+    @property
+    def device_info(self):
+        """Link the metric to the bridge device."""
+        return {"identifiers": {(DOMAIN, self._coordinator.config_entry.entry_id)}}
+
+    @property
+    def native_value(self):
+        """Return the current metric value."""
+        return self._value_fn(self._coordinator)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the metric's breakdown, if any."""
+        if self._attributes_fn is None:
+            return None
+        return self._attributes_fn(self._coordinator)
+
+    async def async_added_to_hass(self):
+        """Register for periodic refreshes."""
+        self.async_on_remove(self._coordinator.async_register_metric_entity(self))
@@ -0,0 +1,71 @@
+"""Persisted coordinator snapshot for the RF Bridge Sensor integration."""
+import logging
+
+from homeassistant.helpers.storage import Store
+
+from .const import STORAGE_VERSION, STORAGE_SAVE_DELAY, STORAGE_KEY_SNAPSHOT
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CoordinatorSnapshot:
+    """Last parsed payload of every configured device that created sensors.
+
+    The snapshot is restored at startup so entities of configured devices can
+    be created with a valid state before their device transmits again.
+    """
+
+    def __init__(self, hass, entry_id):
+        self._devices = {}
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY_SNAPSHOT.format(entry_id))
+        self._save_pending = False
+
+    def __contains__(self, internal_id):
+        return internal_id in self._devices
+
+    def __len__(self):
+        return len(self._devices)
+
+    async def async_load(self):
+        """Restore the persisted snapshot."""
+        stored = await self._store.async_load()
+        if stored:
+            self._devices = stored.get("devices", {})
+            _LOGGER.debug("Restored snapshot of %d RF devices", len(self._devices))
+
+    def get(self, internal_id):
+        """Return the stored ``{"parser", "data", "last_seen"}`` of a device."""
+        return self._devices.get(internal_id)
+
+    def update(self, internal_id, parser_name, parsed_data, now):
+        """Record the latest parsed payload of a configured device."""
+        self._devices[internal_id] = {
+            "parser": parser_name,
+            "data": parsed_data,
+            "last_seen": now,
+        }
+        self._schedule_save()
+
+    def remove(self, internal_id):
+        """Drop a device that is no longer configured."""
+        if self._devices.pop(internal_id, None) is not None:
+            self._schedule_save()
+
+    def retain(self, internal_ids):
+        """Drop devices that are no longer configured."""
+        removed = [internal_id for internal_id in self._devices if internal_id not in internal_ids]
+        for internal_id in removed:
+            del self._devices[internal_id]
+        if removed:
+            self._schedule_save()
+
+    def _schedule_save(self):
+        """Persist the snapshot after a delay, once per batch of changes."""
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    def _data_to_save(self):
+        """Return the data to persist."""
+        self._save_pending = False
+        return {"devices": self._devices}
@@ -0,0 +1,108 @@
+"""Device staleness deadlines for the RF Bridge Sensor integration.
+
+A configured device that sends no frame for its staleness timeout is marked
+unavailable. Rather than a timer per device, the deadlines of all devices sit
+in one heap of ``(deadline, internal_id)`` entries and the coordinator keeps
+a single timer for the earliest. Frames only move ``device.last_frame``; an
+expired entry is checked against it and pushed again with the later
+deadline, so the heap holds one live entry per device and is touched about
+once per timeout rather than once per frame.
+"""
+import heapq
+
+from .const import CONF_STALE_TIMEOUT
+
+
+class StalenessTracker:
+    """Staleness deadlines of devices, in one heap with lazy re-checks.
+
+    Every tracked device has one live deadline in ``_deadlines``. Entries on
+    the heap that no longer match it (superseded by a new timeout, or of a
+    device that is no longer tracked) are skipped once they reach the top.
+    """
+
+    def __init__(self, default_timeout):
+        self.default_timeout = default_timeout
+        self._heap = []
+        # internal_id -> deadline of its live heap entry
+        self._deadlines = {}
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    @property
+    def heap_entries(self):
+        """Return the number of heap entries, superseded ones included."""
+        return len(self._heap)
+
+    def configure(self, default_timeout):
+        """Change the timeout of devices that do not override it.
+
+        The caller re-tracks the devices to move their deadlines.
+        """
+        self.default_timeout = default_timeout
+
+    def timeout(self, device):
+        """Return the staleness timeout of a device in seconds; 0 never expires."""
+        return device.overrides.get(CONF_STALE_TIMEOUT, self.default_timeout)
+
+    def is_stale(self, device, now):
+        """Return True if a device's timeout expired since its last frame."""
+        timeout = self.timeout(device)
+        return bool(timeout) and device.last_frame is not None and device.last_frame + timeout <= now
+
+    def track(self, device):
+        """Set the deadline of a device from its last frame and timeout.
+
+        Returns the deadline if a new one was pushed, otherwise None. A
+        device with a timeout of 0 or that was never heard from is no longer
+        tracked.
+        """
+        internal_id = device.internal_id
+        timeout = self.timeout(device)
+        if not timeout or device.last_frame is None:
+            self._deadlines.pop(internal_id, None)
+            return None
+        deadline = device.last_frame + timeout
+        if self._deadlines.get(internal_id) == deadline:
+            return None
+        self._deadlines[internal_id] = deadline
+        heapq.heappush(self._heap, (deadline, internal_id))
+        return deadline
+
+    def untrack(self, internal_id):
+        """Stop tracking a removed device."""
+        self._deadlines.pop(internal_id, None)
+
+    def next_deadline(self):
+        """Return the earliest live deadline, or None if no device is tracked."""
+        heap = self._heap
+        deadlines = self._deadlines
+        # Drop the entries that were superseded or untracked
+        while heap and deadlines.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_expired(self, now, devices):
+        """Return the devices whose deadline passed without a frame.
+
+        ``devices`` maps internal IDs to devices. The expired devices are no
+        longer tracked; devices heard from since their entry was pushed are
+        tracked again with their later deadline.
+        """
+        heap = self._heap
+        deadlines = self._deadlines
+        expired = []
+        while heap and heap[0][0] <= now:
+            deadline, internal_id = heapq.heappop(heap)
+            if deadlines.get(internal_id) != deadline:
+                continue
+            del deadlines[internal_id]
+            device = devices.get(internal_id)
+            if device is None:
+                continue
+            if not self.is_stale(device, now):
+                self.track(device)
+                continue
+            expired.append(device)
+        return expired
@@ -1,29 +1,54 @@
 """
 Test script for RF Bridge parsers.
 
-This script allows you to test your parser modules against a sample RF data string.
+This script allows you to test your parser modules against a sample RF data string,
+or against a whole corpus of captured frames.
 
 Usage:
     python3 test_parser.py <RF_DATA_STRING>
+    python3 test_parser.py --file <FILE> [--file <FILE> ...] [--processes N] [--json]
 
 Example:
     python3 test_parser.py A1B201F43C
+    python3 test_parser.py --file captured.txt
+    mosquitto_sub -t 'tele/+/RESULT' -C 10000 | python3 test_parser.py --file -
+
+In batch mode every line of the files ("-" reads stdin) is either a bare RF
+data string or a Tasmota RfReceived/RfRaw MQTT payload, optionally prefixed
+with a topic and a tab. A capture directory or ``.bin`` segment written by the
+integration's frame capture is read directly. Every parser is run on every
+frame across a process pool and the script reports which parsers claim which
+frame shapes (payload kind, length and token count, as used by the
+dispatcher), frames claimed by more than one parser, frames no parser claims
+and the throughput of each parser.
 """
 import os
 import sys
 import importlib.util
 import argparse
+import json
+import multiprocessing
+import threading
+import time
+from collections import Counter
+from itertools import islice
 
 # Add the component's root directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from parsers import *
+from capture import read_capture
+
+PAYLOAD_KINDS = ("RfReceived", "RfRaw")
+
+# Frames handed to a worker process at a time
+CHUNK_SIZE = 1000
 
-def load_parsers():
+def load_parsers(verbose=True):
     """Loads all parser modules from the 'parsers' directory."""
     parsers_dir = os.path.join(os.path.dirname(__file__), "parsers")
-    parser_files = [f for f in os.listdir(parsers_dir) if f.endswith(".py") and not f.startswith("__")]
-    
+    parser_files = sorted(f for f in os.listdir(parsers_dir) if f.endswith(".py") and not f.startswith("_"))
+
     loaded_parsers = []
     for f in parser_files:
         module_name = f[:-3]
@@ -34,18 +59,278 @@ def load_parsers():
         spec.loader.exec_module(module)
         if hasattr(module, "parse"):
             loaded_parsers.append((module_name, module.parse))
-            print(f"-> Loaded parser: {module_name}")
+            if verbose:
+                print(f"-> Loaded parser: {module_name}")
         else:
-            print(f"-> WARNING: {module_name} does not have a 'parse' function.")
+            print(f"-> WARNING: {module_name} does not have a 'parse' function.", file=sys.stderr)
 
     return loaded_parsers
 
+def read_frames(paths, default_kind=None, counts=None):
+    """Iterate ``(kind, data)`` frames from files; "-" reads stdin.
+
+    Frames are read as they are consumed. If given, the ``counts`` Counter
+    is kept up to date with the ``frames`` read and non-RF lines ``skipped``.
+    """
+    if counts is None:
+        counts = Counter()
+    for path in paths:
+        if os.path.isdir(path) or path.endswith(".bin"):
+            for _timestamp, _topic, kind, data in read_capture(path):
+                counts["frames"] += 1
+                yield kind, data
+            continue
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8", errors="replace")
+        try:
+            for line in stream:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                # Drop a "topic<TAB>" prefix
+                line = line.rpartition("\t")[2]
+                if not line.startswith("{"):
+                    counts["frames"] += 1
+                    yield default_kind, line
+                    continue
+                frame = _frame_from_payload(line)
+                if frame is None:
+                    counts["skipped"] += 1
+                else:
+                    counts["frames"] += 1
+                    yield frame
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+def _chunks(frames, size):
+    """Slice an iterable of frames into lists of up to ``size`` frames, lazily."""
+    frames = iter(frames)
+    while True:
+        chunk = list(islice(frames, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _frame_from_payload(payload):
+    """Return the ``(kind, data)`` of an RfReceived/RfRaw payload, or None."""
+    try:
+        decoded = json.loads(payload)
+    except ValueError:
+        return None
+    if not isinstance(decoded, dict):
+        return None
+    for kind in PAYLOAD_KINDS:
+        section = decoded.get(kind)
+        if isinstance(section, dict) and isinstance(section.get("Data"), str):
+            return kind, section["Data"]
+    return None
+
+def shape_of(kind, data):
+    """Return the dispatcher's shape key of a frame as a label."""
+    return f"{kind or '-'}/{len(data)}/{data.count(' ') + 1}"
+
+# Per worker process state, set by _init_worker
+_PARSERS = []
+_SAMPLES = 0
+
+def _init_worker(samples):
+    """Load the parsers once per worker process."""
+    global _PARSERS, _SAMPLES
+    _PARSERS = load_parsers(verbose=False)
+    _SAMPLES = samples
+
+def _evaluate_chunk(frames):
+    """Run every parser on every frame of a chunk."""
+    stats = {name: [0, 0, 0, 0.0] for name, _ in _PARSERS}  # calls, matches, errors, seconds
+    matrix = {}
+    ambiguous = []
+    ambiguous_count = 0
+    unclaimed = []
+    unclaimed_count = 0
+    errors = {}
+    clock = time.perf_counter
+
+    for kind, data in frames:
+        claims = []
+        for name, parse_func in _PARSERS:
+            stat = stats[name]
+            start = clock()
+            try:
+                result = parse_func(data)
+            except Exception as e:
+                stat[3] += clock() - start
+                stat[0] += 1
+                stat[2] += 1
+                errors.setdefault(name, f"{e!r} on {data!r}")
+                continue
+            stat[3] += clock() - start
+            stat[0] += 1
+            if result and "id" in result:
+                stat[1] += 1
+                claims.append(name)
+
+        row = matrix.setdefault(shape_of(kind, data), Counter())
+        row["total"] += 1
+        if not claims:
+            row["unclaimed"] += 1
+            unclaimed_count += 1
+            if len(unclaimed) < _SAMPLES:
+                unclaimed.append(data)
+            continue
+        for name in claims:
+            row[name] += 1
+        if len(claims) > 1:
+            ambiguous_count += 1
+            if len(ambiguous) < _SAMPLES:
+                ambiguous.append({"data": data, "parsers": claims})
+
+    return stats, matrix, ambiguous_count, ambiguous, unclaimed_count, unclaimed, errors
+
+def evaluate_corpus(frames, processes, samples):
+    """Evaluate a corpus of frames, spreading chunks over a process pool.
+
+    ``frames`` may be any iterable; it is read one chunk ahead of the
+    workers, so the corpus is never held in memory as a whole.
+    """
+    report = {
+        "parsers": {},
+        "matrix": {},
+        "ambiguous": {"count": 0, "samples": []},
+        "unclaimed": {"count": 0, "samples": []},
+        "errors": {},
+    }
+    totals = {}
+
+    def merge(result):
+        stats, matrix, ambiguous_count, ambiguous, unclaimed_count, unclaimed, errors = result
+        for name, values in stats.items():
+            total = totals.setdefault(name, [0, 0, 0, 0.0])
+            for index, value in enumerate(values):
+                total[index] += value
+        for shape, row in matrix.items():
+            report["matrix"].setdefault(shape, Counter()).update(row)
+        report["ambiguous"]["count"] += ambiguous_count
+        report["ambiguous"]["samples"].extend(ambiguous[:samples - len(report["ambiguous"]["samples"])])
+        report["unclaimed"]["count"] += unclaimed_count
+        report["unclaimed"]["samples"].extend(unclaimed[:samples - len(report["unclaimed"]["samples"])])
+        for name, error in errors.items():
+            report["errors"].setdefault(name, error)
+
+    chunks = _chunks(frames, CHUNK_SIZE)
+    if processes > 1:
+        # The pool pulls tasks from the iterable in a thread of its own and
+        # does not stop at the number of workers; hold it a few chunks ahead
+        in_flight = threading.Semaphore(processes * 2)
+
+        def feed():
+            for chunk in chunks:
+                in_flight.acquire()
+                yield chunk
+
+        with multiprocessing.Pool(processes, _init_worker, (samples,)) as pool:
+            try:
+                for result in pool.imap_unordered(_evaluate_chunk, feed()):
+                    in_flight.release()
+                    merge(result)
+            finally:
+                # Unblock the feeder if the loop ended early
+                for _ in range(processes * 2):
+                    in_flight.release()
+    else:
+        _init_worker(samples)
+        for chunk in chunks:
+            merge(_evaluate_chunk(chunk))
+
+    for name, (calls, matches, errors, seconds) in sorted(totals.items()):
+        report["parsers"][name] = {
+            "calls": calls,
+            "matches": matches,
+            "errors": errors,
+            "us_per_frame": round(seconds / calls * 1e6, 3) if calls else None,
+            "frames_per_s": round(calls / seconds) if seconds else None,
+        }
+    # Most common shapes first
+    report["matrix"] = {
+        shape: dict(row)
+        for shape, row in sorted(report["matrix"].items(), key=lambda item: -item[1]["total"])
+    }
+    return report
+
+def print_report(report, shapes):
+    """Print a corpus report as tables."""
+    names = list(report["parsers"])
+    print(
+        f"\nFrames: {report['frames']} ({report['skipped']} non-RF lines skipped), "
+        f"{len(report['matrix'])} shapes, {report['elapsed_s']} s with {report['processes']} processes"
+    )
+
+    print("\nMatch matrix (frames claimed per shape):")
+    columns = names + ["unclaimed", "total"]
+    widths = [max(len(column), 9) for column in columns]
+    shape_width = max([len("kind/length/tokens")] + [len(shape) for shape in report["matrix"]])
+    print("  " + "kind/length/tokens".ljust(shape_width) + "".join(
+        f"  {column:>{width}}" for column, width in zip(columns, widths)
+    ))
+    for index, (shape, row) in enumerate(report["matrix"].items()):
+        if index == shapes:
+            print(f"  ... {len(report['matrix']) - shapes} more shapes")
+            break
+        print("  " + shape.ljust(shape_width) + "".join(
+            f"  {row.get(column, 0):>{width}}" for column, width in zip(columns, widths)
+        ))
+
+    ambiguous = report["ambiguous"]
+    print(f"\nAmbiguous frames (claimed by more than one parser): {ambiguous['count']}")
+    for sample in ambiguous["samples"]:
+        print(f"  {sample['data']}  <- {', '.join(sample['parsers'])}")
+
+    unclaimed = report["unclaimed"]
+    print(f"\nUnclaimed frames: {unclaimed['count']}")
+    for sample in unclaimed["samples"]:
+        print(f"  {sample}")
+
+    print("\nParser throughput:")
+    for name, stats in report["parsers"].items():
+        print(
+            f"  {name}: {stats['matches']} matches, {stats['errors']} errors, "
+            f"{stats['us_per_frame']} us/frame ({stats['frames_per_s']} frames/s)"
+        )
+    for name, error in report["errors"].items():
+        print(f"ERROR: Parser '{name}' raised an exception, first one: {error}")
+
+def run_batch(args):
+    """Evaluate the parsers against the frames in the given files."""
+    counts = Counter()
+    start = time.perf_counter()
+    report = evaluate_corpus(read_frames(args.file, args.kind, counts), max(1, args.processes), args.samples)
+    report["frames"] = counts["frames"]
+    report["skipped"] = counts["skipped"]
+    report["processes"] = max(1, args.processes)
+    report["elapsed_s"] = round(time.perf_counter() - start, 3)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.shapes)
+
 def main():
     """Main function to test the parsers."""
     parser = argparse.ArgumentParser(description="Test RF Bridge parsers.")
-    parser.add_argument("data", type=str, help="The RF data string to test (e.g., 'A1B201F43C').")
+    parser.add_argument("data", type=str, nargs="?", help="The RF data string to test (e.g., 'A1B201F43C').")
+    parser.add_argument("-f", "--file", action="append", help="File with one frame per line ('-' for stdin) or a frame capture; may be repeated.")
+    parser.add_argument("--kind", choices=PAYLOAD_KINDS, help="Payload kind of bare data lines.")
+    parser.add_argument("-p", "--processes", type=int, default=os.cpu_count() or 1, help="Worker processes in batch mode.")
+    parser.add_argument("--samples", type=int, default=10, help="Example frames listed per category.")
+    parser.add_argument("--shapes", type=int, default=25, help="Frame shapes shown in the match matrix.")
+    parser.add_argument("--json", action="store_true", help="Print the batch report as JSON.")
     args = parser.parse_args()
 
+    if args.file:
+        run_batch(args)
+        return
+    if args.data is None:
+        parser.error("either a data string or --file is required")
+
     print("\nLoading parsers...")
     parsers = load_parsers()
 
@@ -68,7 +353,7 @@ def main():
                 print(f"INFO: Parser '{name}' did not match.")
         except Exception as e:
             print(f"ERROR: Parser '{name}' raised an exception: {e}")
-    
+
     if not found_match:
         print("\nNo parser was able to handle the provided data.")
 
@@ -0,0 +1,208 @@
+"""Per-device validation of parsed frames for the RF Bridge Sensor integration.
+
+Bit errors in a frame can still produce a frame that parses, with an absurd
+value in it (a temperature of 6553.5 °C, a sign-flipped reading). Two checks
+sit between the parsers and the entities:
+
+``RepeatVoter`` holds the first frame of a configured device for a short
+window and collects the other copies of the same transmission; when the
+window closes, the copy received most often wins.
+
+``OutlierFilter`` keeps the last accepted values of the numeric fields a
+parser gives a ``max_jump`` in a small fixed-size ring and rejects a value
+that is far from their median, unless the device keeps reporting it.
+
+Both do a constant amount of work per frame and only keep state for
+configured devices.
+"""
+from array import array
+from collections import deque
+
+# A value is an outlier when it deviates from the median of the window by
+# more than the field's max_jump and this many times the median absolute
+# deviation, so noisy fields get a wider margin
+OUTLIER_MAD_FACTOR = 6.0
+# Values are accepted unconditionally until the window holds this many
+OUTLIER_MIN_SAMPLES = 3
+
+
+class RepeatVoter:
+    """Majority vote across the copies of a transmission, per device.
+
+    The first frame of a device opens a ballot that closes ``window`` seconds
+    later. Every differing frame of the device received until then is a
+    candidate; the identical copies suppressed by the repeat filter count as
+    extra votes for their candidate, which the caller supplies when closing
+    the ballots. As all ballots last the same time, their deadlines are kept
+    in a FIFO queue in deadline order; a new window moves all of them by the
+    same amount, which keeps that order.
+    """
+
+    def __init__(self, window, max_candidates):
+        self.window = window
+        self.max_candidates = max_candidates
+        # key -> {data: [votes, payload]}, candidates in arrival order
+        self._ballots = {}
+        self._deadlines = deque()
+        self.ballots = 0
+        self.overruled = 0
+
+    def configure(self, window):
+        """Change the voting window; 0 disables voting.
+
+        Open ballots close ``window`` seconds after they were opened.
+        """
+        shift = window - self.window
+        self.window = window
+        if shift and self._deadlines:
+            self._deadlines = deque((deadline + shift, key) for deadline, key in self._deadlines)
+
+    def __len__(self):
+        return len(self._ballots)
+
+    def submit(self, key, data, payload, now):
+        """Add a frame to the ballot of ``key``; returns True if it opened one."""
+        ballot = self._ballots.get(key)
+        if ballot is None:
+            self._ballots[key] = {data: [1, payload]}
+            self._deadlines.append((now + self.window, key))
+            self.ballots += 1
+            return True
+        candidate = ballot.get(data)
+        if candidate is not None:
+            candidate[0] += 1
+        elif len(ballot) < self.max_candidates:
+            ballot[data] = [1, payload]
+        return False
+
+    def next_deadline(self):
+        """Return when the oldest open ballot closes, or None."""
+        return self._deadlines[0][0] if self._deadlines else None
+
+    def close_due(self, now, extra_votes):
+        """Close the ballots due by ``now`` and return their winning payloads.
+
+        ``extra_votes(data)`` returns the copies of ``data`` counted elsewhere.
+        Ties go to the candidate received first.
+        """
+        winners = []
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            _deadline, key = deadlines.popleft()
+            ballot = self._ballots.pop(key)
+            best = None
+            best_votes = 0
+            for data, (votes, payload) in ballot.items():
+                votes += extra_votes(data)
+                if votes > best_votes:
+                    best, best_votes = payload, votes
+            if len(ballot) > 1 and best is not next(iter(ballot.values()))[1]:
+                self.overruled += 1
+            winners.append(best)
+        return winners
+
+    def close_all(self, extra_votes):
+        """Close every open ballot, e.g. when voting is switched off."""
+        return self.close_due(float("inf"), extra_votes)
+
+    def as_dict(self):
+        """Return the voting state for diagnostics."""
+        return {
+            "window": self.window,
+            "open_ballots": len(self._ballots),
+            "ballots": self.ballots,
+            "overruled": self.overruled,
+        }
+
+
+class FieldWindow:
+    """Ring buffer of the last accepted values of one field."""
+
+    __slots__ = ("values", "count", "index", "rejects")
+
+    def __init__(self, size):
+        self.values = array("d", bytes(8 * size))
+        self.count = 0
+        self.index = 0
+        self.rejects = 0
+
+    def add(self, value):
+        """Append an accepted value, overwriting the oldest one."""
+        values = self.values
+        values[self.index] = value
+        self.index = (self.index + 1) % len(values)
+        if self.count < len(values):
+            self.count += 1
+
+    def reset(self, value):
+        """Restart the window from a single value."""
+        self.count = 0
+        self.index = 0
+        self.rejects = 0
+        self.add(value)
+
+    def is_outlier(self, value, max_jump):
+        """Return True if ``value`` is far from the median of the window."""
+        count = self.count
+        if count < OUTLIER_MIN_SAMPLES:
+            return False
+        ordered = sorted(self.values[:count])
+        median = ordered[count // 2]
+        spread = sorted(abs(sample - median) for sample in ordered)[count // 2]
+        return abs(value - median) > max(OUTLIER_MAD_FACTOR * spread, max_jump)
+
+
+class OutlierFilter:
+    """Rejects numeric field values that jump away from their recent history.
+
+    Every checked field keeps a ``FieldWindow`` of ``size`` float64 values.
+    Only fields the caller gives a ``max_jump`` (the largest plausible change
+    between readings) are checked. A value rejected ``max_rejects`` times in
+    a row is taken as a real change: it is accepted and the window starts
+    over from it.
+    """
+
+    def __init__(self, size, max_rejects):
+        self.size = size
+        self.max_rejects = max_rejects
+        self.enabled = True
+        # key -> {field -> FieldWindow}
+        self._windows = {}
+        self.rejected = 0
+
+    def configure(self, enabled):
+        """Switch the filter on or off."""
+        self.enabled = enabled
+        if not enabled:
+            self._windows.clear()
+
+    def accept(self, key, field, value, max_jump):
+        """Check a value of a field; returns False if it is rejected."""
+        fields = self._windows.get(key)
+        if fields is None:
+            fields = self._windows[key] = {}
+        window = fields.get(field)
+        if window is None:
+            window = fields[field] = FieldWindow(self.size)
+        if not window.is_outlier(value, max_jump):
+            window.rejects = 0
+            window.add(value)
+            return True
+        window.rejects += 1
+        if window.rejects >= self.max_rejects:
+            window.reset(value)
+            return True
+        self.rejected += 1
+        return False
+
+    def forget(self, key):
+        """Drop the windows of a removed device."""
+        self._windows.pop(key, None)
+
+    def as_dict(self):
+        """Return the filter state for diagnostics."""
+        return {
+            "enabled": self.enabled,
+            "devices": len(self._windows),
+            "rejected": self.rejected,
+        }
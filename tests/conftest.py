@@ -0,0 +1,21 @@
+"""
+Test setup.
+
+The tests cover the modules that do not depend on Home Assistant. The
+integration package's ``__init__`` imports Home Assistant, so the package is
+registered here without running it and the tests import its modules
+directly, e.g. ``from ha_rf_bridge_sensor import dispatch``.
+"""
+import os
+import sys
+import types
+
+PACKAGE = "ha_rf_bridge_sensor"
+COMPONENT_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "custom_components", PACKAGE)
+)
+
+if PACKAGE not in sys.modules:
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [COMPONENT_DIR]
+    sys.modules[PACKAGE] = package
@@ -0,0 +1,49 @@
+"""Tests of the raw frame capture in capture.py."""
+import asyncio
+import threading
+
+from ha_rf_bridge_sensor import capture
+
+
+class FakeHass:
+    """Runs executor jobs in the default executor, like ``hass.async_add_executor_job``."""
+
+    def async_add_executor_job(self, func, *args):
+        return asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def test_close_waits_for_the_running_flush(tmp_path):
+    hass = FakeHass()
+    frame_capture = capture.FrameCapture(str(tmp_path), 1024 * 1024, 10, 1000)
+    writer = frame_capture._writer
+    started = threading.Event()
+    release = threading.Event()
+    write = writer.write
+
+    def slow_write(frames):
+        started.set()
+        release.wait(5)
+        write(frames)
+
+    writer.write = slow_write
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        for index in range(10):
+            frame_capture.record(float(index), "tele/bridge/RESULT", "RfRaw", f"AA B1 {index:02X}")
+        flush = asyncio.create_task(frame_capture.async_flush(hass))
+        await loop.run_in_executor(None, started.wait, 5)
+        # Frames arriving while the first batch is written
+        for index in range(10, 15):
+            frame_capture.record(float(index), "tele/bridge/RESULT", "RfRaw", f"AA B1 {index:02X}")
+        close = asyncio.create_task(frame_capture.async_close(hass))
+        await asyncio.sleep(0.05)
+        assert not close.done()
+        release.set()
+        await asyncio.wait_for(asyncio.gather(flush, close), 5)
+
+    asyncio.run(scenario())
+    frames = list(capture.read_capture(str(tmp_path)))
+    assert [timestamp for timestamp, _topic, _kind, _data in frames] == [float(i) for i in range(15)]
+    assert frame_capture.captured == 15
+    assert frame_capture.as_dict()["pending"] == 0
@@ -0,0 +1,158 @@
+"""Tests of the parser dispatch and health tracking in dispatch.py."""
+import os
+import shutil
+import sys
+import types
+
+import pytest
+
+from ha_rf_bridge_sensor import dispatch, loader
+from ha_rf_bridge_sensor.parsers import _rfraw
+
+
+class FakeClock:
+    """Stands in for ``perf_counter``; parsers advance it to simulate their run time."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(dispatch, "perf_counter", clock)
+    return clock
+
+
+def make_dispatcher(clock, durations):
+    """Return a dispatcher of parsers "a" and "b" taking ``durations[name]`` seconds."""
+    def parser(name):
+        def parse(data):
+            clock.now += durations[name]
+            return {"id": name} if data == name else None
+        return types.SimpleNamespace(parse=parse)
+
+    dispatcher = dispatch.ParserDispatcher({"a": parser("a"), "b": parser("b")})
+    dispatcher.configure(0.001, 60)
+    return dispatcher
+
+
+def test_slow_parser_is_demoted_and_promoted_again(clock):
+    durations = {"a": 0.01, "b": 0.0}
+    dispatcher = make_dispatcher(clock, durations)
+    for _ in range(dispatch.DEMOTE_STRIKES):
+        dispatcher.dispatch("x")
+    assert dispatcher.health_report()["a"]["demoted"]
+    assert dispatcher.parser_names == ["a", "b"]
+    assert [spec.name for spec in dispatcher._index[None]] == ["b", "a"]
+
+    # Back within the budget, but not for long enough yet
+    durations["a"] = 0.0
+    for _ in range(dispatch.PROMOTE_CALLS - 1):
+        dispatcher.dispatch("x")
+    assert dispatcher.health_report()["a"]["demoted"]
+
+    dispatcher.dispatch("x")
+    assert not dispatcher.health_report()["a"]["demoted"]
+    assert [spec.name for spec in dispatcher._index[None]] == ["a", "b"]
+
+
+def test_slow_call_restarts_the_promotion_count(clock):
+    durations = {"a": 0.01, "b": 0.0}
+    dispatcher = make_dispatcher(clock, durations)
+    for _ in range(dispatch.DEMOTE_STRIKES):
+        dispatcher.dispatch("x")
+    durations["a"] = 0.0
+    for _ in range(dispatch.PROMOTE_CALLS - 1):
+        dispatcher.dispatch("x")
+    durations["a"] = 0.01
+    dispatcher.dispatch("x")
+    durations["a"] = 0.0
+    for _ in range(dispatch.PROMOTE_CALLS - 1):
+        dispatcher.dispatch("x")
+    assert dispatcher.health_report()["a"]["demoted"]
+    dispatcher.dispatch("x")
+    assert not dispatcher.health_report()["a"]["demoted"]
+
+
+def test_parser_released_from_quarantine_recovers(clock):
+    durations = {"a": 0.01, "b": 0.0}
+    dispatcher = make_dispatcher(clock, durations)
+    for _ in range(dispatch.QUARANTINE_STRIKES):
+        dispatcher.dispatch("x")
+    assert dispatcher.health_report()["a"]["quarantines"] == 1
+    assert [spec.name for spec in dispatcher._index[None]] == ["b"]
+
+    clock.now += 61
+    durations["a"] = 0.0
+    dispatcher.dispatch("x")
+    assert dispatcher.health_report()["a"]["demoted"]
+    assert [spec.name for spec in dispatcher._index[None]] == ["b", "a"]
+
+    for _ in range(dispatch.PROMOTE_CALLS):
+        dispatcher.dispatch("x")
+    assert not dispatcher.health_report()["a"]["demoted"]
+    assert [spec.name for spec in dispatcher._index[None]] == ["a", "b"]
+
+
+PARSERS_PACKAGE = "rf_dispatch_test_parsers"
+
+PWM_PARSER = """from ._rfraw import decode_b1
+
+FRAMES = []
+
+
+def parse(data):
+    frame = decode_b1(data)
+    FRAMES.append(frame)
+    return {{"id": frame.pwm()}} if {claims} else None
+"""
+
+
+@pytest.fixture
+def rfraw_parsers_dir(tmp_path):
+    """A parsers package with its own copy of _rfraw.py and two parsers using it."""
+    package = types.ModuleType(PARSERS_PACKAGE)
+    package.__path__ = [str(tmp_path)]
+    sys.modules[PARSERS_PACKAGE] = package
+    shutil.copy(_rfraw.__file__, tmp_path / "_rfraw.py")
+    (tmp_path / "a_first.py").write_text(PWM_PARSER.format(claims=False))
+    (tmp_path / "b_second.py").write_text(PWM_PARSER.format(claims=True))
+    yield tmp_path
+    for name in [name for name in sys.modules if name.split(".")[0] == PARSERS_PACKAGE]:
+        del sys.modules[name]
+
+
+def test_loaded_parsers_share_decoded_frames(rfraw_parsers_dir):
+    parser_loader = loader.ParserLoader(str(rfraw_parsers_dir), PARSERS_PACKAGE)
+    modules = parser_loader.load_changed()
+    dispatcher = dispatch.ParserDispatcher(modules)
+    data = "AA B1 04 0190 03D4 0820 1F04 81909081 55"
+    assert dispatcher.dispatch(data, "RfRaw") == ("b_second", {"id": "0110"})
+    # The second parser got the frame the first one decoded
+    assert modules["a_first"].FRAMES[0] is modules["b_second"].FRAMES[0]
+
+    # A changed helper is re-imported, and the new copy is the one switched
+    rfraw = sys.modules[f"{PARSERS_PACKAGE}._rfraw"]
+    mtime = os.stat(rfraw_parsers_dir / "_rfraw.py").st_mtime_ns + 10**9
+    os.utime(rfraw_parsers_dir / "_rfraw.py", ns=(mtime, mtime))
+    modules = parser_loader.load_changed()
+    assert sys.modules[f"{PARSERS_PACKAGE}._rfraw"] is not rfraw
+    dispatcher = dispatcher.with_parsers(modules)
+    data = "AA B1 04 0190 03D4 0820 1F04 90818190 55"
+    assert dispatcher.dispatch(data, "RfRaw") == ("b_second", {"id": "1001"})
+    assert modules["a_first"].FRAMES[0] is modules["b_second"].FRAMES[0]
+
+
+def test_single_decoding_parser_skips_the_frame_cache(rfraw_parsers_dir):
+    os.remove(rfraw_parsers_dir / "a_first.py")
+    modules = loader.ParserLoader(str(rfraw_parsers_dir), PARSERS_PACKAGE).load_changed()
+    rfraw = sys.modules[f"{PARSERS_PACKAGE}._rfraw"]
+    rfraw.set_shared(True)
+    dispatcher = dispatch.ParserDispatcher(modules)
+    dispatcher.dispatch("AA B1 04 0190 03D4 0820 1F04 81909081 55", "RfRaw")
+    assert not rfraw._shared
+    assert not rfraw._FRAMES
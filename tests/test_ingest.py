@@ -0,0 +1,126 @@
+"""Tests of the frame queue and repeat filter in ingest.py."""
+import asyncio
+
+from ha_rf_bridge_sensor import ingest
+from ha_rf_bridge_sensor.const import OVERFLOW_DROP_DUPLICATES, OVERFLOW_DROP_OLDEST
+
+
+def frame(data, source="tele/bridge/RESULT"):
+    return (data, "RfReceived", source)
+
+
+def queued_data(queue):
+    return [data for data, _kind, _source in queue.pop_batch(len(queue))]
+
+
+def test_drop_oldest_sheds_the_oldest_frame():
+    queue = ingest.FrameQueue(2, OVERFLOW_DROP_OLDEST)
+    assert queue.put(frame("a"))
+    assert queue.put(frame("b"))
+    assert not queue.put(frame("c"))
+    assert not queue.put(frame("c"))
+    assert queue.dropped == 2
+    assert queue.dropped_duplicates == 0
+    assert queued_data(queue) == ["c", "c"]
+
+
+def test_drop_duplicates_sheds_the_incoming_copy_first():
+    queue = ingest.FrameQueue(2, OVERFLOW_DROP_DUPLICATES)
+    assert queue.put(frame("a"))
+    assert queue.put(frame("b"))
+    assert not queue.put(frame("a", "tele/other/RESULT"))
+    assert queue.dropped == 1
+    assert queue.dropped_duplicates == 1
+    # No queued copy of "c", so the oldest frame makes room for it
+    assert not queue.put(frame("c"))
+    assert queue.dropped == 2
+    assert queue.dropped_duplicates == 1
+    assert queued_data(queue) == ["b", "c"]
+
+
+def test_drop_duplicates_forgets_popped_frames():
+    queue = ingest.FrameQueue(2, OVERFLOW_DROP_DUPLICATES)
+    queue.put(frame("a"))
+    queue.put(frame("b"))
+    assert [data for data, _kind, _source in queue.pop_batch(1)] == ["a"]
+    queue.put(frame("c"))
+    # "a" left the queue, so a new copy displaces the oldest frame instead
+    assert not queue.put(frame("a"))
+    assert queue.dropped_duplicates == 0
+    assert queued_data(queue) == ["c", "a"]
+
+
+def test_shrinking_the_queue_sheds_the_oldest_frames():
+    queue = ingest.FrameQueue(4, OVERFLOW_DROP_DUPLICATES)
+    for data in "abcd":
+        queue.put(frame(data))
+    queue.configure(2, OVERFLOW_DROP_OLDEST)
+    assert queue.dropped == 2
+    assert queue.policy == OVERFLOW_DROP_OLDEST
+    assert queued_data(queue) == ["c", "d"]
+
+
+def test_pop_batch_returns_frames_in_arrival_order():
+    queue = ingest.FrameQueue(10, OVERFLOW_DROP_OLDEST)
+    for data in "abcde":
+        queue.put(frame(data))
+    assert [item[0] for item in queue.pop_batch(2)] == ["a", "b"]
+    assert len(queue) == 3
+    assert [item[0] for item in queue.pop_batch(5)] == ["c", "d", "e"]
+    assert not len(queue)
+    assert queue.pop_batch(5) == []
+
+
+def test_async_wait_returns_once_a_frame_is_queued():
+    async def run():
+        queue = ingest.FrameQueue(2, OVERFLOW_DROP_OLDEST)
+        waiter = asyncio.ensure_future(queue.async_wait())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        queue.put(frame("a"))
+        await asyncio.wait_for(waiter, 1)
+        # A drained queue blocks again, even though the event was set before
+        queue.pop_batch(1)
+        waiter = asyncio.ensure_future(queue.async_wait())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        waiter.cancel()
+
+    asyncio.run(run())
+
+
+def test_repeat_filter_window_edges():
+    repeats = ingest.RepeatFilter(1.0, 8)
+    assert repeats.first_source("a", "bridge1", 100.0) is None
+    assert repeats.first_source("a", "bridge2", 100.999) == "bridge1"
+    assert repeats.repeats("a") == 1
+    # A copy exactly one window after the first copy starts a new window
+    assert repeats.first_source("a", "bridge2", 101.0) is None
+    assert repeats.repeats("a") == 0
+    assert repeats.first_source("a", "bridge1", 101.5) == "bridge2"
+    assert repeats.suppressed == 2
+
+
+def test_repeat_filter_evicts_expired_and_excess_entries():
+    repeats = ingest.RepeatFilter(1.0, 2)
+    repeats.first_source("a", "bridge", 100.0)
+    repeats.first_source("b", "bridge", 100.5)
+    # Full: the oldest entry makes room even though it has not expired
+    repeats.first_source("c", "bridge", 100.6)
+    assert repeats.first_source("a", "bridge", 100.7) is None
+    # "b" was evicted to make room for "a", and "c" has now expired
+    assert repeats.first_source("b", "bridge", 101.6) is None
+    assert repeats.first_source("c", "bridge", 101.6) is None
+    assert repeats.suppressed == 0
+
+
+def test_repeat_filter_disabled_by_a_zero_window():
+    repeats = ingest.RepeatFilter(1.0, 8)
+    repeats.first_source("a", "bridge", 100.0)
+    repeats.configure(0)
+    assert repeats.first_source("a", "bridge", 100.1) is None
+    assert repeats.repeats("a") == 0
+    # Re-enabling starts from an empty window
+    repeats.configure(1.0)
+    assert repeats.first_source("a", "bridge", 100.2) is None
+    assert repeats.first_source("a", "bridge", 100.3) == "bridge"
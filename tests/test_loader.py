@@ -0,0 +1,88 @@
+"""Tests of the parser hot reload in loader.py."""
+import importlib
+import os
+import sys
+import types
+
+import pytest
+
+from ha_rf_bridge_sensor import loader
+
+PACKAGE = "rf_loader_test_parsers"
+
+HELPER = "VALUE = {value}\n"
+PARSER = """from ._helper import VALUE
+
+
+def parse(data):
+    return {{"value": VALUE, "parser": {name!r}}}
+"""
+
+
+@pytest.fixture
+def parsers_dir(tmp_path):
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(tmp_path)]
+    sys.modules[PACKAGE] = package
+    write(tmp_path, "__init__.py", "", 1)
+    write(tmp_path, "_helper.py", HELPER.format(value=1), 1)
+    write(tmp_path, "a.py", PARSER.format(name="a"), 1)
+    write(tmp_path, "b.py", PARSER.format(name="b"), 1)
+    yield tmp_path
+    for name in [name for name in sys.modules if name.split(".")[0] == PACKAGE]:
+        del sys.modules[name]
+
+
+def write(directory, file_name, source, mtime):
+    """Write a module with an explicit mtime, so reloads never hit a stale .pyc."""
+    path = os.path.join(directory, file_name)
+    with open(path, "w") as file:
+        file.write(source)
+    os.utime(path, ns=(mtime * 10**9, mtime * 10**9))
+
+
+def test_first_load_keeps_imported_helpers(parsers_dir):
+    helper = importlib.import_module(f"{PACKAGE}._helper")
+    parser_loader = loader.ParserLoader(str(parsers_dir), PACKAGE)
+
+    modules = parser_loader.load_changed()
+    assert sorted(modules) == ["a", "b"]
+    assert sys.modules[f"{PACKAGE}._helper"] is helper
+    assert parser_loader.load_changed() is None
+
+
+def test_changed_parser_is_the_only_one_reloaded(parsers_dir):
+    parser_loader = loader.ParserLoader(str(parsers_dir), PACKAGE)
+    first = parser_loader.load_changed()
+    helper = sys.modules[f"{PACKAGE}._helper"]
+
+    write(parsers_dir, "a.py", PARSER.format(name="a2"), 2)
+    modules = parser_loader.load_changed()
+    assert modules["a"] is not first["a"]
+    assert modules["a"].parse("") == {"value": 1, "parser": "a2"}
+    assert modules["b"] is first["b"]
+    assert sys.modules[f"{PACKAGE}._helper"] is helper
+
+
+def test_changed_helper_reloads_every_parser(parsers_dir):
+    parser_loader = loader.ParserLoader(str(parsers_dir), PACKAGE)
+    first = parser_loader.load_changed()
+    helper = sys.modules[f"{PACKAGE}._helper"]
+
+    write(parsers_dir, "_helper.py", HELPER.format(value=2), 2)
+    modules = parser_loader.load_changed()
+    assert sys.modules[f"{PACKAGE}._helper"] is not helper
+    for name in ("a", "b"):
+        assert modules[name] is not first[name]
+        assert modules[name].parse("")["value"] == 2
+
+
+def test_deleted_parser_is_removed(parsers_dir):
+    parser_loader = loader.ParserLoader(str(parsers_dir), PACKAGE)
+    first = parser_loader.load_changed()
+
+    os.remove(os.path.join(parsers_dir, "b.py"))
+    modules = parser_loader.load_changed()
+    assert sorted(modules) == ["a"]
+    assert modules["a"] is first["a"]
+    assert parser_loader.load_changed() is None
@@ -0,0 +1,67 @@
+"""Tests of the shared RfRaw bucket frame decoder in parsers/_rfraw.py."""
+import random
+import sys
+import threading
+
+import pytest
+
+from ha_rf_bridge_sensor.parsers import _rfraw as rfraw
+
+TABLE = bytearray(b"x" * 256)
+TABLE[0x81] = ord("0")
+TABLE[0x82] = ord("1")
+TABLE = bytes(TABLE)
+
+
+def frame(bits):
+    """Return a B1 frame sending ``bits``."""
+    symbols = "".join("81" if bit == "0" else "82" for bit in bits)
+    return f"AA B1 04 0190 03D4 0820 1F04 {symbols} 55"
+
+
+@pytest.fixture
+def shared():
+    rfraw.set_shared(True)
+    interval = sys.getswitchinterval()
+    # Switch threads as often as possible to provoke races
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+    rfraw.set_shared(False)
+
+
+def test_decode_b1_from_several_threads(shared):
+    rng = random.Random(7)
+    samples = ["".join(rng.choice("01") for _ in range(24)) for _ in range(rfraw.CACHE_SIZE * 8)]
+    frames = [frame(bits) for bits in samples]
+    expected_pwm = [rfraw.BucketFrame.parse(data).pwm() for data in frames]
+    errors = []
+
+    def worker(seed):
+        order = list(range(len(frames)))
+        random.Random(seed).shuffle(order)
+        try:
+            for _ in range(20):
+                for index in order:
+                    decoded = rfraw.decode_b1(frames[index])
+                    if decoded.symbol_bits(TABLE, 24)[:24].decode() != samples[index]:
+                        errors.append(f"wrong symbols for frame {index}")
+                    if decoded.pwm() != expected_pwm[index]:
+                        errors.append(f"wrong pwm bits for frame {index}")
+        except Exception as e:  # noqa: BLE001 - reported below
+            errors.append(repr(e))
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(rfraw._FRAMES) <= rfraw.CACHE_SIZE
+
+
+def test_symbol_bits_translates_only_the_symbols_read():
+    decoded = rfraw.BucketFrame.parse(frame("0110"))
+    assert decoded.symbol_bits(TABLE, 2) == b"01"
+    assert decoded.symbol_bits(TABLE) == b"0110"
+    assert decoded.symbol_bits(TABLE, 3) == b"0110"
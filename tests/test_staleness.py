@@ -0,0 +1,89 @@
+"""Tests of the device staleness deadlines in staleness.py."""
+from ha_rf_bridge_sensor.const import CONF_STALE_TIMEOUT
+from ha_rf_bridge_sensor.devices import DeviceRegistry, RFDevice
+from ha_rf_bridge_sensor.staleness import StalenessTracker
+
+
+def heard_device(last_frame, overrides=None):
+    device = RFDevice("internal", "Sensor", "1234", overrides)
+    device.last_frame = last_frame
+    return device
+
+
+def test_device_expires_at_its_deadline():
+    tracker = StalenessTracker(60)
+    device = heard_device(100.0)
+    devices = DeviceRegistry([device])
+    assert tracker.track(device) == 160.0
+    # Tracking an unchanged deadline again pushes nothing
+    assert tracker.track(device) is None
+    assert tracker.pop_expired(159.9, devices) == []
+    assert tracker.pop_expired(160.0, devices) == [device]
+    assert not len(tracker)
+    assert tracker.next_deadline() is None
+
+
+def test_device_heard_from_since_is_tracked_again():
+    tracker = StalenessTracker(60)
+    device = heard_device(100.0)
+    devices = DeviceRegistry([device])
+    tracker.track(device)
+    device.last_frame = 150.0
+    assert tracker.pop_expired(160.0, devices) == []
+    assert tracker.next_deadline() == 210.0
+
+
+def test_shorter_timeout_rearms_an_earlier_deadline():
+    tracker = StalenessTracker(60)
+    device = heard_device(100.0)
+    devices = DeviceRegistry([device])
+    tracker.track(device)
+    tracker.configure(30)
+    assert tracker.track(device) == 130.0
+    assert tracker.next_deadline() == 130.0
+    assert tracker.pop_expired(130.0, devices) == [device]
+    # The entry of the old deadline is skipped once it comes up
+    assert tracker.pop_expired(160.0, devices) == []
+    assert tracker.heap_entries == 0
+
+
+def test_longer_timeout_skips_the_superseded_deadline():
+    tracker = StalenessTracker(60)
+    device = heard_device(100.0)
+    devices = DeviceRegistry([device])
+    tracker.track(device)
+    device.overrides[CONF_STALE_TIMEOUT] = 120
+    assert tracker.track(device) == 220.0
+    assert tracker.heap_entries == 2
+    assert tracker.next_deadline() == 220.0
+    assert tracker.heap_entries == 1
+    assert tracker.pop_expired(160.0, devices) == []
+    assert tracker.pop_expired(220.0, devices) == [device]
+
+
+def test_zero_timeout_stops_tracking():
+    tracker = StalenessTracker(60)
+    device = heard_device(100.0)
+    devices = DeviceRegistry([device])
+    tracker.track(device)
+    tracker.configure(0)
+    assert tracker.track(device) is None
+    assert not len(tracker)
+    assert tracker.next_deadline() is None
+    assert tracker.pop_expired(1000.0, devices) == []
+    assert not tracker.is_stale(device, 1000.0)
+
+    # A device override still applies with the default switched off
+    device.overrides[CONF_STALE_TIMEOUT] = 30
+    assert tracker.track(device) == 130.0
+    assert tracker.is_stale(device, 130.0)
+
+
+def test_removed_and_unheard_devices_are_not_tracked():
+    tracker = StalenessTracker(60)
+    removed = heard_device(100.0)
+    tracker.track(removed)
+    tracker.untrack(removed.internal_id)
+    assert tracker.pop_expired(200.0, DeviceRegistry()) == []
+    assert tracker.track(heard_device(None)) is None
+    assert not len(tracker)
@@ -0,0 +1,64 @@
+"""Tests of the frame validation in validation.py."""
+from ha_rf_bridge_sensor import validation
+
+
+def no_extra_votes(_data):
+    return 0
+
+
+def test_shrinking_the_window_moves_open_ballots():
+    voter = validation.RepeatVoter(10.0, 4)
+    assert voter.submit("a", "A1", "payload a", 100.0)
+    assert voter.submit("b", "B1", "payload b", 105.0)
+
+    voter.configure(2.0)
+    assert voter.next_deadline() == 102.0
+    assert voter.close_due(102.0, no_extra_votes) == ["payload a"]
+    assert voter.next_deadline() == 107.0
+
+    # A ballot opened after the change closes after the new window, not
+    # behind the older ballot
+    assert voter.submit("c", "C1", "payload c", 106.0)
+    assert voter.close_due(107.0, no_extra_votes) == ["payload b"]
+    assert voter.close_due(108.0, no_extra_votes) == ["payload c"]
+    assert not len(voter)
+
+
+def test_growing_the_window_extends_open_ballots():
+    voter = validation.RepeatVoter(1.0, 4)
+    voter.submit("a", "A1", "first", 100.0)
+    voter.configure(3.0)
+    voter.submit("a", "A2", "second", 102.0)
+    voter.submit("a", "A2", "second", 102.5)
+    assert voter.close_due(101.0, no_extra_votes) == []
+    assert voter.close_due(103.0, no_extra_votes) == ["second"]
+    assert voter.as_dict()["overruled"] == 1
+
+
+def test_outlier_filter_rejects_jumps_beyond_max_jump():
+    outliers = validation.OutlierFilter(5, 3)
+    for value in (20.0, 20.1, 20.2):
+        assert outliers.accept("device", "temperature", value, 10)
+    assert outliers.accept("device", "temperature", 29.0, 10)
+    assert not outliers.accept("device", "temperature", 6553.5, 10)
+    assert outliers.rejected == 1
+
+
+def test_outlier_filter_accepts_a_repeated_jump():
+    outliers = validation.OutlierFilter(5, 3)
+    for value in (0.0, 0.0, 0.0):
+        assert outliers.accept("device", "power", value, 50)
+    assert not outliers.accept("device", "power", 500.0, 50)
+    assert not outliers.accept("device", "power", 510.0, 50)
+    # The third value in a row is a real change, and the new level sticks
+    assert outliers.accept("device", "power", 505.0, 50)
+    assert outliers.accept("device", "power", 520.0, 50)
+
+
+def test_outlier_margin_widens_with_the_spread_of_the_field():
+    outliers = validation.OutlierFilter(5, 3)
+    for value in (10.0, 30.0, 20.0, 40.0, 25.0):
+        assert outliers.accept("device", "wind", value, 5)
+    # Median 25, median absolute deviation 5: 6 times that is let through
+    assert outliers.accept("device", "wind", 55.0, 5)
+    assert not outliers.accept("device", "wind", 100.0, 5)